@@ -0,0 +1,301 @@
+"""
+Faux amont local : fortnite-api.com et les sites de prix rejoués depuis un ReplayStore.
+
+Chaque site est servi sous /<hôte>/ sur une seule adresse, ce qui est la disposition
+attendue par FORTNITE_UPSTREAM_URL :
+
+    /fortnite-api.com/v2/shop?language=fr     boutique
+    /fortnite-api.com/v2/cosmetics/br?...     catalogue, /v2/cosmetics/new
+    /fortnite.gg/items/<nom>, /fnbr.co/...    pages de prix (réponse par défaut de l'hôte)
+
+Latence (+ gigue), erreurs injectées (503, ou 429 avec Retry-After) et rotation : toutes
+les --rotate-seconds, la variante suivante de chaque URL est servie. Une boutique
+enregistrée une seule fois tourne quand même : la variante n retire une entry sur
+quatre (celles d'indice n modulo 4) et change data.hash. ETag = sha1 du corps et
+Last-Modified = début de la rotation ; If-None-Match / If-Modified-Since donnent 304.
+
+    cd backend && python benchmarks/fortnite_api_stub.py [--port 8765] [--latency-ms 80]
+        [--error-rate 0.1] [--rotate-seconds 60] [--store DOSSIER]
+
+Sans --store, le stub part des fixtures du dépôt (services/fortnite_shop.json,
+benchmarks/fixtures/price_pages). Enregistrer un vrai passage : lancer l'application
+avec FORTNITE_UPSTREAM_RECORD_DIR=DOSSIER, puis --store DOSSIER.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.upstream_replay import DEFAULT_PATH, RecordedResponse, ReplayStore  # noqa: E402
+
+SHOP_FIXTURE = os.path.join(BACKEND_DIR, "services", "fortnite_shop.json")
+PRICE_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "price_pages")
+# Page servie par défaut pour chaque site de prix
+DEFAULT_PRICE_PAGES = {
+    "fortnite.gg": "fortnite_gg_outfit.html",
+    "fnbr.co": "fnbr_co_item.html",
+    "www.google.com": "google_results.html",
+}
+SYNTHETIC_VARIANTS = 4
+JSON_TYPE = "application/json; charset=utf-8"
+HTML_TYPE = "text/html; charset=utf-8"
+
+
+def seed_fixtures(store: ReplayStore, languages: Tuple[str, ...] = ("fr", "en")) -> None:
+    """Boutique, catalogue et pages de prix tirés des fixtures du dépôt."""
+    with open(SHOP_FIXTURE, encoding="utf-8") as f:
+        shop = json.load(f)["raw_data"]
+    cosmetics: Dict[str, Dict] = {}
+    for entry in shop["entries"]:
+        for br_item in entry.get("brItems", []):
+            cosmetics.setdefault(br_item["id"], br_item)
+    cosmetics_body = json.dumps({"status": 200, "data": list(cosmetics.values())}).encode("utf-8")
+    new_body = json.dumps(
+        {
+            "status": 200,
+            "data": {
+                "hashes": {"br": hashlib.sha1(cosmetics_body).hexdigest()},
+                "items": {"br": []},
+            },
+        }
+    ).encode("utf-8")
+    shop_body = json.dumps({"status": 200, "data": shop}, ensure_ascii=False).encode("utf-8")
+
+    api = "https://fortnite-api.com/v2"
+    for language in languages:
+        store.record(f"{api}/shop?language={language}", 200, JSON_TYPE, shop_body)
+        store.record(f"{api}/cosmetics/br?language={language}", 200, JSON_TYPE, cosmetics_body)
+        store.record(f"{api}/cosmetics/new?language={language}", 200, JSON_TYPE, new_body)
+    for host, page in DEFAULT_PRICE_PAGES.items():
+        with open(os.path.join(PRICE_PAGES, page), "rb") as f:
+            store.record(f"https://{host}{DEFAULT_PATH}", 200, HTML_TYPE, f.read())
+
+
+def rotated_shop(body: bytes, n: int) -> Optional[bytes]:
+    """Variante n d'une boutique enregistrée une seule fois (None si ce n'en est pas une)."""
+    try:
+        document = json.loads(body)
+        data = document["data"]
+        entries = data["entries"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if n % SYNTHETIC_VARIANTS == 0 or not isinstance(entries, list):
+        return body
+    dropped = n % SYNTHETIC_VARIANTS
+    data["entries"] = [entry for index, entry in enumerate(entries) if index % SYNTHETIC_VARIANTS != dropped]
+    data["hash"] = hashlib.sha1(f"{data.get('hash')}-{dropped}".encode()).hexdigest()
+    return json.dumps(document, ensure_ascii=False).encode("utf-8")
+
+
+class UpstreamStub:
+    """Serveur HTTP local ; latence, erreurs et rotation modifiables pendant qu'il tourne."""
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        rotate_seconds: float = 0.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rotate_seconds = rotate_seconds
+        self.started = time.time()
+        # Rotations forcées par rotate(), et date de la dernière
+        self._skipped = 0
+        self._skipped_at = 0.0
+        # Requêtes par chemin et par statut servi
+        self.counters: Dict[str, Counter] = {}
+        self._rng = random.Random(seed)
+        self._variants: Dict[str, List[RecordedResponse]] = {}
+        self._rotated: Dict[Tuple[str, int], bytes] = {}
+        self._lock = threading.Lock()
+        self.server = self._serve(host, port)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def rotation(self) -> Tuple[int, Optional[float]]:
+        """(numéro de la rotation en cours, date de son début ; None sans rotation)."""
+        with self._lock:
+            n, since = self._skipped, (self._skipped_at or None)
+        if self.rotate_seconds > 0:
+            elapsed = int((time.time() - self.started) / self.rotate_seconds)
+            n += elapsed
+            since = max(since or 0.0, self.started + elapsed * self.rotate_seconds)
+        return n, since
+
+    def rotate(self) -> None:
+        """Passe tout de suite à la variante suivante."""
+        with self._lock:
+            self._skipped += 1
+            self._skipped_at = time.time()
+
+    def _count(self, path: str, status: int) -> None:
+        with self._lock:
+            self.counters.setdefault(path, Counter())[status] += 1
+
+    def _pick(self, upstream_url: str) -> Optional[Tuple[RecordedResponse, bytes, float]]:
+        """(variante, corps, date de la variante) servis pour upstream_url maintenant."""
+        with self._lock:
+            variants = self._variants.get(upstream_url)
+        if variants is None:
+            variants = self.store.variants(upstream_url)
+            with self._lock:
+                self._variants[upstream_url] = variants
+        if not variants:
+            return None
+        n, modified = self.rotation()
+        if len(variants) > 1:
+            variant = variants[n % len(variants)]
+            return variant, variant.body, modified or variant.recorded_at
+        variant = variants[0]
+        if n == 0 or variant.status != 200:
+            return variant, variant.body, modified or variant.recorded_at
+        key = (upstream_url, n % SYNTHETIC_VARIANTS)
+        with self._lock:
+            body = self._rotated.get(key)
+        if body is None:
+            body = rotated_shop(variant.body, n) or variant.body
+            with self._lock:
+                self._rotated[key] = body
+        return variant, body, modified
+
+    def handle(self, raw_path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        host, _, rest = raw_path.lstrip("/").partition("/")
+        path = "/" + rest.split("?", 1)[0].rstrip("/")
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            extra = {"Retry-After": "1"} if self.error_status == 429 else {}
+            self._count(f"/{host}{path}", self.error_status)
+            return self.error_status, extra, b"stub: erreur injectee"
+
+        picked = self._pick(f"https://{host}/{rest}") if host else None
+        if picked is None:
+            self._count(f"/{host}{path}", 404)
+            return 404, {}, b"stub: rien d'enregistre pour cette URL"
+        variant, body, modified = picked
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        response_headers = {
+            "Content-Type": variant.content_type or "application/octet-stream",
+            "ETag": etag,
+            "Last-Modified": formatdate(modified, usegmt=True),
+        }
+        if variant.status == 200 and self._not_modified(headers, etag, modified):
+            self._count(f"/{host}{path}", 304)
+            return 304, response_headers, b""
+        self._count(f"/{host}{path}", variant.status)
+        return variant.status, response_headers, body
+
+    @staticmethod
+    def _not_modified(headers: Dict[str, str], etag: str, modified: float) -> bool:
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _serve(self, host: str, port: int) -> ThreadingHTTPServer:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                status, headers, body = stub.handle(self.path, dict(self.headers.items()))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def shutdown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def open_store(directory: Optional[str]) -> ReplayStore:
+    """Le dossier donné, sinon un dossier temporaire rempli avec les fixtures."""
+    if directory:
+        return ReplayStore(directory)
+    store = ReplayStore(tempfile.mkdtemp(prefix="fortnite-upstream-"))
+    seed_fixtures(store)
+    return store
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", help="dossier d'enregistrements (défaut : fixtures du dépôt)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part des requêtes en erreur")
+    parser.add_argument("--error-status", type=int, default=503, choices=(429, 500, 502, 503, 504))
+    parser.add_argument("--rotate-seconds", type=float, default=0.0, help="0 = pas de rotation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = open_store(args.store)
+    stub = UpstreamStub(
+        store,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rotate_seconds=args.rotate_seconds,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Stub amont sur {stub.url} ({len(store.urls())} URLs, {store.directory})")
+    print(f"  FORTNITE_UPSTREAM_URL={stub.url}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.shutdown()
+        for path, counts in sorted(stub.counters.items()):
+            print(f"  {path:<60} " + ", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Refresh, cache et replis de FortniteAPIClient de bout en bout, sans réseau.
+
+Le client est pointé sur le stub local (fortnite_api_stub.py, comme avec
+FORTNITE_UPSTREAM_URL) et enchaîne les scénarios d'un refresh de production :
+
+    froid        premier fetch, cache écrit sur disque
+    inchangé     refresh forcé, boutique identique : 304, même version
+    rotation     le stub passe à la boutique suivante : nouvelle version
+    panne        toutes les requêtes en erreur : la boutique en cache reste servie
+    retour       l'amont répond de nouveau : refresh normal
+    prix         recherche de prix en lot sur les pages rejouées
+
+Chaque scénario est chronométré ; latence et taux d'erreur du stub sont réglables,
+le résultat ne dépend que du seed (mêmes requêtes, mêmes réponses à chaque lancement).
+
+    cd backend && python benchmarks/offline_refresh.py [--latency-ms 40] [--error-rate 0.1]
+
+Code de sortie 1 si un scénario ne donne pas le résultat attendu.
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fortnite_api_stub import UpstreamStub, open_store  # noqa: E402
+from services.fortnite_api import FortniteAPIClient  # noqa: E402
+
+
+def timed(action: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = action()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", help="dossier d'enregistrements (défaut : fixtures du dépôt)")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="erreurs hors scénario panne")
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    stub = UpstreamStub(
+        open_store(args.store),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    cache_dir = tempfile.mkdtemp(prefix="fortnite-offline-")
+    client = FortniteAPIClient(
+        api_key="offline",
+        cache_path=os.path.join(cache_dir, "shop_cache.json"),
+        min_refresh_interval_seconds=0,
+        cache_format=args.format,
+        languages=("fr", "en"),
+        price_cache_path=os.path.join(cache_dir, "prices.db"),
+        upstream_url=stub.url,
+    )
+
+    failures: List[str] = []
+
+    def check(name: str, ok: bool, elapsed: float, detail: str) -> None:
+        print(f"  {'✅' if ok else '❌'} {name:<10} {elapsed:>8.1f} ms  {detail}")
+        if not ok:
+            failures.append(name)
+
+    print(f"Stub {stub.url}, latence {args.latency_ms:g} ms (+{args.jitter_ms:g}), erreurs {args.error_rate:.0%}")
+    try:
+        cold, elapsed = timed(lambda: client.get_snapshot())
+        check("froid", bool(cold.items), elapsed, f"{len(cold.items)} items, version {cold.version}")
+
+        same, elapsed = timed(lambda: client.get_snapshot(force_refresh=True))
+        not_modified = stub.counters.get("/fortnite-api.com/v2/shop", {}).get(304, 0)
+        check(
+            "inchangé",
+            same.version == cold.version and not_modified >= 1,
+            elapsed,
+            f"{not_modified} réponse(s) 304",
+        )
+
+        stub.rotate()
+        rotated, elapsed = timed(lambda: client.get_snapshot(force_refresh=True))
+        check(
+            "rotation",
+            rotated.version != cold.version,
+            elapsed,
+            f"{len(rotated.items)} items, version {rotated.version}",
+        )
+
+        stub.error_rate = 1.0
+        stub.rotate()
+        stale, elapsed = timed(lambda: client.get_snapshot(force_refresh=True))
+        check("panne", stale.version == rotated.version, elapsed, "boutique en cache servie")
+
+        stub.error_rate = args.error_rate
+        recovered, elapsed = timed(lambda: client.get_snapshot(force_refresh=True))
+        check(
+            "retour",
+            recovered.version not in (cold.version, rotated.version),
+            elapsed,
+            f"{len(recovered.items)} items, version {recovered.version}",
+        )
+
+        wanted = [(n, f"Offline Item {n}", f"CID_Offline_{n}") for n in range(20)]
+        prices, elapsed = timed(lambda: client.scraper.price_lookup.lookup_many(wanted))
+        found = sum(1 for price in prices.values() if price)
+        check("prix", found == len(wanted), elapsed, f"{found}/{len(wanted)} prix trouvés")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    # Les pages de prix sont regroupées par site
+    totals: Dict[str, Counter] = {}
+    for path, counts in stub.counters.items():
+        key = path if path.startswith("/fortnite-api.com/") else path.split("/", 2)[1]
+        totals.setdefault(key, Counter()).update(counts)
+    print("Requêtes servies par le stub :")
+    for key, counts in sorted(totals.items()):
+        print(f"  {key:<32} " + ", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
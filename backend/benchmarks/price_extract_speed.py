@@ -0,0 +1,142 @@
+"""
+Pages de prix analysées par seconde : PriceExtractor vs l'ancienne méthode
+(arbre BeautifulSoup complet + re.findall sur des motifs non compilés).
+
+Le corpus (fixtures/price_pages) reprend la structure des pages fortnite.gg, fnbr.co
+et Google ; manifest.json donne pour chaque page les motifs utilisés et le prix attendu.
+
+    cd backend && python benchmarks/price_extract_speed.py [--rounds 20] [--dir fixtures/price_pages]
+
+Code de sortie 1 si un prix est faux ou si le parseur par défaut n'est pas plus rapide.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.price_extract import (  # noqa: E402
+    DEFAULT_BACKEND,
+    FNBR_PATTERNS,
+    SEARCH_PATTERNS,
+    SITE_PATTERNS,
+    TEXT_BACKENDS,
+    PriceExtractor,
+)
+
+try:
+    from bs4 import BeautifulSoup
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+PATTERNS = {"site": SITE_PATTERNS, "fnbr": FNBR_PATTERNS, "search": SEARCH_PATTERNS}
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "price_pages")
+
+Page = Tuple[str, str, dict]
+
+
+def legacy_extract(content: str, patterns, html: bool) -> Optional[int]:
+    """Ancienne extraction des méthodes _search_* du scraper."""
+    if html:
+        text = BeautifulSoup(content, "html.parser").get_text().lower()
+    else:
+        text = content.lower()
+    for pattern in patterns:
+        for match in re.findall(pattern, text):
+            price = int(match)
+            if 200 <= price <= 5000:
+                return price
+    return None
+
+
+def load_corpus(directory: str) -> List[Page]:
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    pages = []
+    for name, expected in manifest.items():
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            pages.append((name, f.read(), expected))
+    return pages
+
+
+def run(label: str, extract: Callable[[str, dict], Optional[int]], pages: List[Page], rounds: int) -> dict:
+    wrong = [name for name, content, expected in pages if extract(content, expected) != expected["price"]]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, content, expected in pages:
+            extract(content, expected)
+    elapsed = time.perf_counter() - start
+    size = sum(len(content) for _, content, _ in pages) * rounds
+    return {
+        "label": label,
+        "pages_per_s": len(pages) * rounds / elapsed,
+        "mb_per_s": size / elapsed / 1e6,
+        "wrong": wrong,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="corpus (pages + manifest.json)")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.dir)
+    extractors: Dict[Tuple[str, str], PriceExtractor] = {}
+
+    def engine(backend: str) -> Callable[[str, dict], Optional[int]]:
+        def extract(content: str, expected: dict) -> Optional[int]:
+            key = (backend, expected["patterns"])
+            if key not in extractors:
+                extractors[key] = PriceExtractor(
+                    PATTERNS[expected["patterns"]], html=expected["html"], backend=backend
+                )
+            extractor = extractors[key]
+            extractor.html = expected["html"]
+            return extractor.extract(content)
+
+        return extract
+
+    results = []
+    if HAS_BS4:
+        results.append(
+            run(
+                "BeautifulSoup (ancien)",
+                lambda content, expected: legacy_extract(
+                    content, PATTERNS[expected["patterns"]], expected["html"]
+                ),
+                pages,
+                args.rounds,
+            )
+        )
+    for backend in ["html.parser"] + list(TEXT_BACKENDS):
+        results.append(run(f"PriceExtractor {backend}", engine(backend), pages, args.rounds))
+
+    size_kb = sum(len(content) for _, content, _ in pages) / 1024
+    print(f"Corpus : {len(pages)} pages, {size_kb:.0f} Ko, {args.rounds} tours (défaut : {DEFAULT_BACKEND})")
+    for result in results:
+        print(
+            f"  {result['label']:<28} {result['pages_per_s']:>8.0f} pages/s"
+            f"  {result['mb_per_s']:>6.1f} Mo/s"
+            + (f"  ❌ faux : {', '.join(result['wrong'])}" if result["wrong"] else "")
+        )
+
+    if any(result["wrong"] for result in results):
+        return 1
+    if HAS_BS4:
+        baseline = results[0]["pages_per_s"]
+        default = next(r for r in results if r["label"] == f"PriceExtractor {DEFAULT_BACKEND}")
+        print(f"Accélération ({DEFAULT_BACKEND}) : x{default['pages_per_s'] / baseline:.1f}")
+        return 0 if default["pages_per_s"] > baseline else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
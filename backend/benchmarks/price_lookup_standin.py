@@ -0,0 +1,176 @@
+"""
+Recherche de prix en lot contre des faux sites de prix locaux (aucun appel externe).
+
+Trois serveurs HTTP locaux jouent fortnite.gg, fnbr.co et Google : latence réglable,
+items absents (404) ou lents, et réponse 429 dès qu'un client
+dépasse le débit autorisé. On vérifie que tous les prix sont retrouvés sans 429 et
+que la durée suit la limite de débit, pas le nombre d'items.
+
+    cd backend && python benchmarks/price_lookup_standin.py [--items 150] [--rate 10]
+
+Code de sortie 1 si un prix est faux, si un site a renvoyé 429 ou si la durée
+dépasse nettement la borne imposée par le débit.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import unquote_plus, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.price_lookup import PriceLookup, default_sources  # noqa: E402
+
+
+def item_price(n: int) -> int:
+    return 200 + 100 * (n % 20)
+
+
+class FakeSite:
+    """Un faux site : page de prix par item, latence, débit maximal toléré."""
+
+    def __init__(self, name: str, rate: float, latency: float, missing=(), slow=()) -> None:
+        self.name = name
+        self.rate = rate
+        self.latency = latency
+        self.missing = set(missing)
+        self.slow = set(slow)
+        self.requests = 0
+        self.rejected = 0
+        self.max_concurrent = 0
+        self._concurrent = 0
+        self._allowance = rate  # seau de tolérance côté serveur (1 s de rafale)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.server = self._serve()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _admit(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._updated) * self.rate)
+            self._updated = now
+            # Petite marge : l'horloge du client et celle du serveur ne coïncident pas
+            if self._allowance < 0.9:
+                self.rejected += 1
+                return False
+            self._allowance -= 1
+            self._concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self._concurrent)
+            return True
+
+    def _item(self, path: str) -> int:
+        """Numéro d'item déduit de l'URL (item-<n> dans le nom ou l'id)."""
+        text = unquote_plus(path).lower()
+        marker = text.index("item-") + len("item-")
+        digits = ""
+        while marker < len(text) and text[marker].isdigit():
+            digits += text[marker]
+            marker += 1
+        return int(digits)
+
+    def handle(self, path: str) -> Tuple[int, str]:
+        if not self._admit():
+            return 429, "Too Many Requests"
+        try:
+            n = self._item(path)
+            time.sleep(self.latency * (8 if n in self.slow else 1))
+            if n in self.missing:
+                return 404, "Not found"
+            return 200, f"<html><body><h1>Item {n}</h1><p>Prix : {item_price(n)} V-Bucks</p></body></html>"
+        finally:
+            with self._lock:
+                self._concurrent -= 1
+
+    def _serve(self) -> ThreadingHTTPServer:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                status, body = site.handle(urlsplit(self.path).path + "?" + urlsplit(self.path).query)
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=150)
+    parser.add_argument("--rate", type=float, default=10.0, help="requêtes/s autorisées par site")
+    parser.add_argument("--latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    n_items = args.items
+    gg = FakeSite(
+        "fortnite.gg",
+        args.rate,
+        args.latency,
+        missing=range(0, n_items, 10),
+        slow=range(5, n_items, 25),
+    )
+    fnbr = FakeSite("fnbr.co", args.rate, args.latency, missing=range(0, n_items, 30))
+    google = FakeSite("google", args.rate / 4, args.latency)
+    sites: List[FakeSite] = [gg, fnbr, google]
+
+    # Limites client = débit toléré par chaque faux site
+    limits: Dict[str, Tuple[float, int, int]] = {
+        urlsplit(gg.base_url).netloc: (args.rate, 2, 4),
+        urlsplit(fnbr.base_url).netloc: (args.rate, 2, 4),
+        urlsplit(google.base_url).netloc: (args.rate / 4, 1, 1),
+    }
+    lookup = PriceLookup(
+        sources=default_sources(gg.base_url, fnbr.base_url, google.base_url),
+        host_limits=limits,
+        hedge_delay=args.latency * 3,
+    )
+    items = [(n, f"Item-{n} Skin", f"CID_Item-{n}") for n in range(n_items)]
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        prices = lookup.lookup_many(items)
+    elapsed = time.perf_counter() - start
+
+    for site in sites:
+        site.server.shutdown()
+
+    wrong = [n for n in range(n_items) if not prices[n] or prices[n][0] != item_price(n)]
+    rejected = sum(site.rejected for site in sites)
+    # Borne : chaque item demande au moins une requête à fortnite.gg
+    bound = n_items / args.rate
+    serial = sum(site.requests for site in sites) * args.latency + n_items * 0.5
+
+    print(f"{n_items} items, {args.rate:g} req/s par site, latence {args.latency * 1000:.0f} ms")
+    for site in sites:
+        print(
+            f"  {site.name:<12} {site.requests:>4} requêtes, {site.rejected} refusées (429),"
+            f" {site.max_concurrent} simultanées max"
+        )
+    print(f"Durée : {elapsed:.1f} s (borne débit ≈ {bound:.1f} s, série avec pauses ≈ {serial:.0f} s)")
+    print(f"Prix faux : {len(wrong)}")
+
+    if wrong or rejected:
+        return 1
+    return 0 if elapsed < bound * 1.5 + args.latency * 10 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Pic mémoire (RSS) du refresh boutique : get_shop() classique vs get_shop(stream=True).
+
+Une boutique synthétique (les entries de data/shop_cache.json recopiées avec des ids
+uniques) est servie par un serveur HTTP local ; chaque mode tourne dans un process
+séparé qui mesure sa hausse de RSS max pendant le fetch + parsing.
+
+    cd backend && python benchmarks/shop_parse_memory.py [--copies 40]
+
+Code de sortie 1 si les deux modes ne parsent pas exactement les mêmes items, ou si
+le mode flux réduit le pic de moins de --min-saving (25 % par défaut ; ~42 % mesurés).
+"""
+
+import argparse
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MIN_SAVING = 0.25
+
+
+def build_shop(copies: int) -> bytes:
+    """Document /v2/shop synthétique : copies fois les entries réelles, ids suffixés."""
+    with open(os.path.join(BACKEND_DIR, "data", "shop_cache.json"), encoding="utf-8") as f:
+        raw = json.load(f)["raw_data"]
+    entries = []
+    for n in range(copies):
+        for entry in raw["entries"]:
+            entry = copy.deepcopy(entry)
+            entry["offerId"] = f"{entry.get('offerId')}-{n}"
+            for br_item in entry.get("brItems", []):
+                br_item["id"] = f"{br_item.get('id')}-{n}"
+            entries.append(entry)
+    data = {k: v for k, v in raw.items() if k != "entries"}
+    data["entries"] = entries
+    return json.dumps({"status": 200, "data": data}, ensure_ascii=False).encode("utf-8")
+
+
+def serve(body: bytes) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_kb() -> int:
+    """VmHWM (pic de RSS du process) ; ru_maxrss hérite du pic du process parent."""
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmHWM indisponible (Linux requis)")
+
+
+def child(url: str, stream: bool) -> None:
+    """Mesure dans ce process : hausse du pic de RSS (Ko) pendant get_shop."""
+    from services.fortnite_shop_scraper import FortniteShopScraper
+    from services.shop_items import json_default
+
+    scraper = FortniteShopScraper()
+    scraper.base_url = url
+    before = peak_rss_kb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        shop = scraper.get_shop(stream=stream, compact=True)
+    peak = peak_rss_kb()
+    # Empreinte des items parsés, calculée après la mesure du pic
+    items = json.dumps(shop["items"], default=json_default, ensure_ascii=False).encode("utf-8")
+    digest = hashlib.sha256(items).hexdigest()
+    print(json.dumps({"items": shop["total_items"], "digest": digest, "peak_kb": peak - before}))
+
+
+def measure(url: str, stream: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", url] + (["--stream"] if stream else []),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--copies", type=int, default=40)
+    parser.add_argument("--min-saving", type=float, default=MIN_SAVING)
+    parser.add_argument("--child")
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.stream)
+        return 0
+
+    body = build_shop(args.copies)
+    server = serve(body)
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        full = measure(url, stream=False)
+        streamed = measure(url, stream=True)
+    finally:
+        server.shutdown()
+
+    print(f"Document : {len(body) / 1e6:.1f} Mo, {full['items']} items")
+    print(f"Classique : +{full['peak_kb'] / 1024:.1f} Mo RSS")
+    print(f"Flux      : +{streamed['peak_kb'] / 1024:.1f} Mo RSS")
+    if streamed["items"] != full["items"] or streamed["digest"] != full["digest"]:
+        print("❌ Items parsés différents entre les deux modes")
+        return 1
+    saving = 1 - streamed["peak_kb"] / full["peak_kb"]
+    print(f"Réduction du pic : {saving:.0%} (minimum {args.min_saving:.0%})")
+    if saving < args.min_saving:
+        print("❌ Réduction du pic insuffisante")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Vitesse et mémoire du parsing de la boutique (parse_shop_entries / parse_entry).
+
+Les entries réelles de services/fortnite_shop.json (raw_data) servent de modèles ;
+un générateur les recopie jusqu'à 10-100x la taille d'une boutique, en gardant la
+proportion de chaque sorte d'entry (item seul, tenue + accessoire de dos, pack nommé,
+pack sans nom, voitures, pistes) et des ids uniques. Pour chaque échelle :
+entries/s (meilleur tour), allocations retenues par le résultat et pic (tracemalloc).
+Le détail par sorte d'entry chronomètre parse_entry seul.
+
+    cd backend && python benchmarks/shop_parse_speed.py [--scales 1,10,100] [--rounds 5]
+    cd backend && python benchmarks/shop_parse_speed.py --save-baseline
+
+Les références sont dans benchmarks/baselines/shop_parse.json. Code de sortie 1 si une
+mesure régresse au-delà de la tolérance (--speed-tolerance pour la vitesse, qui dépend
+de la machine ; --memory-tolerance pour la mémoire, stable d'une machine à l'autre).
+"""
+
+import argparse
+import contextlib
+import copy
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.fortnite_shop_scraper import FortniteShopScraper  # noqa: E402
+
+DEFAULT_FIXTURE = os.path.join(BACKEND_DIR, "services", "fortnite_shop.json")
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "shop_parse.json"
+)
+KINDS = ("single", "outfit_pair", "bundle", "pack", "cars", "tracks")
+
+Entry = Dict[str, Any]
+
+
+def load_entries(path: str) -> List[Entry]:
+    """Entries /v2/shop d'un fichier : document brut, cache (raw_data) ou réponse API."""
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    data = document.get("raw_data") or document.get("data") or document
+    entries = data.get("entries")
+    if not entries:
+        raise SystemExit(f"Aucune entry dans {path} (raw_data.entries attendu)")
+    return entries
+
+
+def _type_value(br_item: Entry) -> str:
+    item_type = br_item.get("type", {})
+    return (item_type.get("value", "") if isinstance(item_type, dict) else str(item_type)).lower()
+
+
+def entry_kind(entry: Entry) -> str:
+    """Branche de parse_entry empruntée par l'entry."""
+    br_items = entry.get("brItems", [])
+    if len(br_items) > 1:
+        if entry.get("bundle"):
+            return "bundle"
+        types = [_type_value(br_item) for br_item in br_items]
+        if len(br_items) == 2 and any("outfit" in t or "character" in t for t in types):
+            return "outfit_pair"
+        return "pack"
+    if br_items:
+        return "single"
+    if entry.get("cars"):
+        return "cars"
+    return "tracks"
+
+
+def _suffix_ids(entry: Entry, suffix: str) -> Entry:
+    entry = copy.deepcopy(entry)
+    entry["offerId"] = f"{entry.get('offerId')}{suffix}"
+    for key in ("brItems", "cars", "tracks", "instruments", "legoKits"):
+        for item in entry.get(key, []):
+            if item.get("id"):
+                item["id"] = f"{item['id']}{suffix}"
+            if item.get("vehicleId"):
+                item["vehicleId"] = f"{item['vehicleId']}{suffix}"
+    return entry
+
+
+def _pack_from_pair(entry: Entry) -> Entry:
+    """Pack sans nom de bundle (absent de la boutique du jour) : une paire + un 3e item."""
+    entry = copy.deepcopy(entry)
+    entry["brItems"].append(copy.deepcopy(entry["brItems"][-1]))
+    entry["brItems"][-1]["id"] = f"{entry['brItems'][-1].get('id')}-extra"
+    return entry
+
+
+def synthesize(templates: List[Entry], scale: int, seed: int = 0) -> List[Entry]:
+    """
+    scale x len(templates) entries : chaque sorte garde sa proportion dans la boutique
+    réelle (au moins une entry par sorte), modèles tirés au hasard de façon reproductible.
+    La boutique du jour n'a souvent aucun pack sans nom : ils sont alors dérivés des
+    paires tenue + accessoire (une pour deux paires).
+    """
+    by_kind: Dict[str, List[Entry]] = {kind: [] for kind in KINDS}
+    for entry in templates:
+        by_kind[entry_kind(entry)].append(entry)
+    counts = Counter({kind: len(pool) for kind, pool in by_kind.items()})
+    if not by_kind["pack"] and by_kind["outfit_pair"]:
+        by_kind["pack"] = [_pack_from_pair(entry) for entry in by_kind["outfit_pair"]]
+        counts["pack"] = max(1, counts["outfit_pair"] // 2)
+
+    rng = random.Random(seed)
+    entries = []
+    for kind, pool in by_kind.items():
+        if not pool:
+            continue
+        for n in range(max(1, counts[kind] * scale)):
+            entries.append(_suffix_ids(rng.choice(pool), f"-{kind}{n}"))
+    rng.shuffle(entries)
+    return entries
+
+
+def _parse(scraper: FortniteShopScraper, entries: List[Entry]) -> Dict[str, Any]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return scraper.parse_shop_entries(entries, {"entries": entries})
+
+
+def time_parse(scraper: FortniteShopScraper, entries: List[Entry], rounds: int) -> float:
+    """Meilleur temps (s) de parse_shop_entries sur rounds tours."""
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        _parse(scraper, entries)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_memory(scraper: FortniteShopScraper, entries: List[Entry]) -> Dict[str, int]:
+    """Blocs / octets encore alloués pour le résultat, et pic pendant le parsing."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    result = _parse(scraper, entries)
+    peak = tracemalloc.get_traced_memory()[1] - start_bytes
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    retained = {
+        "blocks": sum(stat.count_diff for stat in diff),
+        "bytes": sum(stat.size_diff for stat in diff),
+        "peak_bytes": peak,
+        "items": result["total_items"],
+    }
+    del result
+    return retained
+
+
+def time_kinds(scraper: FortniteShopScraper, templates: List[Entry], rounds: int) -> Dict[str, float]:
+    """parse_entry seul : entries/s par sorte d'entry."""
+    rates = {}
+    entries = synthesize(templates, 10)
+    for kind in KINDS:
+        sample = [entry for entry in entries if entry_kind(entry) == kind]
+        if not sample:
+            continue
+        best = float("inf")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for entry in sample:
+                    scraper.parse_entry(entry, "Shop", {})
+                best = min(best, time.perf_counter() - start)
+        rates[kind] = len(sample) / best
+    return rates
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Any],
+    speed_tolerance: float,
+    memory_tolerance: float,
+) -> List[str]:
+    regressions = []
+    for scale, result in results.items():
+        reference = baseline.get("scales", {}).get(scale)
+        if not reference:
+            continue
+        if result["entries_per_s"] < reference["entries_per_s"] * (1 - speed_tolerance):
+            regressions.append(
+                f"x{scale} : {result['entries_per_s']:.0f} entries/s"
+                f" (référence {reference['entries_per_s']:.0f})"
+            )
+        for key in ("retained_bytes_per_entry", "blocks_per_entry", "peak_bytes_per_entry"):
+            if result[key] > reference[key] * (1 + memory_tolerance):
+                regressions.append(
+                    f"x{scale} : {key} {result[key]:.0f} (référence {reference[key]:.0f})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="boutique réelle (entries modèles)")
+    parser.add_argument("--scales", default="1,10,100", help="tailles, en multiples de la boutique")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="enregistre ces mesures comme référence")
+    parser.add_argument("--speed-tolerance", type=float, default=0.30)
+    parser.add_argument("--memory-tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+
+    templates = load_entries(args.fixture)
+    scraper = FortniteShopScraper()
+    mix = Counter(entry_kind(entry) for entry in templates)
+    print(f"Modèles : {len(templates)} entries ({', '.join(f'{k} {n}' for k, n in mix.most_common())})")
+
+    results: Dict[str, Dict[str, float]] = {}
+    for scale in (int(value) for value in args.scales.split(",")):
+        entries = synthesize(templates, scale, args.seed)
+        elapsed = time_parse(scraper, entries, args.rounds)
+        memory = measure_memory(scraper, entries)
+        results[str(scale)] = {
+            "entries": len(entries),
+            "items": memory["items"],
+            "entries_per_s": len(entries) / elapsed,
+            "blocks_per_entry": memory["blocks"] / len(entries),
+            "retained_bytes_per_entry": memory["bytes"] / len(entries),
+            "peak_bytes_per_entry": memory["peak_bytes"] / len(entries),
+        }
+        result = results[str(scale)]
+        print(
+            f"  x{scale:<4} {len(entries):>6} entries {result['items']:>6} items"
+            f"  {result['entries_per_s']:>9.0f} entries/s"
+            f"  {result['blocks_per_entry']:>6.1f} blocs/entry"
+            f"  {result['retained_bytes_per_entry'] / 1024:>6.2f} Ko retenus/entry"
+            f"  pic {memory['peak_bytes'] / 1e6:>7.1f} Mo"
+        )
+
+    kinds = time_kinds(scraper, templates, args.rounds)
+    print("parse_entry par sorte : " + ", ".join(f"{k} {v:.0f}/s" for k, v in kinds.items()))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "fixture": os.path.relpath(args.fixture, BACKEND_DIR),
+                    "seed": args.seed,
+                    "scales": {
+                        scale: {key: round(value, 1) for key, value in result.items()}
+                        for scale, result in results.items()
+                    },
+                    "parse_entry_per_s": {kind: round(rate) for kind, rate in kinds.items()},
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"Référence enregistrée : {os.path.relpath(args.baseline)}")
+        return 0
+
+    baseline: Optional[Dict[str, Any]] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if baseline is None:
+        print("Pas de référence (--save-baseline pour en créer une)")
+        return 0
+    if baseline.get("python") != platform.python_version():
+        print(f"⚠️  Référence mesurée avec Python {baseline.get('python')}")
+    regressions = compare(results, baseline, args.speed_tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"❌ Régression {regression}")
+    if not regressions:
+        print("✅ Aucune régression par rapport à la référence")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
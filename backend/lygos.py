@@ -22,7 +22,12 @@ import sys
 # Ajouter le répertoire courant au path pour permettre les imports relatifs
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from services.cosmetics_catalog import shop_item_from_cosmetic
 from services.fortnite_api import FortniteAPIClient, FortniteAPIError
+from services.image_cache import ImageCache, find_image_source
+from services.pricing import PricingConfig, PricingEngine, parse_rules
+from services.shop_index import QueryError, parse_list_query
+from services.shop_projection import ProjectionError, resolve_projection
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
@@ -81,6 +86,62 @@ SHOP_NAME = "FortniteItems"
 # Fortnite API
 FORTNITE_API_KEY = os.getenv("FORTNITE_API_KEY")
 FORTNITE_SHOP_TTL = int(os.getenv("FORTNITE_SHOP_TTL", "900"))
+# Délai minimum entre deux appels à fortnite-api.com (protège contre ?refresh=1 en boucle)
+FORTNITE_SHOP_MIN_REFRESH = int(os.getenv("FORTNITE_SHOP_MIN_REFRESH", "60"))
+# Âge max (au-delà du TTL) des données servies pendant le refresh en arrière-plan
+FORTNITE_SHOP_MAX_STALE = int(os.getenv("FORTNITE_SHOP_MAX_STALE", "3600"))
+# Refresh calé sur la rotation réelle (outDate + rotation quotidienne à 00:00 UTC)
+# au lieu du TTL fixe ; FORTNITE_SHOP_KEEPALIVE = poll lent entre deux rotations
+FORTNITE_SHOP_ROTATION_AWARE = os.getenv("FORTNITE_SHOP_ROTATION_AWARE", "1") == "1"
+FORTNITE_SHOP_KEEPALIVE = int(os.getenv("FORTNITE_SHOP_KEEPALIVE", "21600"))
+# "binary" : snapshot compact mmap partagé entre workers (utile avec plus de workers)
+FORTNITE_SHOP_CACHE_FORMAT = os.getenv("FORTNITE_SHOP_CACHE_FORMAT", "json")
+# Historique des boutiques (SQLite, deltas jour après jour) ; vide = désactivé
+FORTNITE_SHOP_HISTORY_PATH = os.getenv(
+    "FORTNITE_SHOP_HISTORY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shop_history.db"),
+)
+# Versions précédentes couvertes par /api/shop/changes?since=
+FORTNITE_SHOP_CHANGES_KEEP = int(os.getenv("FORTNITE_SHOP_CHANGES_KEEP", "10"))
+# Proxy d'images /api/img : URL publique (réécrite dans la boutique au refresh, vide =
+# URLs du CDN d'origine, défaut ; définie dans render.yaml), dossier et taille max du cache
+FORTNITE_IMAGE_PROXY_URL = os.getenv("FORTNITE_IMAGE_PROXY_URL", "")
+FORTNITE_IMAGE_CACHE_DIR = os.getenv(
+    "FORTNITE_IMAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "img_cache"),
+)
+FORTNITE_IMAGE_CACHE_MAX_MB = int(os.getenv("FORTNITE_IMAGE_CACHE_MAX_MB", "512"))
+# Miroir local du catalogue des cosmétiques (SQLite) ; vide = désactivé
+FORTNITE_CATALOG_PATH = os.getenv(
+    "FORTNITE_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cosmetics.db"),
+)
+FORTNITE_CATALOG_SYNC_INTERVAL = int(os.getenv("FORTNITE_CATALOG_SYNC_INTERVAL", "21600"))
+# Prix V-Bucks trouvés en ligne (SQLite partagé par les workers) ; vide = en mémoire
+FORTNITE_PRICE_CACHE_PATH = os.getenv(
+    "FORTNITE_PRICE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "price_cache.db"),
+)
+# Hors ligne : racine d'un faux amont qui sert fortnite-api.com et les sites de prix
+# sous /<hôte>/ (benchmarks/fortnite_api_stub.py) ; vide = vrais sites. Dossier où
+# enregistrer les réponses amont pour ce stub ; vide = pas d'enregistrement
+FORTNITE_UPSTREAM_URL = os.getenv("FORTNITE_UPSTREAM_URL", "")
+FORTNITE_UPSTREAM_RECORD_DIR = os.getenv("FORTNITE_UPSTREAM_RECORD_DIR", "")
+# Prix de vente en FCFA (/api/shop/prices) : marge par défaut, paliers JSON
+# ([{"rarity": ["légendaire"], "margin": 0.6}, {"min_vbucks": 2000, "margin": 0.4}]),
+# devise d'achat des V-Bucks, taux vers XOF et arrondi (nearest / up / down).
+# Lus tels quels : une valeur invalide est signalée au démarrage (prix par défaut)
+FORTNITE_PRICE_MARGIN = os.getenv("FORTNITE_PRICE_MARGIN", "0.5")
+FORTNITE_PRICE_TIERS = os.getenv("FORTNITE_PRICE_TIERS", "")
+FORTNITE_PRICE_COST_CURRENCY = os.getenv("FORTNITE_PRICE_COST_CURRENCY", "USD")
+FORTNITE_USD_TO_XOF = os.getenv("FORTNITE_USD_TO_XOF", "580")
+FORTNITE_EUR_TO_XOF = os.getenv("FORTNITE_EUR_TO_XOF", "655.957")
+FORTNITE_PRICE_ROUNDING_STEP = os.getenv("FORTNITE_PRICE_ROUNDING_STEP", "100")
+FORTNITE_PRICE_ROUNDING = os.getenv("FORTNITE_PRICE_ROUNDING", "nearest")
+# Langues servies via ?lang= (la première est la langue par défaut), rafraîchies ensemble
+FORTNITE_SHOP_LANGUAGES = [
+    lang.strip() for lang in os.getenv("FORTNITE_SHOP_LANGUAGES", "fr").split(",") if lang.strip()
+]
 
 # URLs de base
 # ⚠️ FORCE PRODUCTION URL pour éviter les redirections vers Netlify
@@ -98,12 +159,63 @@ if FORTNITE_API_KEY:
         fortnite_client = FortniteAPIClient(
             api_key=FORTNITE_API_KEY,
             cache_ttl_seconds=FORTNITE_SHOP_TTL,
+            min_refresh_interval_seconds=FORTNITE_SHOP_MIN_REFRESH,
+            max_stale_seconds=FORTNITE_SHOP_MAX_STALE,
+            rotation_aware=FORTNITE_SHOP_ROTATION_AWARE,
+            keepalive_seconds=FORTNITE_SHOP_KEEPALIVE,
+            cache_format=FORTNITE_SHOP_CACHE_FORMAT,
+            languages=FORTNITE_SHOP_LANGUAGES,
+            history_path=FORTNITE_SHOP_HISTORY_PATH or None,
+            changes_keep_versions=FORTNITE_SHOP_CHANGES_KEEP,
+            image_proxy_url=FORTNITE_IMAGE_PROXY_URL or None,
+            catalog_path=FORTNITE_CATALOG_PATH or None,
+            price_cache_path=FORTNITE_PRICE_CACHE_PATH or None,
+            upstream_url=FORTNITE_UPSTREAM_URL or None,
+            record_dir=FORTNITE_UPSTREAM_RECORD_DIR or None,
         )
+        if FORTNITE_SHOP_ROTATION_AWARE:
+            fortnite_client.start_scheduler()
+        fortnite_client.start_catalog_sync(FORTNITE_CATALOG_SYNC_INTERVAL)
     except Exception as e:
         print(f"❌ Impossible d'initialiser FortniteAPIClient: {e}")
 else:
     print("⚠️  FORTNITE_API_KEY non définie - endpoint /api/shop désactivé")
 
+# Prix de vente de la boutique, calculés une fois par version.
+# Une configuration invalide ne doit pas empêcher l'API (commandes, auth) de démarrer
+pricing_engine = None
+try:
+    pricing_engine = PricingEngine(
+        PricingConfig(
+            cost_currency=FORTNITE_PRICE_COST_CURRENCY,
+            default_margin=float(FORTNITE_PRICE_MARGIN),
+            rules=parse_rules(FORTNITE_PRICE_TIERS),
+            fx_to_xof={
+                "XOF": 1.0,
+                "USD": float(FORTNITE_USD_TO_XOF),
+                "EUR": float(FORTNITE_EUR_TO_XOF),
+            },
+            rounding_step=int(FORTNITE_PRICE_ROUNDING_STEP),
+            rounding=FORTNITE_PRICE_ROUNDING,
+        )
+    )
+except (ValueError, TypeError, KeyError) as e:
+    print(f"❌ Configuration des prix invalide ({e}) - prix par défaut utilisés")
+    try:
+        pricing_engine = PricingEngine()
+    except Exception as e:
+        print(f"❌ Impossible d'initialiser PricingEngine: {e}")
+
+# Cache disque des images servies par /api/img
+image_cache = None
+try:
+    image_cache = ImageCache(
+        FORTNITE_IMAGE_CACHE_DIR,
+        max_bytes=FORTNITE_IMAGE_CACHE_MAX_MB * 1024 * 1024,
+    )
+except OSError as e:
+    print(f"❌ Cache d'images indisponible: {e}")
+
 
 def send_simple_email(recipient, subject, html_content):
     """Fonction générique pour envoyer un email"""
@@ -519,6 +631,60 @@ def send_message():
     return jsonify(msg.to_dict()), 200
 
 
+SHOP_SEARCH_DEFAULT_LIMIT = 20
+SHOP_SEARCH_MAX_LIMIT = 100
+
+
+SHOP_BODY_CHUNK = 64 * 1024
+
+
+def iter_view_chunks(view):
+    for start in range(0, view.nbytes, SHOP_BODY_CHUNK):
+        yield bytes(view[start:start + SHOP_BODY_CHUNK])
+
+
+def shop_response(body, etag):
+    """
+    Envoie un corps pré-encodé (EncodedBody) dans l'encodage accepté par le client.
+    304 vide si le client a déjà cette version.
+    """
+    if etag and request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        encoding = request.accept_encodings.best_match(body.encodings, default='identity')
+        data, encoding = body.get(encoding)
+        if isinstance(data, memoryview):
+            # Vue sur le snapshot mmap : envoyée par tranches, jamais copiée en entier
+            # (gunicorn n'écrit que des bytes)
+            response = app.response_class(
+                iter_view_chunks(data), status=200, mimetype='application/json'
+            )
+            response.content_length = data.nbytes
+        else:
+            response = app.response_class(data, status=200, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    # Le navigateur garde sa copie mais revalide à chaque visite
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def shop_language():
+    """Langue demandée (?lang=fr) ; None si elle n'est pas servie."""
+    lang = request.args.get('lang') or fortnite_client.default_language
+    return lang if lang in fortnite_client.languages else None
+
+
+def unsupported_language_response():
+    return jsonify({
+        "success": False,
+        "error": f"lang doit être parmi: {', '.join(fortnite_client.languages)}"
+    }), 400
+
+
 @app.route('/api/shop', methods=['GET'])
 def get_fortnite_shop():
     if fortnite_client is None:
@@ -528,10 +694,112 @@ def get_fortnite_shop():
         }), 200
 
     force_refresh = request.args.get('refresh', '0') == '1'
+    lang = shop_language()
+    if lang is None:
+        return unsupported_language_response()
+
+    # Projection : ?profile=card|detail|full ou ?fields=id,name,images.icon
+    # Liste : ?type=&rarity=&min_vbucks=&max_vbucks=&has_related_items=&sort=&limit=&cursor=
+    try:
+        key, fields = resolve_projection(
+            profile=request.args.get('profile'),
+            fields=request.args.get('fields'),
+        )
+        query = parse_list_query(request.args)
+    except (ProjectionError, QueryError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    try:
+        snapshot = fortnite_client.get_snapshot(force_refresh=force_refresh, language=lang)
+        if query is not None:
+            try:
+                body, etag = snapshot.list_body(query, key, fields)
+            except QueryError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            return shop_response(body, etag)
+        return shop_response(snapshot.body_for(key, fields), snapshot.etag_for(key))
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Erreur serveur: {str(e)}"
+        }), 500
+
+
+@app.route('/api/shop/search', methods=['GET'])
+def search_fortnite_shop():
+    """Recherche plein texte (accents ignorés, préfixes acceptés) : ?q=epee&limit=20"""
+    if fortnite_client is None:
+        return jsonify({
+            "success": False,
+            "error": "FORTNITE_API_KEY non configurée"
+        }), 200
 
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({"success": False, "error": "Paramètre q requis"}), 400
+    lang = shop_language()
+    if lang is None:
+        return unsupported_language_response()
     try:
-        payload = fortnite_client.get_shop(force_refresh=force_refresh)
-        return jsonify(payload), 200
+        limit = int(request.args.get('limit', SHOP_SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"success": False, "error": "limit doit être un entier"}), 400
+    limit = max(1, min(limit, SHOP_SEARCH_MAX_LIMIT))
+
+    # Profil "card" par défaut : une liste de résultats n'a pas besoin de la forme complète
+    try:
+        key, fields = resolve_projection(
+            profile=request.args.get('profile', 'card'),
+            fields=request.args.get('fields'),
+        )
+    except ProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    try:
+        snapshot = fortnite_client.get_snapshot(language=lang)
+        body, etag = snapshot.search_body(text, limit, key, fields)
+        return shop_response(body, etag)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Erreur serveur: {str(e)}"
+        }), 500
+
+
+@app.route('/api/shop/prices', methods=['GET'])
+def get_fortnite_shop_prices():
+    """Prix de vente en FCFA de chaque article de la boutique (id -> montant)"""
+    if fortnite_client is None:
+        return jsonify({
+            "success": False,
+            "error": "FORTNITE_API_KEY non configurée"
+        }), 200
+
+    if pricing_engine is None:
+        return jsonify({
+            "success": False,
+            "error": "Calcul des prix indisponible"
+        }), 503
+
+    lang = shop_language()
+    if lang is None:
+        return unsupported_language_response()
+    try:
+        snapshot = fortnite_client.get_snapshot(language=lang)
+        priced = pricing_engine.price_snapshot(snapshot)
+        etag = f"{snapshot.version}-prices-{pricing_engine.config.fingerprint()}"
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify({
+                "success": True,
+                "version": snapshot.version,
+                "currency": "XOF",
+                "prices": priced.xof_by_id(),
+            })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({
             "success": False,
@@ -539,6 +807,174 @@ def get_fortnite_shop():
         }), 500
 
 
+@app.route('/api/shop/changes', methods=['GET'])
+def get_fortnite_shop_changes():
+    """Items ajoutés / modifiés / retirés depuis ?since=<version> (version d'une réponse précédente)"""
+    if fortnite_client is None:
+        return jsonify({
+            "success": False,
+            "error": "FORTNITE_API_KEY non configurée"
+        }), 200
+
+    since = request.args.get('since', '').strip()
+    if not since:
+        return jsonify({"success": False, "error": "Paramètre since requis"}), 400
+    lang = shop_language()
+    if lang is None:
+        return unsupported_language_response()
+
+    try:
+        snapshot = fortnite_client.get_snapshot(language=lang)
+        found = snapshot.changes_body(since)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Erreur serveur: {str(e)}"
+        }), 500
+
+    if found is None:
+        # Version inconnue ou trop ancienne : le client recharge /api/shop en entier
+        return jsonify({
+            "success": False,
+            "error": "Version trop ancienne, recharger /api/shop",
+            "version": snapshot.version,
+        }), 410
+    body, etag = found
+    return shop_response(body, etag)
+
+
+@app.route('/api/shop/items/<path:item_id>', methods=['GET'])
+def get_fortnite_shop_item(item_id):
+    """Un seul item (avec ses related_items / bundle_items) sans télécharger toute la boutique"""
+    if fortnite_client is None:
+        return jsonify({
+            "success": False,
+            "error": "FORTNITE_API_KEY non configurée"
+        }), 200
+
+    lang = shop_language()
+    if lang is None:
+        return unsupported_language_response()
+
+    try:
+        snapshot = fortnite_client.get_snapshot(language=lang)
+        found = snapshot.item_body(item_id)
+        if found is None:
+            # Hors boutique du jour : fiche du catalogue local si l'objet existe
+            cosmetic = None
+            if fortnite_client.catalog is not None and lang == fortnite_client.catalog.language:
+                cosmetic = fortnite_client.catalog.get(item_id)
+            if cosmetic is None:
+                return jsonify({"success": False, "error": "Article non trouvé"}), 404
+            return jsonify(shop_item_from_cosmetic(cosmetic)), 200
+        body, etag = found
+        return shop_response(body, etag)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Erreur serveur: {str(e)}"
+        }), 500
+
+
+@app.route('/api/cosmetics', methods=['GET'])
+def list_fortnite_cosmetics():
+    """Catalogue local : ?type=outfit&rarity=epic&set=<valeur>&limit=50&offset=0"""
+    if fortnite_client is None or fortnite_client.catalog is None:
+        return jsonify({"success": False, "error": "Catalogue des cosmétiques désactivé"}), 200
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({"success": False, "error": "limit et offset doivent être des entiers"}), 400
+
+    try:
+        cosmetics = fortnite_client.catalog.query(
+            item_type=request.args.get('type'),
+            rarity=request.args.get('rarity'),
+            set_value=request.args.get('set'),
+            limit=limit,
+            offset=offset,
+        )
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Erreur serveur: {str(e)}"}), 500
+    return jsonify({"success": True, "items": cosmetics, "limit": limit, "offset": offset}), 200
+
+
+@app.route('/api/img/<path:item_id>/<variant>', methods=['GET'])
+def get_fortnite_item_image(item_id, variant):
+    """Image d'un item (icon, featured, small_icon, thumb, thumb_small) via le cache disque"""
+    if fortnite_client is None or image_cache is None:
+        return jsonify({"success": False, "error": "Proxy d'images indisponible"}), 404
+
+    try:
+        snapshot = fortnite_client.get_snapshot()
+        source = find_image_source(snapshot.items, snapshot.id_index, item_id, variant)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Erreur serveur: {str(e)}"
+        }), 500
+    if source is None:
+        return jsonify({"success": False, "error": "Image non trouvée"}), 404
+
+    url, size = source
+    try:
+        body, content_type, etag = image_cache.get(url, size)
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Image indisponible: {str(e)}"}), 502
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, status=200, mimetype=content_type)
+    response.set_etag(etag)
+    # L'URL change (?v=) quand l'image d'origine change : cache navigateur / CDN sans revalidation
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def shop_history_unavailable():
+    if fortnite_client is None or fortnite_client.history is None:
+        return jsonify({"success": False, "error": "Historique de la boutique désactivé"}), 200
+    return None
+
+
+@app.route('/api/shop/history/items/<path:item_id>', methods=['GET'])
+def get_fortnite_item_history(item_id):
+    """Passages d'un item en boutique et prix (dernier passage en tête)"""
+    unavailable = shop_history_unavailable()
+    if unavailable:
+        return unavailable
+
+    try:
+        history = fortnite_client.history.item_history(item_id)
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Erreur serveur: {str(e)}"}), 500
+    if history is None:
+        return jsonify({"success": False, "error": "Article jamais vu en boutique"}), 404
+    return jsonify({"success": True, **history}), 200
+
+
+@app.route('/api/shop/history/<date>', methods=['GET'])
+def get_fortnite_shop_changes_on(date):
+    """Ce qui a changé dans la boutique le jour date (YYYY-MM-DD)"""
+    unavailable = shop_history_unavailable()
+    if unavailable:
+        return unavailable
+
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"success": False, "error": "date doit être au format YYYY-MM-DD"}), 400
+
+    try:
+        snapshots = fortnite_client.history.changes_on(date)
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Erreur serveur: {str(e)}"}), 500
+    return jsonify({"success": True, "date": date, "snapshots": snapshots}), 200
+
+
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({
@@ -0,0 +1,403 @@
+"""
+Miroir local du catalogue des cosmétiques BR de fortnite-api.com (SQLite).
+
+Téléchargé en entier une fois (puis périodiquement), tenu à jour entre-temps avec
+/v2/cosmetics/new. Les items de la boutique sont enrichis depuis cette table en une
+seule requête, sans appel amont par item.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cosmetics (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    rarity TEXT,
+    set_value TEXT,
+    added TEXT,
+    body BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cosmetics_by_type ON cosmetics (type);
+CREATE INDEX IF NOT EXISTS cosmetics_by_rarity ON cosmetics (rarity);
+CREATE INDEX IF NOT EXISTS cosmetics_by_set ON cosmetics (set_value);
+
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+# Champs gardés de chaque cosmétique (le reste de l'API n'est pas utilisé)
+KEPT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "type",
+    "rarity",
+    "series",
+    "set",
+    "introduction",
+    "images",
+    "showcaseVideo",
+    "added",
+)
+# Sous-objets {value, displayValue, ...} réduits à ces clés
+_LABEL_KEYS = ("value", "displayValue", "text", "backendValue")
+# Limite SQLite des paramètres d'une requête
+_MAX_PARAMS = 500
+# Cosmétiques écrits par executemany pendant la lecture du catalogue complet
+_UPSERT_BATCH = 500
+
+DEFAULT_FULL_SYNC_SECONDS = 7 * 24 * 3600
+DEFAULT_SYNC_INTERVAL_SECONDS = 6 * 3600
+# Délai avant un nouvel essai après une synchronisation échouée
+SYNC_RETRY_SECONDS = 10 * 60
+
+
+def _label(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: value[k] for k in _LABEL_KEYS if value.get(k)}
+    return value
+
+
+def compact_cosmetic(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Forme stockée d'un cosmétique de l'API (images sans variantes LEGO, etc.)."""
+    record = {key: _label(raw[key]) for key in KEPT_FIELDS if raw.get(key)}
+    images = raw.get("images")
+    if isinstance(images, dict):
+        record["images"] = {k: v for k, v in images.items() if isinstance(v, str) and v}
+    return record
+
+
+def _display(value: Any) -> str:
+    """displayValue d'un libellé stocké ({value, displayValue}) ou la chaîne telle quelle."""
+    if isinstance(value, dict):
+        return value.get("displayValue") or value.get("value") or "N/A"
+    return value or "N/A"
+
+
+def shop_item_from_cosmetic(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fiche d'un cosmétique hors boutique du jour, dans la forme des items de /api/shop
+    (type et rareté en texte, images icon / featured / small_icon), sans prix :
+    in_shop False, vbucks None (l'objet ne peut pas être commandé).
+    """
+    images = record.get("images") or {}
+    return {
+        "name": record.get("name", ""),
+        "description": record.get("description", ""),
+        "type": _display(record.get("type")),
+        "rarity": _display(record.get("rarity")),
+        "vbucks": None,
+        "id": record.get("id", ""),
+        "images": {
+            "icon": images.get("icon"),
+            "featured": images.get("featured"),
+            "small_icon": images.get("smallIcon"),
+        },
+        "cosmetic": {
+            key: record[key]
+            for key in ("set", "series", "introduction", "added", "showcaseVideo")
+            if key in record
+        },
+        "in_shop": False,
+    }
+
+
+def _value(record: Dict[str, Any], key: str) -> Optional[str]:
+    value = record.get(key)
+    if isinstance(value, dict):
+        value = value.get("value")
+    return str(value).lower() if value else None
+
+
+class CosmeticsCatalog:
+    """Table des cosmétiques indexée par id, type, rareté et set."""
+
+    def __init__(self, path: str, language: str = "fr") -> None:
+        self.path = path
+        self.language = language
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def upsert(self, cosmetics: Iterable[Dict[str, Any]], replace_all: bool = False) -> int:
+        """
+        Insère / remplace des cosmétiques bruts de l'API ; replace_all vide la table avant.
+        Écrits par lots au fil de l'itérable, dans une seule transaction : si l'itérable
+        lève une exception (flux coupé, réponse invalide), la table reste inchangée.
+        """
+        count = 0
+        batch: List[tuple] = []
+        conn = self._connect()
+        with conn:
+            if replace_all:
+                conn.execute("DELETE FROM cosmetics")
+            for raw in cosmetics:
+                if not raw.get("id"):
+                    continue
+                record = compact_cosmetic(raw)
+                batch.append(
+                    (
+                        record["id"],
+                        record.get("name"),
+                        _value(record, "type"),
+                        _value(record, "rarity"),
+                        _value(record, "set"),
+                        record.get("added"),
+                        zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8")),
+                    )
+                )
+                if len(batch) >= _UPSERT_BATCH:
+                    count += self._insert(conn, batch)
+            count += self._insert(conn, batch)
+        return count
+
+    def _insert(self, conn: sqlite3.Connection, batch: List[tuple]) -> int:
+        conn.executemany(
+            "INSERT OR REPLACE INTO cosmetics (id, name, type, rarity, set_value, added, body)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT value FROM catalog_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: Any) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def _claim_sync(self, interval_seconds: int) -> bool:
+        """
+        Un seul worker synchronise par intervalle (la réservation est faite en base) :
+        la prochaine synchronisation est reportée d'un intervalle complet, puis ramenée
+        à SYNC_RETRY_SECONDS par _release_sync si celle-ci échoue.
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT value FROM catalog_meta WHERE key = 'next_sync'"
+            ).fetchone()
+            if row and time.time() < float(row["value"]):
+                return False
+            self._set_meta(conn, "next_sync", time.time() + interval_seconds)
+        return True
+
+    def _release_sync(self, interval_seconds: int) -> None:
+        """Après un échec, nouvel essai (par n'importe quel worker) dans SYNC_RETRY_SECONDS."""
+        with self._connect() as conn:
+            retry = time.time() + min(interval_seconds, SYNC_RETRY_SECONDS)
+            self._set_meta(conn, "next_sync", retry)
+
+    def sync(
+        self,
+        scraper: Any,
+        interval_seconds: int = DEFAULT_SYNC_INTERVAL_SECONDS,
+        full_sync_seconds: int = DEFAULT_FULL_SYNC_SECONDS,
+    ) -> str:
+        """
+        Téléchargement complet si la table est vide ou la dernière copie complète trop
+        ancienne, sinon seulement les nouveautés. Retourne l'action effectuée.
+        """
+        if not self._claim_sync(interval_seconds):
+            return "skipped"
+
+        try:
+            result = self._sync(scraper, full_sync_seconds)
+        except Exception:
+            self._release_sync(interval_seconds)
+            raise
+        if result == "failed":
+            self._release_sync(interval_seconds)
+        return result
+
+    def _sync(self, scraper: Any, full_sync_seconds: int) -> str:
+        last_full = float(self._meta("last_full") or 0)
+        if self.count() == 0 or time.time() - last_full >= full_sync_seconds:
+            # Catalogue lu en flux (plusieurs dizaines de Mo une fois décodé en entier)
+            try:
+                count = self.upsert(scraper.iter_cosmetics(language=self.language), replace_all=True)
+            except Exception as exc:
+                logger.warning("Téléchargement du catalogue complet échoué (%s)", exc)
+                return "failed"
+            with self._connect() as conn:
+                self._set_meta(conn, "last_full", time.time())
+            logger.info("Catalogue cosmétiques : %s entrées (complet)", count)
+            # Le hash courant sert de point de départ aux synchronisations suivantes
+            self._sync_new(scraper)
+            return "full"
+        return self._sync_new(scraper)
+
+    def _sync_new(self, scraper: Any) -> str:
+        new = scraper.get_new_cosmetics(language=self.language)
+        if new is None:
+            return "failed"
+        current_hash = (new.get("hashes") or {}).get("br")
+        if current_hash and current_hash == self._meta("br_hash"):
+            return "unchanged"
+        count = self.upsert((new.get("items") or {}).get("br") or [])
+        with self._connect() as conn:
+            if current_hash:
+                self._set_meta(conn, "br_hash", current_hash)
+        logger.info("Catalogue cosmétiques : %s nouveautés", count)
+        return "incremental"
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM cosmetics").fetchone()[0]
+
+    def get(self, cosmetic_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([cosmetic_id]).get(cosmetic_id)
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """id -> cosmétique pour tous les ids connus (une requête par tranche de 500)."""
+        unique = list(dict.fromkeys(i for i in ids if i))
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._connect()
+        for start in range(0, len(unique), _MAX_PARAMS):
+            chunk = unique[start : start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT id, body FROM cosmetics WHERE id IN ({placeholders})", chunk
+            ):
+                found[row["id"]] = json.loads(zlib.decompress(row["body"]))
+        return found
+
+    def query(
+        self,
+        item_type: Optional[str] = None,
+        rarity: Optional[str] = None,
+        set_value: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Cosmétiques filtrés par type / rareté / set (valeurs API, ex. outfit, epic)."""
+        clauses, params = [], []
+        for column, value in (("type", item_type), ("rarity", rarity), ("set_value", set_value)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value.lower())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT body FROM cosmetics {where} ORDER BY added DESC, id LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        return [json.loads(zlib.decompress(row["body"])) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Enrichissement de la boutique
+    # ------------------------------------------------------------------
+    def enrich_items(self, items: Sequence[Dict[str, Any]]) -> None:
+        """
+        Ajoute à chaque item (et objet de pack / lié) les infos du catalogue sous
+        'cosmetic' (set, série, introduction, date d'ajout, vidéo) et complète
+        description / images manquantes. Une seule lecture pour toute la boutique.
+        """
+        targets = []
+        for item in items:
+            targets.append(item)
+            targets.extend(item.get("bundle_items", []) + item.get("related_items", []))
+        catalog = self.get_many(target.get("id") for target in targets)
+
+        for target in targets:
+            record = catalog.get(target.get("id"))
+            if record is None:
+                continue
+            target["cosmetic"] = {
+                key: record[key]
+                for key in ("set", "series", "introduction", "added", "showcaseVideo")
+                if key in record
+            }
+            if not target.get("description") and record.get("description"):
+                target["description"] = record["description"]
+            if not target.get("images") and record.get("images"):
+                target["images"] = record["images"]
+
+
+class CatalogSyncThread:
+    """Thread (un par worker) qui garde le catalogue à jour ; un seul worker télécharge."""
+
+    def __init__(
+        self,
+        catalog: CosmeticsCatalog,
+        scraper: Any,
+        interval_seconds: int = DEFAULT_SYNC_INTERVAL_SECONDS,
+    ) -> None:
+        self.catalog = catalog
+        self.scraper = scraper
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="fortnite-catalog-sync", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                result = self.catalog.sync(self.scraper, interval_seconds=self.interval_seconds)
+            except Exception as exc:
+                logger.warning("Synchronisation du catalogue échouée (%s)", exc)
+                result = "failed"
+            if result == "failed":
+                self._stop.wait(min(self.interval_seconds, SYNC_RETRY_SECONDS))
+            else:
+                self._stop.wait(self.interval_seconds)
+
+
+__all__ = ["CatalogSyncThread", "CosmeticsCatalog", "compact_cosmetic", "shop_item_from_cosmetic"]
+
+
+if __name__ == "__main__":
+    # Synchronisation manuelle : python -m services.cosmetics_catalog data/cosmetics.db [--full]
+    import sys
+
+    from .fortnite_shop_scraper import FortniteShopScraper
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = CosmeticsCatalog(sys.argv[1])
+    scraper = FortniteShopScraper(api_key=os.getenv("FORTNITE_API_KEY"))
+    full = 0 if "--full" in sys.argv else DEFAULT_FULL_SYNC_SECONDS
+    print(catalog.sync(scraper, interval_seconds=0, full_sync_seconds=full), catalog.count())
@@ -1,13 +1,35 @@
+import hashlib
 import json
 import logging
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
 
-import requests
-from requests.adapters import HTTPAdapter, Retry
+from .cosmetics_catalog import CatalogSyncThread, CosmeticsCatalog
+from .fortnite_shop_scraper import NOT_MODIFIED, FortniteShopScraper
+from .image_cache import rewrite_image_urls
+from .shop_changes import DEFAULT_KEEP_VERSIONS, append_version, version_entry
+from .shop_history import ShopHistory
+from .shop_items import compact_items, json_default
+from .shop_schedule import (
+    ShopRefreshScheduler,
+    has_expired_items,
+    next_change_point,
+    parse_iso,
+)
+from .shop_snapshot import ShopSnapshot
+from .snapshot_store import MappedSnapshot
 
-from .fortnite_shop_scraper import FortniteShopScraper
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows (dev local) : pas de verrou inter-process
+    HAS_FCNTL = False
 
 logger = logging.getLogger(__name__)
 
@@ -16,44 +38,177 @@ class FortniteAPIError(RuntimeError):
     """Erreur remontée lors de l'appel à Fortnite API."""
 
 
+class _CachedShop:
+    """État du cache mémoire pour une langue (remplacé d'un bloc, jamais modifié)."""
+
+    __slots__ = ("snapshot", "mtime", "expires_at", "stale_until")
+
+    def __init__(
+        self,
+        snapshot: ShopSnapshot,
+        mtime: Optional[int],
+        expires_at: Optional[datetime],
+        stale_until: Optional[datetime],
+    ) -> None:
+        self.snapshot = snapshot
+        self.mtime = mtime
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+def share_language_independent(
+    primary_items: Iterable[Dict[str, Any]], items: Iterable[Dict[str, Any]]
+) -> None:
+    """
+    Fait pointer les parties non traduites (images, layout) des items d'une autre langue
+    vers les objets de la langue principale quand ils sont identiques : une seule copie
+    en mémoire quel que soit le nombre de langues.
+    """
+    shared: Dict[str, Dict[str, Any]] = {}
+    for item in primary_items:
+        if item.get("id"):
+            shared.setdefault(item["id"], item)
+        for member in item.get("bundle_items", []) + item.get("related_items", []):
+            if member.get("id"):
+                shared.setdefault(member["id"], member)
+
+    def dedupe(target: Dict[str, Any]) -> None:
+        source = shared.get(target.get("id"))
+        if source is None:
+            return
+        for key in ("images", "layout"):
+            if key in target and target[key] == source.get(key):
+                target[key] = source[key]
+
+    for item in items:
+        dedupe(item)
+        for member in item.get("bundle_items", []) + item.get("related_items", []):
+            dedupe(member)
+
+
 class FortniteAPIClient:
     """Client léger pour https://fortnite-api.com"""
 
     BASE_URL = "https://fortnite-api.com/v2"
 
+    # Mode rotation : marge après un changement de boutique avant de refetch,
+    # et délai de nouvel essai si l'API sert encore l'ancienne rotation, pendant au
+    # plus ROTATION_RETRY_WINDOW après l'outDate dépassé (ensuite : rythme normal)
+    ROTATION_GRACE = timedelta(seconds=30)
+    ROTATION_RETRY = timedelta(seconds=60)
+    ROTATION_RETRY_WINDOW = timedelta(minutes=15)
+
     def __init__(
         self,
         api_key: str,
         cache_path: Optional[str] = None,
         cache_ttl_seconds: int = 900,
+        min_refresh_interval_seconds: int = 60,
+        max_stale_seconds: int = 3600,
+        rotation_aware: bool = False,
+        keepalive_seconds: int = 21600,
+        rotation_hour_utc: int = 0,
+        cache_format: str = "json",
+        languages: Sequence[str] = ("fr",),
+        history_path: Optional[str] = None,
+        changes_keep_versions: int = DEFAULT_KEEP_VERSIONS,
+        image_proxy_url: Optional[str] = None,
+        catalog_path: Optional[str] = None,
+        price_cache_path: Optional[str] = None,
+        upstream_url: Optional[str] = None,
+        record_dir: Optional[str] = None,
     ) -> None:
         if not api_key:
             raise ValueError("FORTNITE_API_KEY manquante")
 
         self.api_key = api_key
         self.cache_ttl = timedelta(seconds=cache_ttl_seconds)
+        # Au-delà du TTL, les données restent servies immédiatement pendant
+        # max_stale (refresh en tâche de fond) ; après, refresh synchrone.
+        self.max_stale = timedelta(seconds=max_stale_seconds)
+        # Mode rotation : l'expiration suit le prochain outDate / la rotation
+        # quotidienne au lieu du TTL fixe, avec un keep-alive lent entre les deux
+        self.rotation_aware = rotation_aware
+        self.keepalive = timedelta(seconds=keepalive_seconds)
+        self.rotation_hour_utc = rotation_hour_utc
         default_cache_path = os.path.join(
             os.path.dirname(__file__), "..", "data", "shop_cache.json"
         )
         self.cache_path = cache_path or os.path.abspath(default_cache_path)
+        # Une boutique par langue, toutes rafraîchies dans le même cycle ; la première
+        # est la langue par défaut et garde le fichier historique shop_cache.json
+        self.languages = tuple(dict.fromkeys(lang.strip() for lang in languages if lang.strip()))
+        if not self.languages:
+            raise ValueError("Au moins une langue requise")
+        self.default_language = self.languages[0]
+        # "binary" : snapshot compact mmap (shop_cache[.lang].bin) partagé par les workers ;
+        # le JSON reste lu au démarrage à froid s'il n'y a pas encore de .bin
+        if cache_format not in ("json", "binary"):
+            raise ValueError(f"cache_format inconnu: {cache_format}")
+        self.cache_format = cache_format
+        # Verrou partagé par tous les workers de la machine ; son mtime date la
+        # dernière tentative de fetch (sert aussi de limite anti-spam refresh=1)
+        self.lock_path = f"{self.cache_path}.lock"
+        self.min_refresh_interval = min_refresh_interval_seconds
+
+        # Nombre de versions précédentes pour lesquelles /api/shop/changes sait répondre
+        self.changes_keep_versions = changes_keep_versions
+        # Base publique de /api/img : les URLs d'images du CDN y sont réécrites au refresh
+        self.image_proxy_url = image_proxy_url
+        # Archive des boutiques successives (langue par défaut), None = désactivée
+        self.history = ShopHistory(history_path) if history_path else None
+
+        # Miroir local du catalogue des cosmétiques (enrichissement des items), None = désactivé
+        self.catalog = (
+            CosmeticsCatalog(catalog_path, language=self.default_language) if catalog_path else None
+        )
+        self._catalog_sync: Optional[CatalogSyncThread] = None
+
+        # Initialiser le scraper (prix trouvés en ligne gardés dans price_cache_path) ;
+        # upstream_url / record_dir : stub local et enregistrement, voir upstream_replay
+        self.scraper = FortniteShopScraper(
+            api_key=api_key,
+            catalog=self.catalog,
+            price_cache_path=price_cache_path,
+            upstream_url=upstream_url,
+            record_dir=record_dir,
+        )
 
-        # Initialiser le scraper
-        self.scraper = FortniteShopScraper(api_key=api_key)
+        # Cache mémoire (par worker et par langue) : le fichier disque ne sert qu'au
+        # démarrage à froid et au partage entre workers. mtime_ns identifie la version lue.
+        self._caches: Dict[str, _CachedShop] = {}
+        self._cache_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._background_refresh_running = False
+        self._scheduler: Optional[ShopRefreshScheduler] = None
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
-    def get_shop(self, force_refresh: bool = False) -> Dict[str, Any]:
-        """Retourne les données shop (cache -> API) avec fallback si l'API est KO."""
-        cached = self._load_cache()
+    def get_shop(self, force_refresh: bool = False, language: Optional[str] = None) -> Dict[str, Any]:
+        """Retourne les données shop (mémoire -> disque -> API) avec fallback si l'API est KO."""
+        return self.get_snapshot(force_refresh=force_refresh, language=language).data
+
+    def get_snapshot(
+        self, force_refresh: bool = False, language: Optional[str] = None
+    ) -> ShopSnapshot:
+        """Comme get_shop, mais avec les corps de réponse pré-encodés."""
+        language = self._check_language(language)
+        if not force_refresh and self._memory_is_fresh(language):
+            return self._caches[language].snapshot
+
+        cached = self._load_cache(language)
+
+        if not force_refresh and cached and self._memory_is_fresh(language):
+            return cached
 
-        if not force_refresh and cached and not self._is_cache_expired(cached.get("last_updated")):
+        # Stale-while-revalidate : la latence de la requête ne dépend pas de l'API
+        if not force_refresh and cached and self._memory_is_servable(language):
+            self._refresh_in_background(language, cached)
             return cached
 
         try:
-            data = self._fetch_shop_from_api()
-            self._save_cache(data)
-            return data
+            return self._refresh(language, cached, force=force_refresh)
         except Exception as exc:
             if cached:
                 logger.warning(
@@ -64,59 +219,513 @@ class FortniteAPIClient:
             raise
 
     def refresh_shop(self) -> Dict[str, Any]:
-        """Force un refresh (ignorer le cache)."""
-        data = self._fetch_shop_from_api()
-        self._save_cache(data)
-        return data
+        """Force un refresh (ignorer le cache), dans la limite de min_refresh_interval."""
+        language = self.default_language
+        return self._refresh(language, self._load_cache(language), force=True).data
+
+    def refresh_if_expired(self) -> ShopSnapshot:
+        """Refresh (single-flight, toutes langues) seulement si le snapshot courant a expiré."""
+        language = self.default_language
+        cached = self._load_cache(language)
+        if cached is not None and self._memory_is_fresh(language):
+            return cached
+        return self._refresh(language, cached, force=False)
+
+    def start_scheduler(self) -> None:
+        """Lance le thread qui rafraîchit la boutique juste après chaque rotation."""
+        if self._scheduler is None:
+            self._scheduler = ShopRefreshScheduler(
+                self, keepalive_seconds=int(self.keepalive.total_seconds())
+            )
+        self._scheduler.start()
+
+    def start_catalog_sync(self, interval_seconds: int) -> None:
+        """Lance le thread qui tient le catalogue des cosmétiques à jour."""
+        if self.catalog is None:
+            return
+        if self._catalog_sync is None:
+            self._catalog_sync = CatalogSyncThread(
+                self.catalog, self.scraper, interval_seconds=interval_seconds
+            )
+        self._catalog_sync.start()
+
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        cache = self._caches.get(self.default_language)
+        return cache.expires_at if cache else None
+
+    @staticmethod
+    def compute_version(data: Dict[str, Any]) -> str:
+        """
+        Hash stable du contenu de la boutique (sert d'ETag).
+        last_updated et version sont exclus : deux fetchs identiques donnent la même version.
+        """
+        content = {k: v for k, v in data.items() if k not in ("last_updated", "version")}
+        encoded = json.dumps(
+            content,
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+            default=json_default,
+        ).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:20]
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
-    def _fetch_shop_from_api(self) -> Dict[str, Any]:
+    def _check_language(self, language: Optional[str]) -> str:
+        language = language or self.default_language
+        if language not in self.languages:
+            raise ValueError(
+                f"Langue non disponible: {language} (disponibles: {', '.join(self.languages)})"
+            )
+        return language
+
+    def _refresh(
+        self, language: str, cached: Optional[ShopSnapshot], force: bool
+    ) -> ShopSnapshot:
+        """
+        Refresh single-flight : un seul appelant par machine interroge l'API, pour toutes
+        les langues à la fois. Les autres servent le snapshot précédent, ou attendent le
+        résultat s'ils n'en ont pas.
+        """
+        # FORTNITE_SHOP_MIN_REFRESH vaut aussi sans copie en cache (démarrage à froid
+        # pendant une panne, langue qui échoue) : pas de nouveau fetch avant le délai
+        if self._refreshed_recently():
+            if cached is not None:
+                return cached
+            latest = self._load_cache(language)
+            if latest is not None:
+                return latest
+            raise FortniteAPIError(f"Boutique indisponible en langue {language}")
+
+        wait = cached is None
+        if not self._refresh_lock.acquire(blocking=wait):
+            return cached
+        try:
+            with self._host_lock(blocking=wait) as acquired:
+                if not acquired:
+                    return cached
+
+                # Un autre thread/worker a pu écrire le cache pendant l'attente
+                latest = self._load_cache(language)
+                if latest is not None and latest is not cached:
+                    return latest
+                if not force and latest is not None and self._memory_is_fresh(language):
+                    return latest
+
+                try:
+                    shops = self._fetch_shops_from_api()
+                finally:
+                    self._mark_refresh_attempt()
+
+                snapshots = {}
+                for lang, data in shops.items():
+                    if isinstance(data, ShopSnapshot):
+                        # Inchangée (304) : snapshot et corps encodés gardés tels quels
+                        snapshots[lang] = data
+                        continue
+                    # Journal écrit avant le cache : un worker qui relit le cache y trouve la version
+                    self._record_version(lang, data)
+                    snapshots[lang] = self._save_cache(lang, data)
+                if not isinstance(shops[self.default_language], ShopSnapshot):
+                    self._archive(shops[self.default_language])
+                if language in snapshots:
+                    return snapshots[language]
+                if cached is not None:
+                    return cached
+                raise FortniteAPIError(f"Boutique indisponible en langue {language}")
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_in_background(self, language: str, cached: ShopSnapshot) -> None:
+        with self._cache_lock:
+            if self._background_refresh_running:
+                return
+            self._background_refresh_running = True
+
+        thread = threading.Thread(
+            target=self._background_refresh,
+            args=(language, cached),
+            name="fortnite-shop-refresh",
+            daemon=True,
+        )
+        thread.start()
+
+    def _background_refresh(self, language: str, cached: ShopSnapshot) -> None:
+        try:
+            self._refresh(language, cached, force=False)
+        except Exception as exc:
+            logger.warning("Refresh boutique en arrière-plan échoué (%s)", exc)
+        finally:
+            with self._cache_lock:
+                self._background_refresh_running = False
+
+    @contextmanager
+    def _host_lock(self, blocking: bool) -> Iterator[bool]:
+        """flock exclusif sur lock_path ; donne False si déjà pris et blocking=False."""
+        if not HAS_FCNTL:
+            yield True
+            return
+
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refreshed_recently(self) -> bool:
+        try:
+            last_attempt = os.stat(self.lock_path).st_mtime
+        except OSError:
+            return False
+        return time.time() - last_attempt < self.min_refresh_interval
+
+    def _mark_refresh_attempt(self) -> None:
+        try:
+            os.utime(self.lock_path)
+        except OSError:
+            pass
+
+    def _changes_path(self, language: str) -> str:
+        return f"{os.path.splitext(self._json_path(language))[0]}.changes.json"
+
+    def _load_change_log(self, language: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._changes_path(language), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    def _record_version(self, language: str, data: Dict[str, Any]) -> None:
+        """Ajoute la nouvelle version au journal des changements (partagé via le disque)."""
+        log = self._load_change_log(language)
+        previous = self._caches.get(language)
+        if not log and previous is not None:
+            # Premier refresh avec journal : la version servie jusqu'ici en est le point de départ
+            snapshot = previous.snapshot
+            log = [
+                version_entry(
+                    {
+                        "version": snapshot.version,
+                        "last_updated": snapshot.meta.get("last_updated"),
+                        "items": snapshot.items,
+                    }
+                )
+            ]
+        log = append_version(log, data, self.changes_keep_versions)
+        try:
+            self._write_json_atomic(self._changes_path(language), log)
+        except OSError as exc:
+            logger.warning("Journal des changements non écrit (%s)", exc)
+
+    def _archive(self, data: Dict[str, Any]) -> None:
+        """L'archive est secondaire : une erreur n'empêche jamais de servir la boutique."""
+        if self.history is None:
+            return
+        try:
+            if self.history.record(data):
+                logger.info("Boutique %s archivée", data.get("version"))
+        except Exception as exc:
+            logger.warning("Archivage de la boutique impossible (%s)", exc)
+
+    def _fetch_shops_from_api(self) -> Dict[str, Union[Dict[str, Any], ShopSnapshot]]:
+        """
+        Récupère toutes les langues en parallèle (un cycle de refresh).
+        La langue par défaut est obligatoire ; une autre langue en échec garde son ancien cache.
+        Une langue inchangée (304) est rendue sous forme du ShopSnapshot déjà servi.
+        """
+        if len(self.languages) == 1:
+            return {self.default_language: self._fetch_shop_from_api(self.default_language)}
+
+        with ThreadPoolExecutor(max_workers=len(self.languages)) as executor:
+            futures = {
+                lang: executor.submit(self._fetch_shop_from_api, lang) for lang in self.languages
+            }
+
+        shops: Dict[str, Union[Dict[str, Any], ShopSnapshot]] = {}
+        for lang, future in futures.items():
+            try:
+                shops[lang] = future.result()
+            except Exception as exc:
+                if lang == self.default_language:
+                    raise
+                logger.warning("Boutique %s non rafraîchie (%s)", lang, exc)
+
+        primary = shops[self.default_language]
+        primary_items = primary.items if isinstance(primary, ShopSnapshot) else primary.get("items", [])
+        for lang, data in shops.items():
+            if lang != self.default_language and not isinstance(data, ShopSnapshot):
+                share_language_independent(primary_items, data.get("items", []))
+        return shops
+
+    def _fetch_shop_from_api(self, language: str = "fr") -> Union[Dict[str, Any], ShopSnapshot]:
         """
         Récupère et parse les données de la boutique Fortnite en temps réel.
         Utilise le scraper fortnite_shop_scraper.py
         Retourne exactement le format que le scraper retourne
         """
-        logger.info("Fetching Fortnite shop using FortniteShopScraper")
+        logger.info("Fetching Fortnite shop (%s) using FortniteShopScraper", language)
         
+        # GET conditionnel : si la boutique en cache est toujours celle de l'API (304),
+        # le snapshot en cache est gardé tel quel, seul last_updated avance (_mark_unchanged)
+        previous = self._load_cache(language)
+        validators = self._load_validators(language, previous)
+
         # Utiliser le scraper pour récupérer les données
-        shop_data = self.scraper.get_shop(language="fr")
+        # Lecture en flux : le document amont n'est jamais chargé en entier
+        shop_data = self.scraper.get_shop(
+            language=language, stream=True, validators=validators, compact=True
+        )
+
+        if shop_data is NOT_MODIFIED:
+            logger.info("Boutique %s inchangée (304), rien à parser", language)
+            return self._mark_unchanged(language, previous, validators)
         
         if not shop_data:
             raise FortniteAPIError("Impossible de récupérer les données de la boutique")
         
-        # Retourner exactement ce que le scraper retourne, en ajoutant juste last_updated
+        if self.image_proxy_url:
+            rewrite_image_urls(shop_data, self.image_proxy_url)
+
+        # Retourner exactement ce que le scraper retourne, en ajoutant version et last_updated
         # Le scraper retourne déjà le format exact de fortnite_shop.json
+        shop_data['version'] = self.compute_version(shop_data)
         shop_data['last_updated'] = datetime.now(timezone.utc).isoformat()
+        self._save_validators(
+            language,
+            shop_data['version'],
+            self.scraper.shop_validators.get(language),
+            shop_data['last_updated'],
+        )
         
         return shop_data
 
-    def _load_cache(self) -> Optional[Dict[str, Any]]:
-        if not os.path.exists(self.cache_path):
+    def _mark_unchanged(
+        self, language: str, snapshot: ShopSnapshot, validators: Optional[Dict[str, str]]
+    ) -> ShopSnapshot:
+        """
+        Boutique confirmée par l'API (304) : ni sérialisation, ni compression, ni réécriture
+        du cache. last_updated avance en mémoire (les corps encodés gardent l'ancien) et
+        la date de vérification est partagée via le fichier des validateurs.
+        """
+        checked_at = datetime.now(timezone.utc).isoformat()
+        self._save_validators(language, snapshot.version, validators, checked_at)
+        snapshot.meta["last_updated"] = checked_at
+        self._update_expiry(language, snapshot)
+        return snapshot
+
+    def _validators_path(self, language: str) -> str:
+        return f"{os.path.splitext(self._json_path(language))[0]}.upstream.json"
+
+    def _read_upstream_state(
+        self, language: str, snapshot: Optional[ShopSnapshot]
+    ) -> Dict[str, Any]:
+        """Contenu du fichier des validateurs, seulement s'il décrit la boutique en cache."""
+        if snapshot is None:
+            return {}
+        try:
+            with open(self._validators_path(language), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if stored.get("version") != snapshot.version:
+            return {}
+        return stored
+
+    def _load_validators(
+        self, language: str, previous: Optional[ShopSnapshot]
+    ) -> Optional[Dict[str, str]]:
+        """ETag / Last-Modified de l'API, seulement s'ils décrivent la boutique en cache."""
+        return self._read_upstream_state(language, previous).get("validators") or None
+
+    def _save_validators(
+        self,
+        language: str,
+        version: str,
+        validators: Optional[Dict[str, str]],
+        checked_at: str,
+    ) -> None:
+        """
+        Partagés via le disque : le worker qui fera le prochain refresh les retrouve.
+        checked_at : dernière fois que l'API a confirmé cette version (200 ou 304).
+        """
+        try:
+            self._write_json_atomic(
+                self._validators_path(language),
+                {"version": version, "validators": validators or {}, "checked_at": checked_at},
+            )
+        except OSError as exc:
+            logger.warning("Validateurs HTTP non écrits (%s)", exc)
+
+    def _apply_upstream_check(self, language: str, snapshot: ShopSnapshot) -> bool:
+        """
+        Reprend la date du dernier 304 (écrite par un autre worker) comme last_updated
+        du snapshot ; True si elle a avancé.
+        """
+        checked_at = self._read_upstream_state(language, snapshot).get("checked_at")
+        checked = parse_iso(checked_at)
+        last = parse_iso(snapshot.meta.get("last_updated"))
+        if checked is None or (last is not None and checked <= last):
+            return False
+        snapshot.meta["last_updated"] = checked_at
+        return True
+
+    def _update_expiry(self, language: str, snapshot: ShopSnapshot) -> None:
+        expires_at = self._compute_expiry(snapshot)
+        stale_until = expires_at + self.max_stale if expires_at else None
+        with self._cache_lock:
+            cache = self._caches.get(language)
+            mtime = cache.mtime if cache is not None and cache.snapshot is snapshot else None
+            self._caches[language] = _CachedShop(snapshot, mtime, expires_at, stale_until)
+
+    def _memory_is_fresh(self, language: str) -> bool:
+        """Hit mémoire : aucune I/O, aucun parsing."""
+        cache = self._caches.get(language)
+        return (
+            cache is not None
+            and cache.expires_at is not None
+            and datetime.now(timezone.utc) < cache.expires_at
+        )
+
+    def _memory_is_servable(self, language: str) -> bool:
+        """Expiré mais encore dans la fenêtre max_stale."""
+        cache = self._caches.get(language)
+        return (
+            cache is not None
+            and cache.stale_until is not None
+            and datetime.now(timezone.utc) < cache.stale_until
+        )
+
+    def _set_memory_cache(
+        self, language: str, snapshot: ShopSnapshot, mtime: Optional[int]
+    ) -> ShopSnapshot:
+        snapshot.attach_changes(self._load_change_log(language))
+        self._apply_upstream_check(language, snapshot)
+        expires_at = self._compute_expiry(snapshot)
+        stale_until = expires_at + self.max_stale if expires_at else None
+        with self._cache_lock:
+            self._caches[language] = _CachedShop(snapshot, mtime, expires_at, stale_until)
+        return snapshot
+
+    def _json_path(self, language: str) -> str:
+        if language == self.default_language:
+            return self.cache_path
+        root, ext = os.path.splitext(self.cache_path)
+        return f"{root}.{language}{ext}"
+
+    def _snapshot_path(self, language: str) -> str:
+        return f"{os.path.splitext(self._json_path(language))[0]}.bin"
+
+    def _cache_file(self, language: str) -> str:
+        snapshot_path = self._snapshot_path(language)
+        if self.cache_format == "binary" and os.path.exists(snapshot_path):
+            return snapshot_path
+        return self._json_path(language)
+
+    def _cache_mtime(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
             return None
 
+    def _load_cache(self, language: str) -> Optional[ShopSnapshot]:
+        """Relit le fichier disque seulement s'il a changé depuis la dernière lecture."""
+        cache = self._caches.get(language)
+        current = cache.snapshot if cache else None
+        path = self._cache_file(language)
+        mtime = self._cache_mtime(path)
+        if mtime is None:
+            return current
+
+        if cache is not None and mtime == cache.mtime:
+            # Expiré : un autre worker a peut-être eu un 304 depuis (cache non réécrit)
+            if not self._memory_is_fresh(language) and self._apply_upstream_check(
+                language, current
+            ):
+                self._update_expiry(language, current)
+            return current
+
+        if path.endswith(".bin"):
+            try:
+                snapshot = ShopSnapshot.from_mapped(MappedSnapshot(path))
+            except (OSError, ValueError) as exc:
+                logger.warning("Snapshot binaire illisible (%s), il sera écrasé", exc)
+                return current
+            return self._set_memory_cache(language, snapshot, mtime)
+
         try:
-            with open(self.cache_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
         except json.JSONDecodeError:
             logger.warning("Cache shop corrompu, il sera écrasé")
-            return None
+            return current
 
-    def _save_cache(self, data: Dict[str, Any]) -> None:
-        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
-        with open(self.cache_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        logger.info("Fortnite shop cache mis à jour (%s)", self.cache_path)
+        if not data.get("version"):
+            # Ancien cache disque écrit avant le tampon de version
+            data["version"] = self.compute_version(data)
+        # Même forme compacte qu'après un parsing (voir shop_items)
+        data["items"] = compact_items(data.get("items", []))
+        primary = self._caches.get(self.default_language)
+        if language != self.default_language and primary is not None:
+            share_language_independent(primary.snapshot.items, data.get("items", []))
+        # Sérialisation + compression faites ici, une fois, hors du chemin des requêtes
+        return self._set_memory_cache(language, ShopSnapshot(data), mtime)
 
-    def _is_cache_expired(self, last_updated_iso: Optional[str]) -> bool:
-        if not last_updated_iso:
-            return True
-        try:
-            last = datetime.fromisoformat(last_updated_iso)
-        except ValueError:
-            return True
-        return datetime.now(timezone.utc) - last >= self.cache_ttl
+    def _save_cache(self, language: str, data: Dict[str, Any]) -> ShopSnapshot:
+        snapshot = ShopSnapshot(data)
+        if self.cache_format == "binary":
+            snapshot_path = self._snapshot_path(language)
+            snapshot.write(snapshot_path)
+            logger.info("Fortnite shop snapshot mis à jour (%s)", snapshot_path)
+            # Relire via mmap : ce worker ne garde pas non plus de copie privée
+            mapped = ShopSnapshot.from_mapped(MappedSnapshot(snapshot_path))
+            return self._set_memory_cache(language, mapped, self._cache_mtime(snapshot_path))
+
+        cache_path = self._json_path(language)
+        self._write_json_atomic(cache_path, data, indent=2)
+        logger.info("Fortnite shop cache mis à jour (%s)", cache_path)
+        return self._set_memory_cache(language, snapshot, self._cache_mtime(cache_path))
+
+    def _write_json_atomic(self, path: str, payload: Any, indent: Optional[int] = None) -> None:
+        """
+        Écriture atomique (fichier temporaire + rename) : les autres workers
+        ne lisent jamais un JSON à moitié écrit.
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = f.name
+            try:
+                json.dump(payload, f, ensure_ascii=False, indent=indent, default=json_default)
+            except Exception:
+                f.close()
+                os.remove(tmp_path)
+                raise
+        os.replace(tmp_path, path)
+
+    def _compute_expiry(self, snapshot: ShopSnapshot) -> Optional[datetime]:
+        last = parse_iso(snapshot.meta.get("last_updated"))
+        if last is None:
+            return None
+        if not self.rotation_aware:
+            return last + self.cache_ttl
+
+        # outDate lus dans l'en-tête d'un snapshot mmap : aucun item décodé
+        if has_expired_items(snapshot.out_dates, last, self.ROTATION_RETRY_WINDOW):
+            # L'API n'avait pas encore publié la nouvelle rotation
+            return last + self.ROTATION_RETRY
+        change = next_change_point(snapshot.out_dates, last, self.rotation_hour_utc)
+        return min(change + self.ROTATION_GRACE, last + self.keepalive)
 
 
-__all__ = ["FortniteAPIClient", "FortniteAPIError"]
+__all__ = ["FortniteAPIClient", "FortniteAPIError", "share_language_independent"]
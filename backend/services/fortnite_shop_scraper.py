@@ -1,76 +1,260 @@
 import requests
 import json
-import re
-import time
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from urllib.parse import quote_plus
+from typing import Dict, Any, Optional, List, Iterable, Iterator
+from urllib.parse import urlsplit
 
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
-    print("⚠️ BeautifulSoup4 non installé - parsing HTML basique uniquement")
+from .http_pool import PooledHTTP
+from .json_stream import StreamedJSON
+from .price_cache import ESTIMATE_SOURCE, PriceCache, PriceQuote
+from .price_lookup import PriceLookup, default_sources
+from .pricing import DEFAULT_COST_PER_VBUCK, PricingConfig, PricingEngine
+from .shop_items import ItemImages, PackMember, ShopItem, json_default, plain_items
+from .upstream_replay import ReplayStore
+
+# Retour de get_shop quand la boutique n'a pas changé depuis les validateurs donnés (304)
+NOT_MODIFIED = object()
+
+API_HOST = "fortnite-api.com"
+PRICE_SITE_HOSTS = ("fortnite.gg", "fnbr.co", "www.google.com")
+# Serveur amont local (stub) : tous les sites derrière une seule adresse, pas de vrai quota
+UPSTREAM_HOST_LIMITS = (20.0, 20, 8)
+
+
+def _display_value(label: Any) -> str:
+    """displayValue d'un type / d'une rareté de l'API, 'N/A' si absent"""
+    return label.get('displayValue', 'N/A') if isinstance(label, dict) else 'N/A'
 
 
 class FortniteShopScraper:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        catalog: Optional[Any] = None,
+        price_cache_path: Optional[str] = None,
+        upstream_url: Optional[str] = None,
+        record_dir: Optional[str] = None,
+    ):
         """
         Initialise le scraper de la boutique Fortnite
         api_key: Optionnel pour FortniteAPI.io (recommandé pour plus de requêtes)
+        catalog: CosmeticsCatalog local utilisé pour enrichir les items (optionnel)
+        price_cache_path: base SQLite des prix trouvés en ligne, partagée par les workers
+            et conservée entre les redémarrages (None = en mémoire)
+        upstream_url: racine d'un serveur qui sert chaque site sous /<hôte>/
+            (benchmarks/fortnite_api_stub.py) au lieu des vrais sites (None)
+        record_dir: dossier où enregistrer les réponses amont pour les rejouer
+            (voir upstream_replay ; None = pas d'enregistrement)
         """
-        self.base_url = "https://fortnite-api.com/v2/shop/"
-        self.cosmetics_url = "https://fortnite-api.com/v2/cosmetics/br/"
+        root = upstream_url.rstrip('/') if upstream_url else None
+        api_base = f"{root}/{API_HOST}/v2" if root else f"https://{API_HOST}/v2"
+        self.base_url = f"{api_base}/shop/"
+        self.cosmetics_url = f"{api_base}/cosmetics/br/"
+        self.new_cosmetics_url = f"{api_base}/cosmetics/new"
         self.api_key = api_key
-        self.price_cache = {}  # Cache des prix recherchés
-        
-    def get_shop(self, language: str = "fr") -> Optional[Dict[str, Any]]:
+        self.catalog = catalog
+        recorder = ReplayStore(record_dir) if record_dir else None
+        # Connexions réutilisées par site, nouvelles tentatives, latences (voir stats())
+        self.http = PooledHTTP(recorder=recorder)
+        # ETag / Last-Modified de la dernière boutique reçue, par langue
+        self.shop_validators: Dict[str, Dict[str, str]] = {}
+        self.price_cache = PriceCache(price_cache_path)  # Cache des prix recherchés
+        # Recherches de prix parallèles et limitées par site
+        if root:
+            self.price_lookup = PriceLookup(
+                sources=default_sources(*(f"{root}/{host}" for host in PRICE_SITE_HOSTS)),
+                host_limits={urlsplit(root).netloc: UPSTREAM_HOST_LIMITS},
+                http=PooledHTTP(retries=1, recorder=recorder),
+            )
+        else:
+            self.price_lookup = PriceLookup(http=PooledHTTP(retries=1, recorder=recorder))
+        # Prix de vente calculés par version de boutique, un moteur par marge demandée
+        self._pricing: Dict[float, PricingEngine] = {}
+
+    def _get_api_data(self, url: str, language: str, timeout: int = 10) -> Optional[Any]:
+        """GET sur fortnite-api.com, retourne le champ data (None en cas d'erreur)"""
+        try:
+            headers = {}
+            if self.api_key:
+                headers['Authorization'] = self.api_key
+
+            response = self.http.get(url, headers=headers, params={'language': language}, timeout=timeout)
+            response.raise_for_status()
+
+            data = response.json()
+            if data.get('status') == 200:
+                return data.get('data')
+            print(f"Erreur API: {data.get('error', 'Erreur inconnue')}")
+            return None
+
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Erreur de connexion: {e}")
+            return None
+
+    def get_cosmetics(self, language: str = "fr") -> Optional[List[Dict[str, Any]]]:
+        """
+        Catalogue complet des cosmétiques BR (plusieurs dizaines de Mo) :
+        à télécharger rarement, voir services/cosmetics_catalog.py
+        """
+        return self._get_api_data(self.cosmetics_url, language, timeout=120)
+
+    def iter_cosmetics(self, language: str = "fr") -> Iterator[Dict[str, Any]]:
+        """
+        Même catalogue, lu cosmétique par cosmétique au fil de la réponse (voir json_stream) :
+        le document complet n'est jamais chargé. Lève une exception en cas d'erreur,
+        y compris en fin de flux si l'API répond autre chose que status 200.
+        """
+        headers = {}
+        if self.api_key:
+            headers['Authorization'] = self.api_key
+        with self.http.get(
+            self.cosmetics_url, headers=headers, params={'language': language}, timeout=120, stream=True
+        ) as response:
+            response.raise_for_status()
+            document = StreamedJSON(response.iter_content(chunk_size=64 * 1024), ('data',))
+            yield from document
+        if document.values.get('status') != 200:
+            raise ValueError(f"Erreur API: {document.values.get('error', 'Erreur inconnue')}")
+
+    def get_new_cosmetics(self, language: str = "fr") -> Optional[Dict[str, Any]]:
+        """Cosmétiques ajoutés à la dernière mise à jour du jeu, avec les hashes du catalogue"""
+        return self._get_api_data(self.new_cosmetics_url, language, timeout=30)
+        
+    def get_shop(
+        self,
+        language: str = "fr",
+        stream: bool = False,
+        validators: Optional[Dict[str, str]] = None,
+        compact: bool = False,
+    ) -> Optional[Dict[str, Any]]:
         """
         Récupère les données de la boutique actuelle
         language: Code langue (fr, en, es, etc.)
+        stream: lit data.entries au fil de la réponse au lieu de charger tout le document
+                (pic mémoire du refresh nettement plus bas, même résultat)
+        validators: {'etag', 'last_modified'} de la boutique déjà en cache ; si elle n'a
+                pas changé (304), retourne NOT_MODIFIED sans rien télécharger ni parser.
+                Ceux de la nouvelle réponse sont dans shop_validators[language].
+        compact: items en ShopItem (forme interne, voir shop_items) au lieu de dicts
+                simples ; réservé à FortniteAPIClient qui en construit le snapshot
         """
         try:
             headers = {}
             if self.api_key:
                 headers['Authorization'] = self.api_key
+            if validators:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
             
             params = {'language': language}
             
-            response = requests.get(self.base_url, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data['status'] == 200:
-                return self.parse_shop_data(data['data'])
+            if stream:
+                shop = self._get_shop_streamed(headers, params, language)
             else:
-                print(f"Erreur API: {data.get('error', 'Erreur inconnue')}")
-                return None
+                response = self.http.get(self.base_url, headers=headers, params=params, timeout=10)
+                if response.status_code == 304:
+                    return NOT_MODIFIED
+                response.raise_for_status()
+                self._remember_validators(language, response)
+                
+                data = response.json()
+                
+                if data['status'] == 200:
+                    shop = self.parse_shop_entries(data['data'].get('entries', []), data['data'])
+                else:
+                    print(f"Erreur API: {data.get('error', 'Erreur inconnue')}")
+                    shop = None
+
+            if shop is NOT_MODIFIED:
+                return shop
+            # Infos catalogue (set, série, vidéo...) lues en local, jamais par item en amont
+            if shop and self.catalog is not None and language == self.catalog.language:
+                self.catalog.enrich_items(shop['items'])
+            if shop and not compact:
+                shop['items'] = plain_items(shop['items'])
+            return shop
                 
         except requests.exceptions.RequestException as e:
             print(f"Erreur de connexion: {e}")
             return None
+
+    def _get_shop_streamed(
+        self, headers: Dict[str, str], params: Dict[str, str], language: str
+    ) -> Optional[Any]:
+        """Parse les entries une par une depuis le corps de la réponse (voir json_stream)"""
+        with self.http.get(self.base_url, headers=headers, params=params, timeout=10, stream=True) as response:
+            if response.status_code == 304:
+                return NOT_MODIFIED
+            response.raise_for_status()
+            self._remember_validators(language, response)
+            document = StreamedJSON(response.iter_content(chunk_size=64 * 1024), ('data', 'entries'))
+            shop_data: Dict[str, Any] = {}
+            try:
+                shop = self.parse_shop_entries(document, shop_data)
+            except ValueError as e:
+                print(f"Réponse boutique illisible: {e}")
+                return None
+
+        if document.values.get('status') != 200:
+            print(f"Erreur API: {document.values.get('error', 'Erreur inconnue')}")
+            return None
+        # Champs hors entries (date, vbuckIcon, hash) connus seulement en fin de flux
+        shop_data.update({k: v for k, v in document.values.get('data', {}).items()})
+        shop['date'] = shop_data.get('date', shop['date'])
+        shop['vbuckIcon'] = shop_data.get('vbuckIcon', '')
+        return shop
     
+    def _remember_validators(self, language: str, response: requests.Response) -> None:
+        validators = {
+            key: response.headers[header]
+            for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+            if response.headers.get(header)
+        }
+        if validators:
+            self.shop_validators[language] = validators
+        else:
+            self.shop_validators.pop(language, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Latences et compteurs par site amont, et compteurs du cache des prix"""
+        return {
+            'upstream': self.http.stats(),
+            'price_sites': self.price_lookup.http.stats(),
+            'price_cache': self.price_cache.stats(),
+        }
+
     def parse_shop_data(self, shop_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Parse et structure les données de la boutique
+        Parse et structure les données de la boutique (items en dicts simples)
         """
-        items = []
-        
         # Parcours des entrées de la boutique (structure API v2)
-        entries = shop_data.get('entries', [])
+        shop = self.parse_shop_entries(shop_data.get('entries', []), shop_data)
+        shop['items'] = plain_items(shop['items'])
+        return shop
+
+    def parse_shop_entries(self, entries: Iterable[Dict[str, Any]], shop_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parse les entries en une seule passe : entries peut être une liste ou un flux.
+        Sans 'entries' dans shop_data (mode flux), raw_data.entries reprend les mêmes
+        objets que les items (aucune copie).
+        """
+        items = []
         car_count = 0
+        kept_entries = None if 'entries' in shop_data else []
         
-        # Première passe : parser toutes les entries et créer un index des prix par item ID
-        # On garde le prix le plus fréquent pour chaque item (au cas où il apparaît dans plusieurs entries)
+        # Index des prix par item ID (entries à un seul item), construit pendant la passe :
+        # on garde le prix le plus fréquent pour chaque item (au cas où il apparaît dans plusieurs entries).
+        # parse_entry ne le consulte pas pendant le parsing, d'où la passe unique.
         item_price_index = {}  # {item_id: price}
         item_price_counts = {}  # {item_id: {price: count}}
         
         for entry in entries:
+            if kept_entries is not None:
+                kept_entries.append(entry)
             br_items = entry.get('brItems', [])
             final_price = entry.get('finalPrice', 0)
-            regular_price = entry.get('regularPrice', 0)
             # Si c'est une entry avec un seul item, indexer son prix
             if len(br_items) == 1 and final_price > 0:
                 item_id = br_items[0].get('id', '')
@@ -81,18 +265,19 @@ class FortniteShopScraper:
                     if final_price not in item_price_counts[item_id]:
                         item_price_counts[item_id][final_price] = 0
                     item_price_counts[item_id][final_price] += 1
+
+            parsed = self.parse_entry(entry, "Shop", item_price_index)
+            items.extend(parsed)
+            # Compter les items de voiture
+            car_count += sum(1 for item in parsed if item.get('vehicleId'))
         
         # Pour chaque item, prendre le prix le plus fréquent
         for item_id, price_counts in item_price_counts.items():
             most_common_price = max(price_counts.items(), key=lambda x: x[1])[0]
             item_price_index[item_id] = most_common_price
         
-        # Deuxième passe : parser les entries et utiliser l'index pour les prix des items de pack
-        for entry in entries:
-            parsed = self.parse_entry(entry, "Shop", item_price_index)
-            items.extend(parsed)
-            # Compter les items de voiture
-            car_count += sum(1 for item in parsed if item.get('vehicleId'))
+        if kept_entries is not None:
+            shop_data['entries'] = kept_entries
         
         print(f"📊 Total items parsés: {len(items)} (dont {car_count} items de voiture)")
         
@@ -104,9 +289,10 @@ class FortniteShopScraper:
             'raw_data': shop_data  # Garder les données brutes pour compatibilité
         }
     
-    def parse_entry(self, entry: Dict[str, Any], section: str, item_price_index: Dict[str, int] = None) -> List[Dict[str, Any]]:
+    def parse_entry(self, entry: Dict[str, Any], section: str, item_price_index: Dict[str, int] = None) -> List[ShopItem]:
         """
-        Parse une entrée de la boutique
+        Parse une entrée de la boutique en ShopItem (forme compacte, voir shop_items ;
+        se lit comme un dict et se sérialise avec les mêmes clés)
         """
         items = []
         
@@ -135,42 +321,10 @@ class FortniteShopScraper:
                 bundle_image = br_items[0].get('images', {}).get('featured') or br_items[0].get('images', {}).get('icon', '')
             
             # Préparer les items du pack pour la structure
-            pack_items = []
-            for br_item in br_items:
-                pack_items.append({
-                    'id': br_item.get('id', ''),
-                    'name': br_item.get('name', 'N/A'),
-                    'type': br_item.get('type', {}).get('displayValue', 'N/A') if isinstance(br_item.get('type'), dict) else 'N/A',
-                    'rarity': br_item.get('rarity', {}).get('displayValue', 'N/A') if isinstance(br_item.get('rarity'), dict) else 'N/A',
-                    'description': br_item.get('description', ''),
-                    'images': br_item.get('images', {})
-                })
+            pack_items = [self._pack_member(br_item) for br_item in br_items]
             
             # Créer l'item pack
-            pack_item = {
-                'section': section,
-                'name': bundle_name,
-                'description': f'Pack contenant {len(pack_items)} objet(s)',
-                'type': 'Pack',
-                'rarity': 'Pack',
-                'vbucks': final_price,
-                'regular_price': regular_price,
-                'id': entry.get('offerId', f'pack-{bundle_name.replace(" ", "-").lower()}'),
-                'giftable': entry.get('giftable', False),
-                'refundable': entry.get('refundable', False),
-                'inDate': entry.get('inDate', ''),
-                'outDate': entry.get('outDate', ''),
-                'images': {
-                    'icon': bundle_image,
-                    'featured': bundle_image,
-                    'small_icon': bundle_image
-                },
-                'layout': entry.get('layout', {}),
-                'entry': entry,
-                'is_bundle': True,
-                'bundle_items': pack_items,
-                'banner': entry.get('banner', {})
-            }
+            pack_item = self._pack_item(entry, section, bundle_name, bundle_image, pack_items)
             items.append(pack_item)
             return items  # Retourner seulement le pack
         
@@ -220,40 +374,23 @@ class FortniteShopScraper:
                         type_display = 'Autres'
                     
                     # Préparer les items secondaires pour la page détails
-                    related_items = []
-                    for sec_item in secondary_items:
-                        related_items.append({
-                            'id': sec_item.get('id', ''),
-                            'name': sec_item.get('name', 'N/A'),
-                            'type': sec_item.get('type', {}).get('displayValue', 'N/A') if isinstance(sec_item.get('type'), dict) else 'N/A',
-                            'rarity': sec_item.get('rarity', {}).get('displayValue', 'N/A') if isinstance(sec_item.get('rarity'), dict) else 'N/A',
-                            'description': sec_item.get('description', ''),
-                            'images': sec_item.get('images', {})
-                        })
+                    related_items = [self._pack_member(sec_item) for sec_item in secondary_items]
                     
-                    main_item_data = {
-                        'section': section,
-                        'name': item_name,
-                        'description': main_item.get('description', ''),
-                        'type': type_display,
-                        'rarity': main_item.get('rarity', {}).get('displayValue', 'N/A') if isinstance(main_item.get('rarity'), dict) else 'N/A',
-                        'vbucks': final_price,
-                        'regular_price': regular_price,
-                        'id': main_item.get('id', ''),
-                        'giftable': entry.get('giftable', False),
-                        'refundable': entry.get('refundable', False),
-                        'inDate': entry.get('inDate', ''),
-                        'outDate': entry.get('outDate', ''),
-                        'images': {
-                            'icon': main_item.get('images', {}).get('icon'),
-                            'featured': main_item.get('images', {}).get('featured'),
-                            'small_icon': main_item.get('images', {}).get('smallIcon')
-                        },
-                        'layout': entry.get('layout', {}),
-                        'entry': entry,
-                        'has_related_items': True,
-                        'related_items': related_items  # Items secondaires pour la page détails
-                    }
+                    main_images = main_item.get('images', {})
+                    main_item_data = ShopItem(
+                        section,
+                        item_name,
+                        main_item.get('description', ''),
+                        type_display,
+                        _display_value(main_item.get('rarity')),
+                        final_price,
+                        regular_price,
+                        main_item.get('id', ''),
+                        entry,
+                        ItemImages(main_images.get('icon'), main_images.get('featured'), main_images.get('smallIcon')),
+                    )
+                    main_item_data.has_related_items = True
+                    main_item_data.related_items = related_items  # Items secondaires pour la page détails
                     items.append(main_item_data)
                     return items
         
@@ -287,42 +424,10 @@ class FortniteShopScraper:
                 bundle_image = br_items[0].get('images', {}).get('featured') or br_items[0].get('images', {}).get('icon', '')
             
             # Préparer les items du pack pour la structure
-            pack_items = []
-            for br_item in br_items:
-                pack_items.append({
-                    'id': br_item.get('id', ''),
-                    'name': br_item.get('name', 'N/A'),
-                    'type': br_item.get('type', {}).get('displayValue', 'N/A'),
-                    'rarity': br_item.get('rarity', {}).get('displayValue', 'N/A'),
-                    'description': br_item.get('description', ''),
-                    'images': br_item.get('images', {})
-                })
+            pack_items = [self._pack_member(br_item) for br_item in br_items]
             
             # Créer l'item pack
-            pack_item = {
-                'section': section,
-                'name': bundle_name,
-                'description': f'Pack contenant {len(pack_items)} objet(s)',
-                'type': 'Pack',
-                'rarity': 'Pack',
-                'vbucks': final_price,
-                'regular_price': regular_price,
-                'id': entry.get('offerId', f'pack-{bundle_name.replace(" ", "-").lower()}'),
-                'giftable': entry.get('giftable', False),
-                'refundable': entry.get('refundable', False),
-                'inDate': entry.get('inDate', ''),
-                'outDate': entry.get('outDate', ''),
-                'images': {
-                    'icon': bundle_image,
-                    'featured': bundle_image,
-                    'small_icon': bundle_image
-                },
-                'layout': entry.get('layout', {}),
-                'entry': entry,
-                'is_bundle': True,
-                'bundle_items': pack_items,
-                'banner': entry.get('banner', {})
-            }
+            pack_item = self._pack_item(entry, section, bundle_name, bundle_image, pack_items)
             items.append(pack_item)
             
             # NE PAS ajouter les items individuels du pack comme items séparés
@@ -349,27 +454,19 @@ class FortniteShopScraper:
                 if not type_display or type_display == 'N/A' or type_display.strip() == '':
                     type_display = 'Autres'
                 
-                item_data = {
-                    'section': section,
-                    'name': item_name,
-                    'description': br_item.get('description', ''),
-                    'type': type_display,
-                    'rarity': br_item.get('rarity', {}).get('displayValue', 'N/A'),
-                    'vbucks': final_price,
-                    'regular_price': regular_price,
-                    'id': br_item.get('id', ''),
-                    'giftable': entry.get('giftable', False),
-                    'refundable': entry.get('refundable', False),
-                    'inDate': entry.get('inDate', ''),
-                    'outDate': entry.get('outDate', ''),
-                    'images': {
-                        'icon': br_item.get('images', {}).get('icon'),
-                        'featured': br_item.get('images', {}).get('featured'),
-                        'small_icon': br_item.get('images', {}).get('smallIcon')
-                    },
-                    'layout': entry.get('layout', {}),
-                    'entry': entry  # Garder l'entrée complète pour compatibilité
-                }
+                images = br_item.get('images', {})
+                item_data = ShopItem(
+                    section,
+                    item_name,
+                    br_item.get('description', ''),
+                    type_display,
+                    br_item.get('rarity', {}).get('displayValue', 'N/A'),
+                    final_price,
+                    regular_price,
+                    br_item.get('id', ''),
+                    entry,  # Garder l'entrée complète pour compatibilité
+                    ItemImages(images.get('icon'), images.get('featured'), images.get('smallIcon')),
+                )
                 items.append(item_data)
         
         # Les items de voiture sont dans 'cars'
@@ -394,32 +491,60 @@ class FortniteShopScraper:
             if not type_display or type_display == 'N/A' or type_display.strip() == '':
                 type_display = 'Autres'
             
-            item_data = {
-                'section': section,
-                'name': car_name,
-                'description': car_item.get('description', ''),
-                'type': type_display,
-                'rarity': car_item.get('rarity', {}).get('displayValue', 'N/A'),
-                'vbucks': final_price,
-                'regular_price': regular_price,
-                'id': car_item.get('id', '') or car_item.get('vehicleId', ''),
-                'giftable': entry.get('giftable', False),
-                'refundable': entry.get('refundable', False),
-                'inDate': entry.get('inDate', ''),
-                'outDate': entry.get('outDate', ''),
-                'images': {
-                    'icon': car_images.get('small') or car_images.get('large'),
-                    'featured': car_images.get('large') or car_images.get('small'),
-                    'small_icon': car_images.get('small')
-                },
-                'layout': entry.get('layout', {}),
-                'entry': entry,  # Garder l'entrée complète pour compatibilité
-                'vehicleId': car_item.get('vehicleId', '')  # ID spécifique aux véhicules
-            }
+            item_data = ShopItem(
+                section,
+                car_name,
+                car_item.get('description', ''),
+                type_display,
+                car_item.get('rarity', {}).get('displayValue', 'N/A'),
+                final_price,
+                regular_price,
+                car_item.get('id', '') or car_item.get('vehicleId', ''),
+                entry,  # Garder l'entrée complète pour compatibilité
+                ItemImages(
+                    car_images.get('small') or car_images.get('large'),
+                    car_images.get('large') or car_images.get('small'),
+                    car_images.get('small'),
+                ),
+            )
+            item_data.vehicle_id = car_item.get('vehicleId', '')  # ID spécifique aux véhicules
             items.append(item_data)
         
         return items
     
+    @staticmethod
+    def _pack_member(br_item: Dict[str, Any]) -> PackMember:
+        """Objet d'un pack ou objet lié, pour la page détails"""
+        return PackMember(
+            br_item.get('id', ''),
+            br_item.get('name', 'N/A'),
+            _display_value(br_item.get('type')),
+            _display_value(br_item.get('rarity')),
+            br_item.get('description', ''),
+            br_item.get('images', {}),
+        )
+
+    @staticmethod
+    def _pack_item(
+        entry: Dict[str, Any], section: str, bundle_name: str, bundle_image: str, pack_items: List[PackMember]
+    ) -> ShopItem:
+        pack_item = ShopItem(
+            section,
+            bundle_name,
+            f'Pack contenant {len(pack_items)} objet(s)',
+            'Pack',
+            'Pack',
+            entry.get('finalPrice', 0),
+            entry.get('regularPrice', 0),
+            entry.get('offerId', f'pack-{bundle_name.replace(" ", "-").lower()}'),
+            entry,
+            ItemImages(bundle_image, bundle_image, bundle_image),
+        )
+        pack_item.is_bundle = True
+        pack_item.bundle_items = pack_items
+        pack_item.banner = entry.get('banner', {})
+        return pack_item
+    
     def display_shop(self, shop_data: Optional[Dict[str, Any]]) -> None:
         """
         Affiche les items de la boutique de manière lisible
@@ -457,7 +582,7 @@ class FortniteShopScraper:
             
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(shop_data, f, indent=2, ensure_ascii=False)
+                json.dump(shop_data, f, indent=2, ensure_ascii=False, default=json_default)
             print(f"✅ Données sauvegardées dans {filename}")
         except Exception as e:
             print(f"❌ Erreur lors de la sauvegarde: {e}")
@@ -465,38 +590,44 @@ class FortniteShopScraper:
     def search_item_price_online(self, item_name: str, item_id: str, br_item: Dict[str, Any]) -> int:
         """
         Cherche le prix d'un item en ligne via recherche web réelle
+        (fortnite.gg, puis fnbr.co, puis Google ; estimation par rareté en dernier recours)
         """
-        # Vérifier le cache d'abord
-        cache_key = f"{item_id}_{item_name}"
-        if cache_key in self.price_cache:
-            return self.price_cache[cache_key]
-        
-        # Essayer plusieurs sources web (avec délais pour éviter les blocages)
-        price = None
-        
-        # 1. Essayer fortnite.gg (site populaire pour les prix Fortnite)
-        price = self._search_fortnite_gg(item_name, item_id)
-        if price:
-            self.price_cache[cache_key] = price
-            return price
-        
-        time.sleep(0.5)  # Délai entre les requêtes
-        
-        # 2. Essayer fnbr.co (autre site de référence)
-        price = self._search_fnbr_co(item_name, item_id)
-        if price:
-            self.price_cache[cache_key] = price
-            return price
-        
-        time.sleep(0.5)  # Délai entre les requêtes
-        
-        # 3. Essayer une recherche Google (en dernier car peut être bloqué)
-        price = self._search_google_price(item_name)
-        if price:
-            self.price_cache[cache_key] = price
-            return price
-        
-        # Si aucune recherche n'a fonctionné, utiliser l'estimation basée sur la rareté
+        return self.search_prices_online([(item_name, item_id, br_item)])[item_id].price
+
+    def search_prices_online(self, items: Iterable[Any]) -> Dict[str, PriceQuote]:
+        """
+        Prix de plusieurs items en une fois : items = (nom, id, br_item).
+        Le cache persistant répond d'abord (prix trouvés comme « introuvable ») ; le reste
+        est cherché en parallèle dans les limites de débit de chaque site (voir PriceLookup).
+        Retourne id -> PriceQuote ; estimated=True pour une estimation par rareté.
+        """
+        wanted = {
+            f"{item_id}_{item_name}": (item_name, item_id, br_item)
+            for item_name, item_id, br_item in items
+        }
+        cached = self.price_cache.get_many(wanted)
+        to_search = [key for key in wanted if key not in cached]
+
+        found = self.price_lookup.lookup_many(
+            (key, wanted[key][0], wanted[key][1]) for key in to_search
+        )
+        self.price_cache.put_many(
+            [(key, *(found[key] or (None, None))) for key in to_search]
+        )
+
+        quotes: Dict[str, PriceQuote] = {}
+        for key, (item_name, item_id, br_item) in wanted.items():
+            price, source = cached[key] if key in cached else (found[key] or (None, None))
+            if price is None:
+                # Si aucune recherche n'a fonctionné, utiliser l'estimation basée sur la rareté
+                quotes[item_id] = PriceQuote(self._estimate_price(br_item), ESTIMATE_SOURCE, True)
+            else:
+                quotes[item_id] = PriceQuote(price, source)
+        return quotes
+
+    @staticmethod
+    def _estimate_price(br_item: Dict[str, Any]) -> int:
+        """Prix estimé d'après la rareté et le type de l'item"""
         rarity_value = br_item.get('rarity', {}).get('value', '').lower()
         rarity_prices = {
             'common': 500,
@@ -521,136 +652,24 @@ class FortniteShopScraper:
         }
         
         multiplier = type_multipliers.get(item_type_value, 1.0)
-        estimated_price = int(base_price * multiplier)
-        
-        self.price_cache[cache_key] = estimated_price
-        return estimated_price
+        return int(base_price * multiplier)
     
+    def _search_source(self, source_name: str, item_name: str, item_id: str) -> Optional[int]:
+        """Interroge une seule source (dans ses limites de débit)"""
+        source = next(s for s in self.price_lookup.sources if s.name == source_name)
+        return self.price_lookup.query(source, item_name, item_id)
+
     def _search_fortnite_gg(self, item_name: str, item_id: str) -> Optional[int]:
         """Cherche le prix sur fortnite.gg"""
-        try:
-            # Construire l'URL de recherche
-            search_name = item_name.lower().replace(' ', '-')
-            url = f"https://fortnite.gg/items/{search_name}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=5, allow_redirects=True)
-            if response.status_code == 200:
-                content = response.text
-                
-                # Utiliser BeautifulSoup si disponible pour un meilleur parsing
-                if HAS_BS4:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    # Chercher dans les éléments de texte
-                    text_content = soup.get_text().lower()
-                else:
-                    text_content = content.lower()
-                
-                # Patterns communs: "vbucks", "v-bucks", prix suivis de "vb" ou "v-bucks"
-                patterns = [
-                    r'(\d+)\s*v-?bucks?',
-                    r'(\d+)\s*vb',
-                    r'price[:\s]+(\d+)',
-                    r'cost[:\s]+(\d+)',
-                    r'(\d+)\s*v-?b',
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, text_content)
-                    if matches:
-                        # Prendre le premier prix trouvé qui semble raisonnable (entre 200 et 5000)
-                        for match in matches:
-                            price = int(match)
-                            if 200 <= price <= 5000:
-                                return price
-        except Exception as e:
-            print(f"Erreur recherche fortnite.gg pour {item_name}: {e}")
-        
-        return None
+        return self._search_source("fortnite.gg", item_name, item_id)
     
     def _search_fnbr_co(self, item_name: str, item_id: str) -> Optional[int]:
         """Cherche le prix sur fnbr.co"""
-        try:
-            # fnbr.co utilise souvent l'ID de l'item
-            if item_id:
-                # Nettoyer l'ID pour l'URL
-                clean_id = item_id.lower().replace('_', '-')
-                url = f"https://fnbr.co/{clean_id}"
-            else:
-                search_name = item_name.lower().replace(' ', '-')
-                url = f"https://fnbr.co/search?q={quote_plus(item_name)}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=5, allow_redirects=True)
-            if response.status_code == 200:
-                content = response.text
-                
-                # Utiliser BeautifulSoup si disponible
-                if HAS_BS4:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    text_content = soup.get_text().lower()
-                else:
-                    text_content = content.lower()
-                
-                # Chercher les patterns de prix
-                patterns = [
-                    r'(\d+)\s*v-?bucks?',
-                    r'(\d+)\s*vb',
-                    r'price[:\s]+(\d+)',
-                    r'(\d+)\s*v-?b',
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, text_content)
-                    if matches:
-                        for match in matches:
-                            price = int(match)
-                            if 200 <= price <= 5000:
-                                return price
-        except Exception as e:
-            print(f"Erreur recherche fnbr.co pour {item_name}: {e}")
-        
-        return None
+        return self._search_source("fnbr.co", item_name, item_id)
     
     def _search_google_price(self, item_name: str) -> Optional[int]:
         """Cherche le prix via Google"""
-        try:
-            # Recherche Google pour "item_name fortnite price vbucks"
-            query = f"{item_name} fortnite price vbucks"
-            url = f"https://www.google.com/search?q={quote_plus(query)}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                content = response.text
-                # Chercher les patterns de prix dans les résultats Google
-                patterns = [
-                    r'(\d+)\s*v-?bucks?',
-                    r'(\d+)\s*vb',
-                    r'(\d+)\s*v-?b',
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, content, re.IGNORECASE)
-                    if matches:
-                        # Prendre le prix le plus fréquent ou le premier raisonnable
-                        for match in matches:
-                            price = int(match)
-                            if 200 <= price <= 5000:
-                                return price
-        except Exception as e:
-            print(f"Erreur recherche Google pour {item_name}: {e}")
-        
-        return None
+        return self._search_source("google", item_name, "")
     
     def calculate_selling_price(self, vbucks: int, margin: float = 0.50) -> float:
         """
@@ -658,30 +677,28 @@ class FortniteShopScraper:
         vbucks: Nombre de V-Bucks
         margin: Marge bénéficiaire (0.50 = 50%)
         """
-        cost_per_vbuck = 0.00357  # Basé sur 13500 V-Bucks pour 48.26€
-        cost = vbucks * cost_per_vbuck
+        cost = vbucks * DEFAULT_COST_PER_VBUCK
         selling_price = cost * (1 + margin)
         return round(selling_price, 2)
     
     def get_items_with_prices(self, shop_data: Optional[Dict[str, Any]], margin: float = 0.50) -> Optional[List[Dict[str, Any]]]:
         """
-        Retourne les items avec tes prix de vente calculés
+        Retourne les items avec tes prix de vente calculés (et price_xof, le prix en FCFA).
+        Toute la boutique est calculée en un passage, une seule fois par version.
+        Paliers de marge, taux de change, arrondi : voir services/pricing.py
         """
         if not shop_data:
             return None
-        
-        items_with_prices = []
-        for item in shop_data['items']:
-            item_copy = item.copy()
-            item_copy['your_cost'] = round(item['vbucks'] * 0.00357, 2)
-            item_copy['selling_price'] = self.calculate_selling_price(item['vbucks'], margin)
-            item_copy['profit'] = round(item_copy['selling_price'] - item_copy['your_cost'], 2)
-            items_with_prices.append(item_copy)
-        
-        return items_with_prices
+
+        engine = self._pricing.get(margin)
+        if engine is None:
+            engine = self._pricing[margin] = PricingEngine(PricingConfig(default_margin=margin))
+        priced = engine.price_items(shop_data['items'], version=shop_data.get('version'))
+        return priced.annotate(shop_data['items'])
 
 
-# EXEMPLE D'UTILISATION
+# EXEMPLE D'UTILISATION (imports relatifs : lancer depuis backend/ en module)
+#   python -m services.fortnite_shop_scraper
 if __name__ == "__main__":
     import os
     # Initialise le scraper (ajoute ta clé API si tu en as une)
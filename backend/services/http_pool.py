@@ -0,0 +1,139 @@
+"""
+Sessions HTTP partagées par site : connexions keep-alive réutilisées, nouvelles
+tentatives avec backoff (erreurs réseau, 429, 5xx) et latences mesurées par site.
+
+Toutes les requêtes du scraper (fortnite-api.com, sites de prix) passent par ici :
+plus de poignée de main TCP + TLS à chaque appel. Avec un recorder (upstream_replay),
+les réponses 200 sont aussi enregistrées pour être rejouées hors ligne.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Latences gardées par site pour les percentiles
+LATENCY_WINDOW = 200
+
+
+class HostStats:
+    """Compteurs et latences récentes (ms) d'un site."""
+
+    __slots__ = ("requests", "errors", "not_modified", "total_ms", "recent", "_lock")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.total_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms: float, status: Optional[int]) -> None:
+        with self._lock:
+            self.requests += 1
+            if status is None or status >= 400:
+                self.errors += 1
+            elif status == 304:
+                self.not_modified += 1
+            self.total_ms += elapsed_ms
+            self.recent.append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self.recent)
+            requests_count = self.requests
+            summary: Dict[str, Any] = {
+                "requests": requests_count,
+                "errors": self.errors,
+                "not_modified": self.not_modified,
+                "avg_ms": round(self.total_ms / requests_count, 1) if requests_count else None,
+            }
+        for name, quantile in (("p50_ms", 0.5), ("p95_ms", 0.95)):
+            position = min(len(recent) - 1, int(quantile * len(recent)))
+            summary[name] = round(recent[position], 1) if recent else None
+        return summary
+
+
+class PooledHTTP:
+    """
+    get(url, ...) comme requests.get, mais sur une Session par site (pool de
+    connexions, Retry). La latence mesurée va jusqu'aux en-têtes de la réponse
+    (corps compris hors stream=True), nouvelles tentatives incluses.
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff_factor: float = 0.5,
+        pool_maxsize: int = 8,
+        user_agent: str = USER_AGENT,
+        recorder: Optional[Any] = None,
+    ) -> None:
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.user_agent = user_agent
+        # ReplayStore (ou tout objet avec record_response) ; None = pas d'enregistrement
+        self.recorder = recorder
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                retry = Retry(
+                    total=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=("GET", "HEAD"),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry
+                )
+                session = requests.Session()
+                session.headers["User-Agent"] = self.user_agent
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._stats.setdefault(host, HostStats())
+            return session
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        start = time.perf_counter()
+        status: Optional[int] = None
+        try:
+            response = session.get(url, **kwargs)
+            status = response.status_code
+        finally:
+            self._stats[host].record((time.perf_counter() - start) * 1000, status)
+        if self.recorder is not None and status == 200:
+            self.recorder.record_response(response)
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """site -> requêtes, erreurs, 304, latence moyenne / p50 / p95 (ms)."""
+        with self._lock:
+            hosts = dict(self._stats)
+        return {host: stats.summary() for host, stats in sorted(hosts.items())}
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+__all__ = ["HostStats", "PooledHTTP"]
@@ -0,0 +1,202 @@
+"""
+Proxy d'images des cosmétiques (/api/img/<item_id>/<variant>) avec cache disque LRU.
+
+Au refresh, les URLs du CDN fortnite-api.com sont remplacées dans le snapshot par
+des URLs du proxy (les originales restent dans image_sources). Au premier appel,
+l'image est téléchargée puis gardée sur disque ; les miniatures sont générées
+une seule fois en WebP si Pillow est installé.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import requests
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:  # Miniatures servies à la taille d'origine
+    HAS_PIL = False
+
+# Miniatures : variante -> (images sources par ordre de préférence, côté max en px)
+THUMBNAILS: Dict[str, Tuple[Tuple[str, ...], int]] = {
+    "thumb": (("featured", "icon", "small_icon", "smallIcon"), 256),
+    "thumb_small": (("icon", "small_icon", "smallIcon", "featured"), 128),
+}
+WEBP_QUALITY = 80
+# Un hit ne réécrit le mtime (ordre LRU) qu'au plus une fois par heure
+TOUCH_INTERVAL_SECONDS = 3600
+
+
+def _proxy_url(base: str, item_id: str, variant: str, source: str) -> str:
+    version = hashlib.sha1(source.encode("utf-8")).hexdigest()[:10]
+    return f"{base.rstrip('/')}/{quote(item_id, safe='')}/{variant}?v={version}"
+
+
+def _rewrite_item(item: Dict[str, Any], base: str) -> None:
+    images = item.get("images")
+    if not item.get("id") or not isinstance(images, Mapping):
+        return
+    sources = item.get("image_sources") or {
+        key: url for key, url in images.items() if isinstance(url, str) and url.startswith("http")
+    }
+    if not sources:
+        return
+    item["image_sources"] = sources
+    rewritten = images.copy()
+    for key, url in sources.items():
+        rewritten[key] = _proxy_url(base, item["id"], key, url)
+    # Miniature de la grille boutique (thumb_small reste disponible à la demande)
+    keys, _ = THUMBNAILS["thumb"]
+    source = next((sources[k] for k in keys if sources.get(k)), None)
+    if source:
+        rewritten["thumb"] = _proxy_url(base, item["id"], "thumb", source)
+    item["images"] = rewritten
+
+
+def rewrite_image_urls(data: Dict[str, Any], base: str) -> None:
+    """
+    Remplace les URLs d'images des items (et des objets de packs / liés) par celles
+    du proxy et ajoute images.thumb ; ?v= change avec l'URL d'origine (cache immutable).
+    """
+    for item in data.get("items", []):
+        _rewrite_item(item, base)
+        for member in item.get("bundle_items", []) + item.get("related_items", []):
+            _rewrite_item(member, base)
+
+
+def find_image_source(
+    items: Sequence[Dict[str, Any]], id_index: Dict[str, int], item_id: str, variant: str
+) -> Optional[Tuple[str, Optional[int]]]:
+    """(URL d'origine, taille de miniature ou None) pour item_id / variant, None si inconnu."""
+    position = id_index.get(item_id)
+    if position is None:
+        return None
+    item = items[position]
+    if item.get("id") != item_id:
+        # Objet d'un pack / objet lié : l'index pointe vers l'item parent
+        members = item.get("bundle_items", []) + item.get("related_items", [])
+        item = next((m for m in members if m.get("id") == item_id), item)
+
+    sources = item.get("image_sources") or item.get("images") or {}
+    if variant in THUMBNAILS:
+        keys, size = THUMBNAILS[variant]
+        source = next((sources[k] for k in keys if sources.get(k)), None)
+        return (source, size) if source else None
+    source = sources.get(variant)
+    if isinstance(source, str) and source.startswith("http"):
+        return source, None
+    return None
+
+
+class ImageCache:
+    """Cache disque borné (LRU par mtime), partagé par les workers de la machine."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        fetch: Optional[Callable[[str], Tuple[bytes, Optional[str]]]] = None,
+        timeout: int = 15,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        # fetch(url) -> (octets, content-type) ; remplaçable par un faux CDN local
+        self._fetch = fetch or self._fetch_upstream
+        self._session = requests.Session()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._size_lock = threading.Lock()
+
+    def get(self, url: str, size: Optional[int] = None) -> Tuple[bytes, str, str]:
+        """(octets, content-type, ETag) de l'image, téléchargée et redimensionnée au premier appel."""
+        key = hashlib.sha1(f"{url}|{size or ''}".encode("utf-8")).hexdigest()
+        cached = self._read(key)
+        if cached is not None:
+            return cached
+
+        # Un seul téléchargement par image et par worker
+        with self._lock_for(key):
+            cached = self._read(key)
+            if cached is not None:
+                return cached
+            body, content_type = self._fetch(url)
+            if size and HAS_PIL:
+                body, content_type = self._thumbnail(body, size), "image/webp"
+            content_type = content_type or "application/octet-stream"
+            self._write(key, content_type, body)
+            return body, content_type, key[:20]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _read(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        # Fichier = content-type sur la première ligne, puis les octets de l'image
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content_type = f.readline().strip().decode("ascii")
+                body = f.read()
+            if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+        except (OSError, UnicodeDecodeError):
+            return None
+        return body, content_type, key[:20]
+
+    def _write(self, key: str, content_type: str, body: bytes) -> None:
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+            f.write(content_type.encode("ascii", "replace") + b"\n")
+            f.write(body)
+        os.replace(f.name, self._path(key))
+        with self._size_lock:
+            self._size += len(body)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Supprime les images les moins récemment servies jusqu'à 90 % du budget."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        self._size = sum(entry.stat().st_size for entry in entries)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self._size <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except OSError:
+                continue
+
+    def _fetch_upstream(self, url: str) -> Tuple[bytes, Optional[str]]:
+        response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content, response.headers.get("Content-Type", "").split(";")[0] or None
+
+    @staticmethod
+    def _thumbnail(body: bytes, size: int) -> bytes:
+        with Image.open(io.BytesIO(body)) as image:
+            image.thumbnail((size, size))
+            output = io.BytesIO()
+            image.save(output, format="WEBP", quality=WEBP_QUALITY)
+        return output.getvalue()
+
+
+__all__ = ["HAS_PIL", "ImageCache", "THUMBNAILS", "find_image_source", "rewrite_image_urls"]
@@ -0,0 +1,205 @@
+"""
+Cache persistant des prix V-Bucks trouvés en ligne (SQLite partagé par les workers).
+
+Chaque prix garde sa source et expire selon elle ; « introuvable partout » est aussi
+mis en cache (plus brièvement) pour ne pas re-scraper à chaque appel. Les estimations
+par rareté ne sont jamais stockées : elles sont recalculées et marquées estimated.
+Taille bornée (LRU sur la date de dernière lecture) et compteurs hits / misses.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    key TEXT PRIMARY KEY,
+    price INTEGER,
+    source TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_by_last_used ON prices (last_used);
+
+CREATE TABLE IF NOT EXISTS price_cache_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Durée de validité d'un prix selon le site qui l'a donné
+DEFAULT_SOURCE_TTLS: Dict[str, int] = {
+    "fortnite.gg": 7 * 24 * 3600,
+    "fnbr.co": 7 * 24 * 3600,
+    "google": 2 * 24 * 3600,
+}
+DEFAULT_TTL_SECONDS = 3 * 24 * 3600
+# « Introuvable » : nouvel essai en ligne après ce délai
+NEGATIVE_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+ESTIMATE_SOURCE = "estimate"
+# Limite SQLite des paramètres d'une requête
+_MAX_PARAMS = 500
+
+COUNTERS = ("hits", "negative_hits", "misses", "stores", "evictions")
+
+
+class PriceQuote(NamedTuple):
+    """Prix d'un item ; estimated=True si c'est l'estimation par rareté, pas un prix trouvé."""
+
+    price: int
+    source: str
+    estimated: bool = False
+
+
+class CachedPrice(NamedTuple):
+    """Entrée valide du cache ; price None = aucune source n'a trouvé de prix."""
+
+    price: Optional[int]
+    source: Optional[str]
+
+
+class PriceCache:
+    """prices(key -> prix, source, expiration) ; path None = base en mémoire (process)."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        source_ttls: Optional[Dict[str, int]] = None,
+        negative_ttl_seconds: int = NEGATIVE_TTL_SECONDS,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.source_ttls = dict(DEFAULT_SOURCE_TTLS, **(source_ttls or {}))
+        self.negative_ttl = negative_ttl_seconds
+        self._local = threading.local()
+        self._keeper: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._uri = path
+        else:
+            # Base mémoire partagée entre les threads, vivante tant que _keeper l'est
+            self._uri = f"file:price-cache-{id(self)}?mode=memory&cache=shared"
+            self._keeper = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._uri, timeout=30, uri=self._keeper is not None)
+            if self.path:
+                conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, counts: Dict[str, int]) -> None:
+        conn.executemany(
+            "INSERT INTO price_cache_stats (name, value) VALUES (?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            [(name, n) for name, n in counts.items() if n],
+        )
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[CachedPrice]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CachedPrice]:
+        """Entrées encore valides parmi keys (les absentes comptent comme misses)."""
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        found: Dict[str, CachedPrice] = {}
+        conn = self._connect()
+        for start in range(0, len(unique), _MAX_PARAMS):
+            chunk = unique[start : start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            for key, price, source in conn.execute(
+                f"SELECT key, price, source FROM prices"
+                f" WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*chunk, now),
+            ):
+                found[key] = CachedPrice(price, source)
+
+        negative = sum(1 for entry in found.values() if entry.price is None)
+        with conn:
+            for start in range(0, len(found), _MAX_PARAMS):
+                chunk = list(found)[start : start + _MAX_PARAMS]
+                conn.execute(
+                    f"UPDATE prices SET last_used = ?"
+                    f" WHERE key IN ({','.join('?' * len(chunk))})",
+                    (now, *chunk),
+                )
+            self._count(
+                conn,
+                {
+                    "hits": len(found) - negative,
+                    "negative_hits": negative,
+                    "misses": len(unique) - len(found),
+                },
+            )
+        return found
+
+    def put_many(self, entries: Sequence[Tuple[str, Optional[int], Optional[str]]]) -> None:
+        """
+        Enregistre (clé, prix, source) ; prix None = introuvable (cache négatif).
+        Une estimation n'est pas un prix trouvé : elle est refusée.
+        """
+        now = time.time()
+        rows = []
+        for key, price, source in entries:
+            if source == ESTIMATE_SOURCE:
+                raise ValueError("Les estimations ne sont pas mises en cache")
+            if price is None:
+                ttl = self.negative_ttl
+            else:
+                ttl = self.source_ttls.get(source or "", DEFAULT_TTL_SECONDS)
+            rows.append((key, price, source, now, now + ttl, now))
+        if not rows:
+            return
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices"
+                " (key, price, source, fetched_at, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            evicted = self._evict(conn, now)
+            self._count(conn, {"stores": len(rows), "evictions": evicted})
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """Au-delà de max_entries : retire les expirées puis les moins lues, jusqu'à 90 %."""
+        count = conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+        if count <= self.max_entries:
+            return 0
+        removed = conn.execute("DELETE FROM prices WHERE expires_at <= ?", (now,)).rowcount
+        excess = count - removed - int(self.max_entries * 0.9)
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM prices WHERE key IN"
+                " (SELECT key FROM prices ORDER BY last_used LIMIT ?)",
+                (excess,),
+            ).rowcount
+        return removed
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, int]:
+        """Compteurs cumulés (tous workers) et nombre d'entrées."""
+        conn = self._connect()
+        stats = {name: 0 for name in COUNTERS}
+        stats.update(conn.execute("SELECT name, value FROM price_cache_stats").fetchall())
+        stats["entries"] = conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+        return stats
+
+
+__all__ = ["CachedPrice", "ESTIMATE_SOURCE", "PriceCache", "PriceQuote"]
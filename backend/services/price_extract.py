@@ -0,0 +1,186 @@
+"""
+Extraction du prix V-Bucks d'une page HTML (fortnite.gg, fnbr.co, résultats Google).
+
+Motifs compilés une fois, texte visible seulement (script / style ignorés) et arrêt
+dès le premier prix sûr. Le texte vient du parseur le plus rapide disponible :
+selectolax, puis lxml, sinon un retrait des balises par expressions régulières.
+Si une page les met en échec (balise script non fermée, erreur du parseur), le
+html.parser de la bibliothèque standard prend le relais, lu par morceaux pour
+s'arrêter avant la fin de la page quand le prix est trouvé tôt.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, Optional, Pattern, Sequence, Tuple
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Prix plausibles pour un objet de la boutique
+MIN_PRICE, MAX_PRICE = 200, 5000
+
+# Par ordre de confiance : le premier (« 1500 V-Bucks ») suffit à s'arrêter
+SITE_PATTERNS = (
+    r"(\d+)\s*v-?bucks?",
+    r"(\d+)\s*vb",
+    r"price[:\s]+(\d+)",
+    r"cost[:\s]+(\d+)",
+    r"(\d+)\s*v-?b",
+)
+FNBR_PATTERNS = SITE_PATTERNS[:3] + SITE_PATTERNS[4:]
+SEARCH_PATTERNS = (
+    r"(\d+)\s*v-?bucks?",
+    r"(\d+)\s*vb",
+    r"(\d+)\s*v-?b",
+)
+
+_HIDDEN_TAGS = ("script", "style")
+_HIDDEN_RE = re.compile(
+    r"<(script|style)\b[^>]*>.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL
+)
+_UNCLOSED_RE = re.compile(r"<(?:script|style)\b|<!--", re.IGNORECASE)
+_TAG_RE = re.compile(r"<(?:\"[^\"]*\"|'[^']*'|[^'\">])*>")
+# Taille des morceaux lus par html.parser entre deux recherches du prix
+STREAM_CHUNK_CHARS = 16 * 1024
+
+
+class _TextCollector(HTMLParser):
+    """Texte visible d'une page (comme BeautifulSoup.get_text, sans construire d'arbre)."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._hidden = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in _HIDDEN_TAGS:
+            self._hidden += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _HIDDEN_TAGS and self._hidden:
+            self._hidden -= 1
+
+    def handle_data(self, data: str) -> None:
+        if not self._hidden:
+            self.parts.append(data)
+
+
+def _selectolax_text(content: str) -> str:
+    tree = SelectolaxParser(content)
+    tree.strip_tags(list(_HIDDEN_TAGS))
+    return tree.root.text(separator="") if tree.root else ""
+
+
+def _lxml_text(content: str) -> str:
+    root = lxml.html.fromstring(content)
+    etree.strip_elements(root, *_HIDDEN_TAGS, with_tail=False)
+    return root.text_content()
+
+
+def _regex_text(content: str) -> str:
+    visible = _HIDDEN_RE.sub("", content)
+    if _UNCLOSED_RE.search(visible):
+        raise ValueError("Balise script / style ou commentaire non fermé")
+    return html.unescape(_TAG_RE.sub("", visible))
+
+
+# Extraction du texte complet d'un coup, de la plus rapide à la plus simple
+TEXT_BACKENDS: Dict[str, Callable[[str], str]] = {}
+if HAS_SELECTOLAX:
+    TEXT_BACKENDS["selectolax"] = _selectolax_text
+if HAS_LXML:
+    TEXT_BACKENDS["lxml"] = _lxml_text
+TEXT_BACKENDS["regex"] = _regex_text
+DEFAULT_BACKEND = next(iter(TEXT_BACKENDS))
+
+
+class PriceExtractor:
+    """
+    extract(page) -> premier prix plausible, en respectant l'ordre des motifs
+    (même résultat que l'ancienne recherche sur BeautifulSoup.get_text()).
+    html=False : la page est cherchée telle quelle (résultats Google).
+    """
+
+    def __init__(
+        self,
+        patterns: Sequence[str] = SITE_PATTERNS,
+        html: bool = True,
+        backend: Optional[str] = None,
+    ) -> None:
+        self.patterns: Tuple[Pattern[str], ...] = tuple(
+            re.compile(pattern, re.IGNORECASE) for pattern in patterns
+        )
+        self.html = html
+        self.backend = backend or DEFAULT_BACKEND
+        if self.backend != "html.parser" and self.backend not in TEXT_BACKENDS:
+            raise ValueError(f"Parseur HTML indisponible: {self.backend}")
+
+    def extract(self, content: str) -> Optional[int]:
+        if not content:
+            return None
+        if not self.html:
+            return self._scan(content)
+        if self.backend != "html.parser":
+            try:
+                return self._scan(TEXT_BACKENDS[self.backend](content))
+            except Exception:
+                pass  # Page que l'extraction rapide refuse : html.parser en secours
+        return self._extract_streaming(content)
+
+    def _scan(self, text: str) -> Optional[int]:
+        for pattern in self.patterns:
+            for match in pattern.finditer(text):
+                price = int(match.group(1))
+                if MIN_PRICE <= price <= MAX_PRICE:
+                    return price
+        return None
+
+    def _confident(self, text: str) -> Optional[int]:
+        """Premier prix du motif le plus sûr, s'il est entièrement lu (pas en bout de texte)."""
+        for match in self.patterns[0].finditer(text):
+            if match.end() >= len(text):
+                return None
+            price = int(match.group(1))
+            if MIN_PRICE <= price <= MAX_PRICE:
+                return price
+        return None
+
+    def _extract_streaming(self, content: str) -> Optional[int]:
+        collector = _TextCollector()
+        text = ""
+        for start in range(0, len(content), STREAM_CHUNK_CHARS):
+            collector.feed(content[start : start + STREAM_CHUNK_CHARS])
+            if collector.parts:
+                text += "".join(collector.parts)
+                collector.parts.clear()
+                price = self._confident(text)
+                if price is not None:
+                    return price
+        collector.close()
+        text += "".join(collector.parts)
+        return self._scan(text)
+
+
+__all__ = [
+    "DEFAULT_BACKEND",
+    "FNBR_PATTERNS",
+    "HAS_LXML",
+    "HAS_SELECTOLAX",
+    "MAX_PRICE",
+    "MIN_PRICE",
+    "PriceExtractor",
+    "SEARCH_PATTERNS",
+    "SITE_PATTERNS",
+    "TEXT_BACKENDS",
+]
@@ -0,0 +1,297 @@
+"""
+Recherche de prix V-Bucks en ligne, en parallèle et sous limites de débit.
+
+Chaque site (fortnite.gg, fnbr.co, Google) a son seau de jetons (requêtes/s) et
+son plafond de requêtes simultanées. Pour un item, la source suivante est lancée
+dès que la précédente échoue ou tarde plus de hedge_delay (requête « couverte ») ;
+la première réponse valable gagne. Le temps total dépend des limites par site,
+pas du nombre d'items.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote_plus, urlsplit
+
+from .http_pool import PooledHTTP
+from .price_extract import FNBR_PATTERNS, SEARCH_PATTERNS, SITE_PATTERNS, PriceExtractor
+
+# Limites par site : (requêtes par seconde, rafale, requêtes simultanées)
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[float, int, int]] = {
+    "fortnite.gg": (4.0, 4, 4),
+    "fnbr.co": (4.0, 4, 4),
+    "www.google.com": (0.5, 1, 1),
+}
+FALLBACK_HOST_LIMITS = (2.0, 2, 2)
+HEDGE_POLL_SECONDS = 0.1
+
+
+class PriceSource:
+    """Un site de prix : URL à interroger pour un item et extraction du prix."""
+
+    __slots__ = ("name", "url_for", "extractor")
+
+    def __init__(
+        self,
+        name: str,
+        url_for: Callable[[str, str], Optional[str]],
+        patterns: Sequence[str] = SITE_PATTERNS,
+        html: bool = True,
+    ) -> None:
+        self.name = name
+        self.url_for = url_for
+        self.extractor = PriceExtractor(patterns, html=html)
+
+    def parse(self, content: str) -> Optional[int]:
+        return self.extractor.extract(content)
+
+
+def default_sources(
+    fortnite_gg: str = "https://fortnite.gg",
+    fnbr: str = "https://fnbr.co",
+    google: str = "https://www.google.com",
+) -> List[PriceSource]:
+    """Sources par ordre de préférence ; les URLs de base sont remplaçables (serveur local)."""
+
+    def fortnite_gg_url(name: str, item_id: str) -> str:
+        return f"{fortnite_gg}/items/{name.lower().replace(' ', '-')}"
+
+    def fnbr_url(name: str, item_id: str) -> str:
+        # fnbr.co utilise souvent l'ID de l'item
+        if item_id:
+            return f"{fnbr}/{item_id.lower().replace('_', '-')}"
+        return f"{fnbr}/search?q={quote_plus(name)}"
+
+    def google_url(name: str, item_id: str) -> str:
+        return f"{google}/search?q={quote_plus(f'{name} fortnite price vbucks')}"
+
+    return [
+        PriceSource("fortnite.gg", fortnite_gg_url),
+        PriceSource("fnbr.co", fnbr_url, FNBR_PATTERNS),
+        PriceSource("google", google_url, SEARCH_PATTERNS, html=False),
+    ]
+
+
+class TokenBucket:
+    """Seau de jetons : rate jetons/s, au plus burst d'avance. acquire() bloque si vide."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+class HostLimiter:
+    """Débit (seau de jetons) et concurrence (sémaphore) pour un site."""
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+
+class PriceLookup:
+    """
+    Prix de nombreux items en parallèle. fetch(url) -> texte ou None est remplaçable ;
+    par défaut les sessions par site de http (connexions réutilisées).
+    """
+
+    def __init__(
+        self,
+        sources: Optional[Sequence[PriceSource]] = None,
+        host_limits: Optional[Dict[str, Tuple[float, int, int]]] = None,
+        hedge_delay: float = 0.75,
+        timeout: float = 5,
+        fetch: Optional[Callable[[str], Optional[str]]] = None,
+        http: Optional[PooledHTTP] = None,
+    ) -> None:
+        self.sources = list(sources or default_sources())
+        self.host_limits = dict(DEFAULT_HOST_LIMITS, **(host_limits or {}))
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self._fetch = fetch or self._fetch_with_session
+        # Une seule tentative de plus : le débit est déjà réglé par les seaux de jetons
+        self.http = http or PooledHTTP(retries=1)
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._limiters_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+    def _limits(self, host: str) -> Tuple[float, int, int]:
+        return self.host_limits.get(host, FALLBACK_HOST_LIMITS)
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        with self._limiters_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(*self._limits(host))
+                self._limiters[host] = limiter
+            return limiter
+
+    def _fetch_with_session(self, url: str) -> Optional[str]:
+        response = self.http.get(url, timeout=self.timeout, allow_redirects=True)
+        return response.text if response.status_code == 200 else None
+
+    def query(
+        self,
+        source: PriceSource,
+        name: str,
+        item_id: str,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Optional[int]:
+        """
+        Une requête vers une source, dans les limites de son site ; None si pas de prix.
+        on_start est appelé quand la requête part vraiment (après l'attente des limites).
+        """
+        url = source.url_for(name, item_id)
+        if not url:
+            return None
+        limiter = self._limiter(url)
+        with limiter.slots:
+            limiter.bucket.acquire()
+            if on_start:
+                on_start()
+            try:
+                content = self._fetch(url)
+            except Exception as exc:
+                print(f"Erreur recherche {source.name} pour {name}: {exc}")
+                return None
+        if not content:
+            return None
+        # Une page inattendue compte comme un échec de cette source : on passe à la suivante
+        try:
+            return source.parse(content)
+        except Exception as exc:
+            print(f"Page {source.name} illisible pour {name}: {exc}")
+            return None
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def lookup(self, name: str, item_id: str) -> Optional[Tuple[int, str]]:
+        return self.lookup_many([(item_id, name, item_id)])[item_id]
+
+    def lookup_many(
+        self, items: Iterable[Tuple[Hashable, str, str]]
+    ) -> Dict[Hashable, Optional[Tuple[int, str]]]:
+        """
+        items : (clé, nom, id). Retourne clé -> (prix, nom de la source), None si aucune
+        source n'a trouvé de prix.
+        Une seule boucle de coordination : lance les sources, couvre les lentes, garde le premier prix.
+        Chaque site a sa file et ses threads (autant que sa limite de concurrence) : un site
+        saturé ne retarde pas les requêtes vers les autres.
+        """
+        pending = {key: (name, item_id) for key, name, item_id in items}
+        results: Dict[Hashable, Optional[Tuple[int, str]]] = {key: None for key in pending}
+        if not pending:
+            return results
+
+        # clé -> index de la prochaine source, échéance de couverture. L'échéance ne court
+        # qu'une fois la requête partie : attendre son tour sous la limite d'un site n'est
+        # pas une lenteur de la source, et couvrir alors saturerait les sites de secours.
+        next_source: Dict[Hashable, int] = {}
+        hedge_at: Dict[Hashable, float] = {}
+        in_flight: Dict[Future, Tuple[Hashable, str]] = {}
+        running: Dict[Hashable, int] = {}
+
+        pools: Dict[str, ThreadPoolExecutor] = {}
+
+        def pool_for(url: str) -> ThreadPoolExecutor:
+            host = urlsplit(url).netloc
+            if host not in pools:
+                pools[host] = ThreadPoolExecutor(
+                    max_workers=self._limits(host)[2], thread_name_prefix=f"price-{host}"
+                )
+            return pools[host]
+
+        try:
+
+            def launch(key: Hashable) -> None:
+                index = next_source.get(key, 0)
+                if index >= len(self.sources):
+                    return
+                source = self.sources[index]
+                name, item_id = pending[key]
+                url = source.url_for(name, item_id)
+                hedge_at.pop(key, None)
+
+                def started() -> None:
+                    hedge_at[key] = time.monotonic() + self.hedge_delay
+
+                if url:
+                    future = pool_for(url).submit(self.query, source, name, item_id, started)
+                else:
+                    future = Future()
+                    future.set_result(None)
+                in_flight[future] = (key, source.name)
+                running[key] = running.get(key, 0) + 1
+                next_source[key] = index + 1
+
+            for key in pending:
+                launch(key)
+
+            while in_flight:
+                now = time.monotonic()
+                deadlines = [at for k, at in list(hedge_at.items()) if k in pending]
+                # Réveil régulier : des requêtes en file peuvent partir entre-temps
+                timeout = min([HEDGE_POLL_SECONDS] + [max(0.0, at - now) for at in deadlines])
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    key, source_name = in_flight.pop(future)
+                    running[key] -= 1
+                    if key not in pending:
+                        continue  # déjà résolu par une autre source
+                    price = future.result()
+                    if price:
+                        results[key] = (price, source_name)
+                        del pending[key]
+                        hedge_at.pop(key, None)
+                    elif running[key] == 0:
+                        launch(key)  # échec : source suivante tout de suite
+
+                # Couverture : source lente, on lance la suivante sans annuler la première
+                now = time.monotonic()
+                for key in [k for k, at in list(hedge_at.items()) if at <= now and k in pending]:
+                    if next_source.get(key, 0) < len(self.sources):
+                        launch(key)
+                    else:
+                        del hedge_at[key]
+
+                # Requêtes pas encore démarrées devenues inutiles
+                for future, (key, _) in list(in_flight.items()):
+                    if key not in pending and future.cancel():
+                        del in_flight[future]
+                if not pending:
+                    break
+        finally:
+            # Les requêtes perdantes déjà parties finissent en arrière-plan sans nous retenir
+            for pool in pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+
+__all__ = [
+    "DEFAULT_HOST_LIMITS",
+    "HostLimiter",
+    "PriceLookup",
+    "PriceSource",
+    "TokenBucket",
+    "default_sources",
+]
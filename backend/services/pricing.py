@@ -0,0 +1,254 @@
+"""
+Prix de vente de toute une boutique en un passage (colonnes array, pas de dict par item).
+
+Coût = V-Bucks × coût unitaire (devise d'achat), marge selon des paliers (tranche de
+V-Bucks, rareté, type ; le premier palier qui correspond gagne), conversion en FCFA
+(XOF) et arrondi à un montant vendable. Le résultat est gardé par version de la
+boutique : tant qu'elle ne change pas, rien n'est recalculé.
+
+Les valeurs par défaut reproduisent le prix affiché par le site
+(V-Bucks × 0,00357 × 1,5 en USD, × 580, arrondi à la centaine).
+"""
+
+import hashlib
+import json
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .shop_items import columns
+
+DEFAULT_COST_PER_VBUCK = 0.00357  # Basé sur 13500 V-Bucks pour 48.26
+DEFAULT_COST_CURRENCY = "USD"
+DEFAULT_MARGIN = 0.50
+# Unités de la devise d'achat -> FCFA
+DEFAULT_FX_TO_XOF: Dict[str, float] = {"XOF": 1.0, "USD": 580.0, "EUR": 655.957}
+DEFAULT_ROUNDING_STEP = 100
+ROUNDING_MODES = ("nearest", "up", "down")
+# Versions gardées (une par langue servie suffit en pratique)
+CACHED_VERSIONS = 8
+
+Matcher = Union[None, str, Sequence[str]]
+
+
+class PricingRule(NamedTuple):
+    """Palier de marge ; un critère None accepte tout. max_vbucks est exclu."""
+
+    margin: float
+    min_vbucks: int = 0
+    max_vbucks: Optional[int] = None
+    rarity: Matcher = None
+    item_type: Matcher = None
+
+
+class PricingConfig(NamedTuple):
+    cost_per_vbuck: float = DEFAULT_COST_PER_VBUCK
+    cost_currency: str = DEFAULT_COST_CURRENCY
+    default_margin: float = DEFAULT_MARGIN
+    rules: Tuple[PricingRule, ...] = ()
+    fx_to_xof: Mapping[str, float] = DEFAULT_FX_TO_XOF
+    rounding_step: int = DEFAULT_ROUNDING_STEP
+    rounding: str = "nearest"
+
+    def fingerprint(self) -> str:
+        encoded = json.dumps(
+            [
+                self.cost_per_vbuck,
+                self.cost_currency,
+                self.default_margin,
+                [list(rule) for rule in self.rules],
+                sorted(self.fx_to_xof.items()),
+                self.rounding_step,
+                self.rounding,
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_rules(raw: Union[str, Sequence[Mapping[str, Any]], None]) -> Tuple[PricingRule, ...]:
+    """
+    Paliers depuis du JSON (variable d'environnement), ex.
+    [{"rarity": ["légendaire", "legendary"], "margin": 0.6}, {"min_vbucks": 2000, "margin": 0.4}]
+    """
+    if not raw:
+        return ()
+    entries = json.loads(raw) if isinstance(raw, str) else raw
+    rules = []
+    for entry in entries:
+        if "margin" not in entry:
+            raise ValueError(f"Palier sans marge: {entry}")
+        rules.append(
+            PricingRule(
+                margin=float(entry["margin"]),
+                min_vbucks=int(entry.get("min_vbucks", 0)),
+                max_vbucks=(
+                    int(entry["max_vbucks"]) if entry.get("max_vbucks") is not None else None
+                ),
+                rarity=entry.get("rarity"),
+                item_type=entry.get("type", entry.get("item_type")),
+            )
+        )
+    return tuple(rules)
+
+
+def _normalized(matcher: Matcher) -> Optional[frozenset]:
+    if matcher is None:
+        return None
+    values = [matcher] if isinstance(matcher, str) else matcher
+    return frozenset(value.strip().lower() for value in values)
+
+
+class PricedShop:
+    """Prix d'une boutique, en colonnes alignées sur ses items."""
+
+    __slots__ = (
+        "version", "ids", "vbucks", "margin", "cost", "selling_price", "profit", "price_xof"
+    )
+
+    def __init__(
+        self,
+        version: Optional[str],
+        ids: List[str],
+        vbucks: array,
+        margin: array,
+        cost: array,
+        selling_price: array,
+        profit: array,
+        price_xof: array,
+    ) -> None:
+        self.version = version
+        self.ids = ids
+        self.vbucks = vbucks
+        self.margin = margin
+        self.cost = cost
+        self.selling_price = selling_price
+        self.profit = profit
+        self.price_xof = price_xof
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def xof_by_id(self) -> Dict[str, int]:
+        return dict(zip(self.ids, self.price_xof))
+
+    def annotate(self, items: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copies des items avec your_cost / selling_price / profit (devise d'achat) et price_xof."""
+        annotated = []
+        for n, item in enumerate(items):
+            item_copy = item.copy()
+            item_copy["your_cost"] = round(self.cost[n], 2)
+            item_copy["selling_price"] = round(self.selling_price[n], 2)
+            item_copy["profit"] = round(self.profit[n], 2)
+            item_copy["price_xof"] = self.price_xof[n]
+            annotated.append(item_copy)
+        return annotated
+
+
+class PricingEngine:
+    """Calcule les prix d'une boutique ; un résultat par (version, configuration)."""
+
+    def __init__(self, config: Optional[PricingConfig] = None) -> None:
+        self.config = config or PricingConfig()
+        if self.config.rounding not in ROUNDING_MODES:
+            raise ValueError(f"Arrondi inconnu: {self.config.rounding}")
+        if self.config.cost_currency not in self.config.fx_to_xof:
+            raise ValueError(f"Taux de change manquant: {self.config.cost_currency} -> XOF")
+        if not self.config.fx_to_xof[self.config.cost_currency] > 0:
+            raise ValueError(f"Taux de change invalide: {self.config.cost_currency} -> XOF")
+        self._rules = [
+            (
+                rule.margin,
+                rule.min_vbucks,
+                rule.max_vbucks,
+                _normalized(rule.rarity),
+                _normalized(rule.item_type),
+            )
+            for rule in self.config.rules
+        ]
+        self._fingerprint = self.config.fingerprint()
+        self._cache: "OrderedDict[Tuple[str, str], PricedShop]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def price_snapshot(self, snapshot: Any) -> PricedShop:
+        """Prix d'un ShopSnapshot (ou de tout objet avec version et items), mis en cache."""
+        return self.price_items(snapshot.items, version=snapshot.version)
+
+    def price_items(
+        self, items: Sequence[Dict[str, Any]], version: Optional[str] = None
+    ) -> PricedShop:
+        if version is None:
+            return self._compute(items, None)
+        key = (version, self._fingerprint)
+        with self._lock:
+            priced = self._cache.get(key)
+            if priced is not None:
+                self._cache.move_to_end(key)
+                return priced
+        priced = self._compute(items, version)
+        with self._lock:
+            self._cache[key] = priced
+            while len(self._cache) > CACHED_VERSIONS:
+                self._cache.popitem(last=False)
+        return priced
+
+    # ------------------------------------------------------------------
+    # Calcul
+    # ------------------------------------------------------------------
+    def _margins(self, vbucks: array, rarities: List[str], types: List[str]) -> array:
+        """Marge de chaque item : paliers appliqués du dernier au premier (le premier gagne)."""
+        margins = array("d", [self.config.default_margin]) * len(vbucks)
+        for margin, low, high, rarity_set, type_set in reversed(self._rules):
+            for n, value in enumerate(vbucks):
+                if value < low or (high is not None and value >= high):
+                    continue
+                if rarity_set is not None and rarities[n] not in rarity_set:
+                    continue
+                if type_set is not None and types[n] not in type_set:
+                    continue
+                margins[n] = margin
+        return margins
+
+    def _round(self, amounts: array) -> array:
+        step = self.config.rounding_step
+        if step <= 1:
+            return array("q", (int(math.floor(a + 0.5)) for a in amounts))
+        if self.config.rounding == "up":
+            # Marge epsilon : 29000.000000004 ne doit pas devenir 29100
+            return array("q", (int(math.ceil(a / step - 1e-9)) * step for a in amounts))
+        if self.config.rounding == "down":
+            return array("q", (int(math.floor(a / step + 1e-9)) * step for a in amounts))
+        # Au plus proche, demi vers le haut (comme Math.round côté site)
+        return array("q", (int(math.floor(a / step + 0.5)) * step for a in amounts))
+
+    def _compute(self, items: Sequence[Dict[str, Any]], version: Optional[str]) -> PricedShop:
+        config = self.config
+        raw_ids, raw_vbucks, raw_rarities, raw_types = columns(items, "id", "vbucks", "rarity", "type")
+        ids = [value or "" for value in raw_ids]
+        vbucks = array("q", (int(value or 0) for value in raw_vbucks))
+        # Peu de valeurs distinctes (internées) : une mise en minuscules par valeur
+        lowered: Dict[Any, str] = {}
+        for value in set(raw_rarities) | set(raw_types):
+            lowered[value] = str(value or "").lower()
+        rarities = [lowered[value] for value in raw_rarities]
+        types = [lowered[value] for value in raw_types]
+
+        margins = self._margins(vbucks, rarities, types)
+        unit = config.cost_per_vbuck
+        fx = config.fx_to_xof[config.cost_currency]
+        cost = array("d", (value * unit for value in vbucks))
+        selling = array("d", (c * (1 + m) for c, m in zip(cost, margins)))
+        profit = array("d", (s - c for s, c in zip(selling, cost)))
+        price_xof = self._round(array("d", (s * fx for s in selling)))
+        return PricedShop(version, ids, vbucks, margins, cost, selling, profit, price_xof)
+
+
+__all__ = [
+    "PricedShop",
+    "PricingConfig",
+    "PricingEngine",
+    "PricingRule",
+    "parse_rules",
+]
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from .shop_history import diff_digests, digest_items
+
+# Versions précédentes gardées pour /api/shop/changes?since=
+DEFAULT_KEEP_VERSIONS = 10
+
+
+def item_fingerprints(items: Sequence[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    """clé d'item -> [digest, vbucks], dans l'ordre de la boutique."""
+    return {
+        key: [digest, item.get("vbucks")]
+        for key, (digest, item) in digest_items(items).items()
+    }
+
+
+def version_entry(data: Mapping[str, Any]) -> Dict[str, Any]:
+    """Empreinte compacte d'une version : clé d'item -> [digest, vbucks]."""
+    return {
+        "version": data.get("version"),
+        "last_updated": data.get("last_updated"),
+        "items": item_fingerprints(data.get("items", [])),
+    }
+
+
+def append_version(
+    log: Sequence[Dict[str, Any]], data: Mapping[str, Any], keep: int
+) -> List[Dict[str, Any]]:
+    """Journal des versions (plus ancienne en tête) avec data en dernier, limité à keep + 1."""
+    entries = [entry for entry in log if entry.get("version") != data.get("version")]
+    entries.append(version_entry(data))
+    return entries[-(keep + 1):]
+
+
+def diff_payload(
+    since: Mapping[str, Any], current: Mapping[str, Any], items: Sequence[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Changements entre une ancienne version et la courante (entrées de version_entry).
+    updated contient tout item modifié, y compris ceux de price_changed, pour que le
+    client puisse simplement remplacer ses copies ; removed ne contient que les clés.
+    Les clés de current suivent l'ordre de items : seuls les items ajoutés / modifiés
+    sont lus (un snapshot mmap n'est pas décodé en entier).
+    """
+    old = since["items"]
+    new = current["items"]
+    added, removed, updated = diff_digests(
+        {key: value[0] for key, value in old.items()},
+        {key: value[0] for key, value in new.items()},
+    )
+    positions = {key: n for n, key in enumerate(new)}
+    return {
+        "since": since["version"],
+        "version": current["version"],
+        "last_updated": current.get("last_updated"),
+        "added": [items[positions[key]] for key in added],
+        "updated": [items[positions[key]] for key in updated],
+        "removed": removed,
+        "price_changed": [
+            {"id": key, "old_vbucks": old[key][1], "vbucks": new[key][1]}
+            for key in updated
+            if old[key][1] != new[key][1]
+        ],
+    }
+
+
+def previous_entries(
+    log: Sequence[Dict[str, Any]], version: Optional[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    version -> entrée du journal pour chaque version jusqu'à version (comprise).
+    Vide si version n'est pas dans le journal : pas de diff depuis une version plus récente.
+    """
+    entries: Dict[str, Dict[str, Any]] = {}
+    for entry in log:
+        if entry.get("version"):
+            entries[entry["version"]] = entry
+        if entry.get("version") == version:
+            return entries
+    return {}
+
+
+__all__ = [
+    "DEFAULT_KEEP_VERSIONS",
+    "append_version",
+    "diff_payload",
+    "item_fingerprints",
+    "previous_entries",
+    "version_entry",
+]
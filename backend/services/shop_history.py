@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .shop_items import json_default
+
+# Archive append-only : un item n'est stocké qu'une fois par contenu distinct
+# (item_blobs), chaque snapshot ne garde que ses différences avec le précédent
+# (changes) et l'ordre de ses ids. Les index (item_id, snapshot_id) et shop_date
+# répondent aux requêtes sans rejouer l'historique.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL UNIQUE,
+    shop_date TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    item_ids BLOB NOT NULL,
+    meta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_date ON snapshots (shop_date);
+
+CREATE TABLE IF NOT EXISTS item_blobs (
+    digest TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS changes (
+    snapshot_id INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    old_vbucks INTEGER,
+    vbucks INTEGER,
+    PRIMARY KEY (snapshot_id, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS changes_by_item ON changes (item_id, snapshot_id);
+
+CREATE TABLE IF NOT EXISTS current_items (
+    item_id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    vbucks INTEGER
+) WITHOUT ROWID;
+"""
+
+ADDED, REMOVED, UPDATED = "added", "removed", "updated"
+
+
+def _dump(payload: Any) -> bytes:
+    return json.dumps(
+        payload, ensure_ascii=False, separators=(",", ":"), default=json_default
+    ).encode("utf-8")
+
+
+def item_key(item: Mapping[str, Any]) -> str:
+    """Identité d'un item d'une version à l'autre (id, offerId pour les packs)."""
+    return str(item.get("id") or item.get("name") or "")
+
+
+def item_digest(item: Mapping[str, Any]) -> str:
+    return hashlib.sha1(_dump(item)).hexdigest()[:20]
+
+
+def digest_items(items: Iterable[Mapping[str, Any]]) -> Dict[str, Tuple[str, Mapping[str, Any]]]:
+    """clé -> (digest, item), dans l'ordre de la boutique. Un doublon reçoit le suffixe #n."""
+    keyed: Dict[str, Tuple[str, Mapping[str, Any]]] = {}
+    for item in items:
+        key = base = item_key(item)
+        n = 1
+        while key in keyed:
+            n += 1
+            key = f"{base}#{n}"
+        keyed[key] = (item_digest(item), item)
+    return keyed
+
+
+def diff_digests(
+    old: Mapping[str, str], new: Mapping[str, str]
+) -> Tuple[List[str], List[str], List[str]]:
+    """(ajoutés, retirés, modifiés) entre deux boutiques décrites par clé -> digest."""
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    updated = [key for key in new if key in old and old[key] != new[key]]
+    return added, removed, updated
+
+
+def _vbucks(item: Mapping[str, Any]) -> Optional[int]:
+    value = item.get("vbucks")
+    return int(value) if value is not None else None
+
+
+def _shop_date(data: Mapping[str, Any]) -> str:
+    """Jour de boutique (YYYY-MM-DD) : date de la rotation, sinon date de capture."""
+    date = data.get("date") or data.get("last_updated") or datetime.now(timezone.utc).isoformat()
+    return str(date)[:10]
+
+
+class ShopHistory:
+    """
+    Historique local des boutiques (SQLite), alimenté à chaque refresh.
+    record() est idempotent : une version déjà archivée n'est pas réécrite.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Une connexion par thread (sqlite3 ne partage pas les connexions entre threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+    def record(self, data: Mapping[str, Any]) -> bool:
+        """
+        Archive un snapshot de boutique (forme get_shop) s'il est nouveau.
+        Retourne False si cette version était déjà archivée.
+        """
+        version = data.get("version")
+        if not version:
+            raise ValueError("Snapshot sans version")
+
+        keyed = digest_items(data.get("items", []))
+        meta = {k: v for k, v in data.items() if k not in ("items", "raw_data")}
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM snapshots WHERE version = ?", (version,)).fetchone():
+                return False
+
+            previous = {
+                row["item_id"]: (row["digest"], row["vbucks"])
+                for row in conn.execute("SELECT item_id, digest, vbucks FROM current_items")
+            }
+            added, removed, updated = diff_digests(
+                {key: digest for key, (digest, _) in previous.items()},
+                {key: digest for key, (digest, _) in keyed.items()},
+            )
+
+            cursor = conn.execute(
+                "INSERT INTO snapshots (version, shop_date, captured_at, item_count, item_ids, meta)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    version,
+                    _shop_date(data),
+                    data.get("last_updated") or datetime.now(timezone.utc).isoformat(),
+                    len(keyed),
+                    zlib.compress(_dump(list(keyed))),
+                    json.dumps(meta, ensure_ascii=False),
+                ),
+            )
+            snapshot_id = cursor.lastrowid
+
+            rows = []
+            for key in added + updated:
+                digest, item = keyed[key]
+                conn.execute(
+                    "INSERT OR IGNORE INTO item_blobs (digest, body) VALUES (?, ?)",
+                    (digest, zlib.compress(_dump(item))),
+                )
+                old_vbucks = previous[key][1] if key in previous else None
+                kind = UPDATED if key in previous else ADDED
+                rows.append((snapshot_id, key, kind, digest, old_vbucks, _vbucks(item)))
+            for key in removed:
+                digest, old_vbucks = previous[key]
+                rows.append((snapshot_id, key, REMOVED, digest, old_vbucks, None))
+            conn.executemany(
+                "INSERT INTO changes (snapshot_id, item_id, kind, digest, old_vbucks, vbucks)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+            conn.executemany("DELETE FROM current_items WHERE item_id = ?", [(k,) for k in removed])
+            conn.executemany(
+                "INSERT OR REPLACE INTO current_items (item_id, digest, vbucks) VALUES (?, ?, ?)",
+                [(key, keyed[key][0], _vbucks(keyed[key][1])) for key in added + updated],
+            )
+        return True
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+    def _item(self, digest: str) -> Dict[str, Any]:
+        row = self._connect().execute(
+            "SELECT body FROM item_blobs WHERE digest = ?", (digest,)
+        ).fetchone()
+        return json.loads(zlib.decompress(row["body"])) if row else {}
+
+    def _snapshot_info(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "version": row["version"],
+            "shop_date": row["shop_date"],
+            "captured_at": row["captured_at"],
+            "total_items": row["item_count"],
+        }
+
+    def _date_before(self, snapshot_id: int) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT shop_date FROM snapshots WHERE id < ? ORDER BY id DESC LIMIT 1",
+            (snapshot_id,),
+        ).fetchone()
+        return row["shop_date"] if row else None
+
+    def item_history(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Passages d'un item en boutique (du plus récent au plus ancien) avec leur prix,
+        et s'il y est encore. None si l'item n'a jamais été archivé.
+        """
+        rows = self._connect().execute(
+            "SELECT c.kind, c.digest, c.vbucks, c.old_vbucks, c.snapshot_id, s.shop_date"
+            " FROM changes c JOIN snapshots s ON s.id = c.snapshot_id"
+            " WHERE c.item_id = ? ORDER BY c.snapshot_id",
+            (item_id,),
+        ).fetchall()
+        if not rows:
+            return None
+
+        appearances: List[Dict[str, Any]] = []
+        for row in rows:
+            if row["kind"] == ADDED:
+                appearances.append(
+                    {"first_seen": row["shop_date"], "last_seen": None, "vbucks": row["vbucks"]}
+                )
+            elif row["kind"] == UPDATED and appearances:
+                appearances[-1]["vbucks"] = row["vbucks"]
+            elif row["kind"] == REMOVED and appearances:
+                appearances[-1]["last_seen"] = self._date_before(row["snapshot_id"])
+
+        last = rows[-1]
+        in_shop = last["kind"] != REMOVED
+        if in_shop:
+            appearances[-1]["last_seen"] = self.latest_date()
+        return {
+            "item_id": item_id,
+            "item": self._item(last["digest"]),
+            "in_shop": in_shop,
+            "last_seen": appearances[-1]["last_seen"],
+            "vbucks": last["vbucks"] if in_shop else last["old_vbucks"],
+            "appearances": appearances[::-1],
+        }
+
+    def latest_date(self) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT shop_date FROM snapshots ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        return row["shop_date"] if row else None
+
+    def changes_on(self, date: str) -> List[Dict[str, Any]]:
+        """Ajouts / retraits / modifications de chaque snapshot archivé le jour date (YYYY-MM-DD)."""
+        conn = self._connect()
+        result = []
+        for snapshot in conn.execute(
+            "SELECT * FROM snapshots WHERE shop_date = ? ORDER BY id", (date,)
+        ).fetchall():
+            entry = self._snapshot_info(snapshot)
+            entry.update({ADDED: [], REMOVED: [], UPDATED: []})
+            for row in conn.execute(
+                "SELECT item_id, kind, digest, old_vbucks, vbucks FROM changes WHERE snapshot_id = ?",
+                (snapshot["id"],),
+            ):
+                entry[row["kind"]].append(
+                    {
+                        "id": row["item_id"],
+                        "name": self._item(row["digest"]).get("name"),
+                        "old_vbucks": row["old_vbucks"],
+                        "vbucks": row["vbucks"],
+                    }
+                )
+            result.append(entry)
+        return result
+
+    def snapshot(self, version: str) -> Optional[Dict[str, Any]]:
+        """Reconstruit un snapshot archivé (sans raw_data) à partir de ses deltas."""
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM snapshots WHERE version = ?", (version,)).fetchone()
+        if row is None:
+            return None
+
+        items: List[Dict[str, Any]] = []
+        for key in json.loads(zlib.decompress(row["item_ids"])):
+            change = conn.execute(
+                "SELECT digest FROM changes WHERE item_id = ? AND snapshot_id <= ?"
+                " ORDER BY snapshot_id DESC LIMIT 1",
+                (key, row["id"]),
+            ).fetchone()
+            if change is not None:
+                items.append(self._item(change["digest"]))
+
+        data = json.loads(row["meta"])
+        data["items"] = items
+        return data
+
+    def versions(self, limit: int = 30) -> Sequence[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT * FROM snapshots ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._snapshot_info(row) for row in rows]
+
+
+__all__ = [
+    "ShopHistory",
+    "diff_digests",
+    "digest_items",
+    "item_digest",
+    "item_key",
+]
+
+
+if __name__ == "__main__":
+    # Import manuel d'anciens snapshots, dans l'ordre chronologique :
+    # python -m services.shop_history data/shop_history.db services/fortnite_shop.json ...
+    import sys
+
+    from .fortnite_api import FortniteAPIClient
+
+    history = ShopHistory(sys.argv[1])
+    for path in sys.argv[2:]:
+        with open(path, "r", encoding="utf-8") as f:
+            shop = json.load(f)
+        shop.setdefault("version", FortniteAPIClient.compute_version(shop))
+        status = "archivé" if history.record(shop) else "déjà présent"
+        print(f"{path}: {status} ({shop['version']})")
@@ -0,0 +1,226 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .shop_items import columns
+
+# Paramètres qui font passer /api/shop en mode liste (filtre / tri / pagination)
+LIST_PARAMS = (
+    "type",
+    "rarity",
+    "min_vbucks",
+    "max_vbucks",
+    "has_related_items",
+    "sort",
+    "cursor",
+    "limit",
+)
+SORT_KEYS = ("price", "name", "outDate")
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class QueryError(ValueError):
+    """Paramètre de filtre / tri / pagination invalide."""
+
+
+def build_id_index(items: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Index identifiant -> position de l'item dans le snapshot.
+
+    Couvre l'id de l'item (offerId pour les packs), l'offerId de l'entrée,
+    le vehicleId des voitures et les ids des objets contenus dans un pack
+    (bundle_items) ou rattachés à une tenue (related_items) : ceux-ci pointent
+    vers l'item parent, qui les embarque. Les noms servent de dernier recours,
+    comme dans shop-item.js. En cas de doublon, le premier item gagne.
+    """
+    primary: Dict[str, int] = {}
+    secondary: Dict[str, int] = {}
+    by_name: Dict[str, int] = {}
+
+    fields = columns(items, "id", "vehicleId", "entry", "bundle_items", "related_items", "name")
+    for position, (item_id, vehicle_id, entry, bundle, related, name) in enumerate(zip(*fields)):
+        for key in (item_id, vehicle_id):
+            if key:
+                primary.setdefault(key, position)
+
+        offer_id = entry.get("offerId") if isinstance(entry, dict) else None
+        if offer_id:
+            secondary.setdefault(offer_id, position)
+        for member in (bundle or []) + (related or []):
+            if member.get("id"):
+                secondary.setdefault(member["id"], position)
+
+        if name:
+            by_name.setdefault(name, position)
+
+    index = by_name
+    index.update(secondary)
+    index.update(primary)
+    return index
+
+
+def _normalize(value: Any) -> str:
+    return str(value or "").strip().casefold()
+
+
+def _parse_int(args: Mapping[str, str], name: str) -> Optional[int]:
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} doit être un entier")
+
+
+def parse_list_query(args: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Lit les paramètres de liste d'une requête ; None si aucun n'est présent
+    (réponse complète habituelle). type et rarity acceptent plusieurs valeurs
+    séparées par des virgules ; sort accepte un '-' pour l'ordre décroissant.
+    """
+    if not any(name in args for name in LIST_PARAMS):
+        return None
+
+    query: Dict[str, Any] = {}
+    for name in ("type", "rarity"):
+        values = sorted({_normalize(v) for v in args.get(name, "").split(",") if v.strip()})
+        if values:
+            query[name] = values
+
+    query["min_vbucks"] = _parse_int(args, "min_vbucks")
+    query["max_vbucks"] = _parse_int(args, "max_vbucks")
+
+    related = args.get("has_related_items")
+    if related not in (None, ""):
+        if related.lower() not in ("1", "0", "true", "false"):
+            raise QueryError("has_related_items doit valoir 1 ou 0")
+        query["has_related_items"] = related.lower() in ("1", "true")
+
+    sort = args.get("sort") or None
+    if sort and sort.lstrip("-") not in SORT_KEYS:
+        raise QueryError(f"sort doit être parmi: {', '.join(SORT_KEYS)} (préfixe - pour décroissant)")
+    query["sort"] = sort
+
+    limit = _parse_int(args, "limit")
+    if limit is None:
+        limit = DEFAULT_LIMIT
+    if not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"limit doit être entre 1 et {MAX_LIMIT}")
+    query["limit"] = limit
+    query["cursor"] = args.get("cursor") or None
+    return query
+
+
+def query_key(query: Dict[str, Any]) -> str:
+    """Clé canonique d'une requête (mémoïsation des pages par snapshot)."""
+    return json.dumps(query, sort_keys=True, separators=(",", ":"))
+
+
+def encode_cursor(version: Optional[str], offset: int) -> str:
+    raw = json.dumps({"v": version, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, version: Optional[str]) -> int:
+    """Offset du curseur ; refusé s'il date d'une autre version de la boutique."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded))
+        offset = int(decoded["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise QueryError("cursor invalide")
+    if decoded.get("v") != version or offset < 0:
+        raise QueryError("cursor expiré : la boutique a changé, recommencer sans cursor")
+    return offset
+
+
+class ShopIndexes:
+    """
+    Index secondaires d'un snapshot, construits une seule fois :
+    type / rareté -> positions, positions triées par prix, nom et outDate.
+    """
+
+    def __init__(self, items: Sequence[Dict[str, Any]]) -> None:
+        self.size = len(items)
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_rarity: Dict[str, List[int]] = {}
+
+        types, rarities, related, vbucks, raw_names, raw_out_dates = columns(
+            items, "type", "rarity", "has_related_items", "vbucks", "name", "outDate"
+        )
+        # Type / rareté internés (shop_items) : une normalisation par valeur distincte
+        labels: Dict[Any, str] = {}
+        for position, (item_type, rarity) in enumerate(zip(types, rarities)):
+            for value, index in ((item_type, self.by_type), (rarity, self.by_rarity)):
+                label = labels.get(value)
+                if label is None:
+                    label = labels[value] = _normalize(value)
+                index.setdefault(label, []).append(position)
+        self.with_related: List[int] = [p for p, value in enumerate(related) if value]
+        prices: List[int] = [int(value or 0) for value in vbucks]
+        names: List[str] = [_normalize(value) for value in raw_names]
+        out_dates: List[str] = [value or "" for value in raw_out_dates]
+
+        self.price_order = sorted(range(self.size), key=prices.__getitem__)
+        # Tableau trié parallèle à price_order : bornes de prix par bisect
+        self.sorted_prices = [prices[p] for p in self.price_order]
+        self.orders = {
+            "price": self.price_order,
+            "name": sorted(range(self.size), key=names.__getitem__),
+            "outDate": sorted(range(self.size), key=out_dates.__getitem__),
+        }
+
+    def select(self, query: Dict[str, Any]) -> List[int]:
+        """Positions des items correspondant au filtre, dans l'ordre demandé."""
+        candidates: Optional[set] = None
+
+        def restrict(positions: Iterable[int]) -> None:
+            nonlocal candidates
+            positions = set(positions)
+            candidates = positions if candidates is None else candidates & positions
+
+        for name, index in (("type", self.by_type), ("rarity", self.by_rarity)):
+            if query.get(name):
+                restrict(p for value in query[name] for p in index.get(value, ()))
+
+        low, high = query.get("min_vbucks"), query.get("max_vbucks")
+        if low is not None or high is not None:
+            start = bisect_left(self.sorted_prices, low) if low is not None else 0
+            end = bisect_right(self.sorted_prices, high) if high is not None else self.size
+            restrict(self.price_order[start:end])
+
+        related = query.get("has_related_items")
+        if related is not None:
+            with_related = set(self.with_related)
+            if related:
+                restrict(with_related)
+            else:
+                restrict(p for p in range(self.size) if p not in with_related)
+
+        sort = query.get("sort")
+        if sort:
+            order: Sequence[int] = self.orders[sort.lstrip("-")]
+            if sort.startswith("-"):
+                order = order[::-1]
+        else:
+            order = range(self.size)
+
+        if candidates is None:
+            return list(order)
+        return [p for p in order if p in candidates]
+
+
+__all__ = [
+    "LIST_PARAMS",
+    "QueryError",
+    "ShopIndexes",
+    "build_id_index",
+    "decode_cursor",
+    "encode_cursor",
+    "parse_list_query",
+    "query_key",
+]
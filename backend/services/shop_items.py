@@ -0,0 +1,340 @@
+"""
+Modèle compact des items parsés de la boutique.
+
+Un item, ses images et chaque objet de pack / objet lié gardent leurs champs dans
+des __slots__ au lieu d'un dict chacun ; type, rareté et section sont internés (une
+seule chaîne par valeur pour toute la boutique). Ce sont des MutableMapping : index,
+recherche, projections, catalogue et proxy d'images les lisent et les complètent
+comme avant (les clés hors modèle, ex. cosmetic ou image_sources, vont dans _extra).
+
+La forme JSON historique n'est produite qu'à la sérialisation et aux API publiques
+(json_default, to_dict, plain_items), avec les clés dans le même ordre que les anciens
+dicts : mêmes octets, donc mêmes versions, digests et ETags.
+"""
+
+import sys
+from collections.abc import MutableMapping
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Valeur des slots dont la clé est absente (un slot jamais affecté coûte une exception à lire)
+_MISSING: Any = object()
+
+# Champs dont les valeurs se répètent d'un item à l'autre
+INTERNED_KEYS = frozenset(("section", "type", "rarity"))
+
+
+def intern_label(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class CompactRecord(MutableMapping):
+    """
+    Base : _FIELDS = ((clé JSON, attribut), ...) dans l'ordre de sérialisation.
+    Un slot à _MISSING = clé absente ; les autres clés suivent, dans leur ordre d'ajout.
+    """
+
+    __slots__ = ("_extra",)
+    _FIELDS: Tuple[Tuple[str, str], ...] = ()
+    _ATTRS: Dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._ATTRS = dict(cls._FIELDS)
+
+    @classmethod
+    def _blank(cls) -> "CompactRecord":
+        record = cls.__new__(cls)
+        for _, attr in cls._FIELDS:
+            setattr(record, attr, _MISSING)
+        record._extra = None
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            value = getattr(self, attr)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            value = getattr(self, attr)
+            return default if value is _MISSING else value
+        extra = self._extra
+        return extra.get(key, default) if extra else default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            setattr(self, attr, value)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            if getattr(self, attr) is _MISSING:
+                raise KeyError(key)
+            setattr(self, attr, _MISSING)
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        attr = self._ATTRS.get(key)  # type: ignore[call-overload]
+        if attr is not None:
+            return getattr(self, attr) is not _MISSING
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key, attr in self._FIELDS:
+            if getattr(self, attr) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        present = sum(1 for _, attr in self._FIELDS if getattr(self, attr) is not _MISSING)
+        return present + (len(self._extra) if self._extra else 0)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.shallow_dict()!r})"
+
+    def copy(self) -> "CompactRecord":
+        """Copie superficielle, comme dict.copy()."""
+        clone = type(self).__new__(type(self))
+        for _, attr in self._FIELDS:
+            setattr(clone, attr, getattr(self, attr))
+        clone._extra = dict(self._extra) if self._extra else None
+        return clone
+
+    def shallow_dict(self) -> Dict[str, Any]:
+        """dict des clés présentes ; les valeurs imbriquées restent telles quelles."""
+        data = {}
+        for key, attr in self._FIELDS:
+            value = getattr(self, attr)
+            if value is not _MISSING:
+                data[key] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forme JSON historique, images et objets de pack compris."""
+        data = self.shallow_dict()
+        for key, value in data.items():
+            if isinstance(value, CompactRecord):
+                data[key] = value.to_dict()
+            elif type(value) is list and any(isinstance(v, CompactRecord) for v in value):
+                data[key] = [v.to_dict() if isinstance(v, CompactRecord) else v for v in value]
+        return data
+
+
+class ItemImages(CompactRecord):
+    """images d'un item : icon / featured / small_icon (+ thumb ajouté par le proxy)."""
+
+    __slots__ = ("icon", "featured", "small_icon")
+    _FIELDS = (("icon", "icon"), ("featured", "featured"), ("small_icon", "small_icon"))
+
+    def __init__(self, icon: Optional[str], featured: Optional[str], small_icon: Optional[str]) -> None:
+        self.icon = icon
+        self.featured = featured
+        self.small_icon = small_icon
+        self._extra = None
+
+
+class PackMember(CompactRecord):
+    """Objet d'un pack (bundle_items) ou objet lié à une tenue (related_items)."""
+
+    __slots__ = ("item_id", "name", "item_type", "rarity", "description", "images")
+    _FIELDS = (
+        ("id", "item_id"),
+        ("name", "name"),
+        ("type", "item_type"),
+        ("rarity", "rarity"),
+        ("description", "description"),
+        ("images", "images"),
+    )
+
+    def __init__(
+        self,
+        item_id: str,
+        name: str,
+        item_type: str,
+        rarity: str,
+        description: str,
+        images: Any,
+    ) -> None:
+        self.item_id = item_id
+        self.name = name
+        self.item_type = intern_label(item_type)
+        self.rarity = intern_label(rarity)
+        self.description = description
+        self.images = images
+        self._extra = None
+
+
+class ShopItem(CompactRecord):
+    """
+    Item de la boutique tel que produit par parse_entry. Les champs propres à une
+    sorte d'item (voiture, tenue + objets liés, pack) ne sont présents que pour elle.
+    """
+
+    __slots__ = (
+        "section",
+        "name",
+        "description",
+        "item_type",
+        "rarity",
+        "vbucks",
+        "regular_price",
+        "item_id",
+        "giftable",
+        "refundable",
+        "in_date",
+        "out_date",
+        "images",
+        "layout",
+        "entry",
+        "has_related_items",
+        "related_items",
+        "vehicle_id",
+        "is_bundle",
+        "bundle_items",
+        "banner",
+    )
+    _FIELDS = (
+        ("section", "section"),
+        ("name", "name"),
+        ("description", "description"),
+        ("type", "item_type"),
+        ("rarity", "rarity"),
+        ("vbucks", "vbucks"),
+        ("regular_price", "regular_price"),
+        ("id", "item_id"),
+        ("giftable", "giftable"),
+        ("refundable", "refundable"),
+        ("inDate", "in_date"),
+        ("outDate", "out_date"),
+        ("images", "images"),
+        ("layout", "layout"),
+        ("entry", "entry"),
+        ("has_related_items", "has_related_items"),
+        ("related_items", "related_items"),
+        ("vehicleId", "vehicle_id"),
+        ("is_bundle", "is_bundle"),
+        ("bundle_items", "bundle_items"),
+        ("banner", "banner"),
+    )
+
+    def __init__(
+        self,
+        section: str,
+        name: str,
+        description: str,
+        item_type: str,
+        rarity: str,
+        vbucks: int,
+        regular_price: int,
+        item_id: str,
+        entry: Dict[str, Any],
+        images: Any,
+    ) -> None:
+        """giftable, refundable, inDate, outDate et layout viennent de l'entrée."""
+        self.section = intern_label(section)
+        self.name = name
+        self.description = description
+        self.item_type = intern_label(item_type)
+        self.rarity = intern_label(rarity)
+        self.vbucks = vbucks
+        self.regular_price = regular_price
+        self.item_id = item_id
+        self.giftable = entry.get("giftable", False)
+        self.refundable = entry.get("refundable", False)
+        self.in_date = entry.get("inDate", "")
+        self.out_date = entry.get("outDate", "")
+        self.images = images
+        self.layout = entry.get("layout", {})
+        self.entry = entry
+        self.has_related_items = self.related_items = self.vehicle_id = _MISSING
+        self.is_bundle = self.bundle_items = self.banner = _MISSING
+        self._extra = None
+
+
+def json_default(value: Any) -> Any:
+    """default= de json.dumps : les enregistrements compacts sont écrits comme des dicts."""
+    if isinstance(value, CompactRecord):
+        return value.shallow_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def plain_items(items: Iterable[Any]) -> List[Any]:
+    """Items en dicts simples (forme JSON historique), pour les API publiques."""
+    return [item.to_dict() if isinstance(item, CompactRecord) else item for item in items]
+
+
+def _compact(cls: type, data: Dict[str, Any]) -> Any:
+    """Enregistrement équivalent à data, ou data tel quel si ses clés ne suivent pas l'ordre du modèle."""
+    record = cls._blank()
+    for key, value in data.items():
+        if key in INTERNED_KEYS:
+            value = intern_label(value)
+        elif cls is ShopItem and key == "images" and type(value) is dict:
+            value = _compact(ItemImages, value)
+        elif key in ("bundle_items", "related_items") and type(value) is list:
+            value = [_compact(PackMember, m) if type(m) is dict else m for m in value]
+        record[key] = value
+    return record if list(record) == list(data) else data
+
+
+def columns(items: Sequence[Any], *keys: str, default: Any = None) -> List[List[Any]]:
+    """
+    Une liste de valeurs par clé, alignées sur items (passes d'index et de prix).
+    Une liste de ShopItem est lue slot par slot, sans passer par get() ; sinon
+    (snapshot mmap, ancien cache) un seul parcours avec item.get(key, default).
+    """
+    if type(items) is list and all(type(item) is ShopItem for item in items):
+        result = []
+        for key in keys:
+            attr = ShopItem._ATTRS.get(key)
+            if attr is None:
+                result.append([item.get(key, default) for item in items])
+                continue
+            values = list(map(attrgetter(attr), items))
+            if any(value is _MISSING for value in values):
+                values = [default if value is _MISSING else value for value in values]
+            result.append(values)
+        return result
+
+    result = [[] for _ in keys]
+    for item in items:
+        for values, key in zip(result, keys):
+            values.append(item.get(key, default))
+    return result
+
+
+def compact_items(items: List[Any]) -> List[Any]:
+    """Items relus du cache JSON (dicts) -> ShopItem ; une forme inattendue reste un dict."""
+    return [_compact(ShopItem, item) if type(item) is dict else item for item in items]
+
+
+__all__ = [
+    "CompactRecord",
+    "ItemImages",
+    "PackMember",
+    "ShopItem",
+    "columns",
+    "compact_items",
+    "intern_label",
+    "json_default",
+    "plain_items",
+]
@@ -0,0 +1,163 @@
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Profils nommés pour ?profile= ; "full" = forme historique complète (défaut)
+PROFILES: Dict[str, Optional[Tuple[str, ...]]] = {
+    "full": None,
+    # Grille boutique : de quoi afficher une carte, ses filtres et la recherche
+    # (description), avec les objets de pack / liés réduits à l'essentiel
+    "card": (
+        "id",
+        "name",
+        "description",
+        "section",
+        "type",
+        "rarity",
+        "vbucks",
+        "regular_price",
+        "outDate",
+        "giftable",
+        "refundable",
+        "is_bundle",
+        "bundle_items.id",
+        "bundle_items.name",
+        "bundle_items.type",
+        "bundle_items.rarity",
+        "bundle_items.images.icon",
+        "has_related_items",
+        "related_items.id",
+        "related_items.name",
+        "related_items.type",
+        "related_items.rarity",
+        "related_items.images.icon",
+        "images.icon",
+        "images.featured",
+        "images.thumb",
+        "banner",
+    ),
+    # Page détails : tout sauf l'entrée brute de l'API dupliquée sur chaque item
+    "detail": (
+        "id",
+        "name",
+        "description",
+        "section",
+        "type",
+        "rarity",
+        "vbucks",
+        "regular_price",
+        "inDate",
+        "outDate",
+        "giftable",
+        "refundable",
+        "images",
+        "layout",
+        "banner",
+        "vehicleId",
+        "is_bundle",
+        "bundle_items",
+        "has_related_items",
+        "related_items",
+    ),
+}
+
+# Métadonnées gardées en tête des réponses projetées (raw_data est exclu)
+PAYLOAD_META_KEYS = ("date", "total_items", "vbuckIcon", "version", "last_updated")
+
+MAX_FIELDS = 40
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+class ProjectionError(ValueError):
+    """Paramètre fields/profile invalide."""
+
+
+def parse_fields(spec: str) -> Tuple[str, ...]:
+    """'id, name,images.icon' -> ('id', 'images.icon', 'name') (trié, dédoublonné)."""
+    fields = {field.strip() for field in spec.split(",") if field.strip()}
+    if not fields:
+        raise ProjectionError("fields vide")
+    if len(fields) > MAX_FIELDS:
+        raise ProjectionError(f"fields limité à {MAX_FIELDS} champs")
+    for field in fields:
+        if not _FIELD_RE.match(field):
+            raise ProjectionError(f"champ invalide: {field}")
+    # 'images.icon' est redondant si 'images' est déjà demandé en entier
+    fields = {
+        field
+        for field in fields
+        if not any(field.startswith(other + ".") for other in fields)
+    }
+    return tuple(sorted(fields))
+
+
+def resolve_projection(
+    profile: Optional[str] = None, fields: Optional[str] = None
+) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    """
+    Retourne (clé, champs) pour une requête. La clé identifie le corps pré-calculé :
+    nom du profil, ou "fields:<liste>" pour une projection libre. champs=None = forme complète.
+    """
+    if fields:
+        parsed = parse_fields(fields)
+        return "fields:" + ",".join(parsed), parsed
+
+    name = profile or "full"
+    if name not in PROFILES:
+        raise ProjectionError(
+            f"profil inconnu: {name} (disponibles: {', '.join(PROFILES)})"
+        )
+    return name, PROFILES[name]
+
+
+def project_item(item: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Copie des seuls champs demandés ; 'a.b' recopie item['a']['b'] sous la même forme.
+    Si item['a'] est une liste (ex. 'bundle_items.name'), chaque élément est projeté.
+    """
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        _copy_path(item, field.split("."), projected)
+    return projected
+
+
+def _copy_path(source: Any, path: List[str], target: Dict[str, Any]) -> None:
+    key = path[0]
+    if not isinstance(source, Mapping) or key not in source:
+        return
+    value = source[key]
+    if len(path) == 1:
+        target[key] = value
+    elif type(value) is list:
+        elements = target.get(key)
+        if elements is None:
+            elements = target[key] = [{} for _ in value]
+        for element, projected in zip(value, elements):
+            _copy_path(element, path[1:], projected)
+    else:
+        # Sous-objet créé seulement si le chemin complet existe
+        nested = target.get(key, {})
+        _copy_path(value, path[1:], nested)
+        if nested:
+            target[key] = nested
+
+
+def project_payload(
+    meta: Dict[str, Any],
+    items: Iterable[Dict[str, Any]],
+    fields: Tuple[str, ...],
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {k: meta[k] for k in PAYLOAD_META_KEYS if k in meta}
+    projected: List[Dict[str, Any]] = [project_item(item, fields) for item in items]
+    payload["items"] = projected
+    return payload
+
+
+__all__ = [
+    "PROFILES",
+    "ProjectionError",
+    "parse_fields",
+    "project_item",
+    "project_payload",
+    "resolve_projection",
+]
@@ -0,0 +1,120 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_iso(value: Optional[str]) -> Optional[datetime]:
+    """Parse une date ISO de l'API (suffixe Z accepté) ; None si invalide."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def next_daily_rotation(after: datetime, rotation_hour_utc: int = 0) -> datetime:
+    """Prochaine rotation quotidienne de la boutique strictement après `after`."""
+    rotation = after.astimezone(timezone.utc).replace(
+        hour=rotation_hour_utc, minute=0, second=0, microsecond=0
+    )
+    if rotation <= after:
+        rotation += timedelta(days=1)
+    return rotation
+
+
+def collect_out_dates(items: Iterable[Dict[str, Any]]) -> List[str]:
+    """outDate distincts des items (triés) : tout ce dont l'expiration a besoin."""
+    return sorted({item.get("outDate") for item in items if item.get("outDate")})
+
+
+def next_change_point(
+    out_dates: Iterable[str], after: datetime, rotation_hour_utc: int = 0
+) -> datetime:
+    """
+    Prochain instant où la boutique change réellement :
+    le plus petit outDate futur (voir collect_out_dates), borné par la rotation quotidienne.
+    """
+    change = next_daily_rotation(after, rotation_hour_utc)
+    for value in out_dates:
+        out_date = parse_iso(value)
+        if out_date and after < out_date < change:
+            change = out_date
+    return change
+
+
+def has_expired_items(
+    out_dates: Iterable[str], at: datetime, max_age: Optional[timedelta] = None
+) -> bool:
+    """
+    Vrai si la réponse contient des items déjà sortis de la boutique à `at` :
+    l'API n'a pas encore publié la rotation, il faut réessayer rapidement.
+    Les outDate plus vieux que max_age sont ignorés : l'API garde parfois une entrée
+    après son outDate, et réessayer indéfiniment ne la ferait pas disparaître.
+    """
+    oldest = at - max_age if max_age is not None else None
+    for value in out_dates:
+        out_date = parse_iso(value)
+        if out_date and out_date <= at and (oldest is None or out_date > oldest):
+            return True
+    return False
+
+
+class ShopRefreshScheduler:
+    """
+    Thread (un par worker) qui déclenche le refresh juste après chaque changement
+    de boutique. Le refresh passe par le single-flight du client : un seul worker
+    interroge l'API, les autres relisent le cache disque.
+    """
+
+    def __init__(self, client: Any, keepalive_seconds: int) -> None:
+        self.client = client
+        self.keepalive_seconds = keepalive_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="fortnite-shop-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.client.refresh_if_expired()
+            except Exception as exc:
+                logger.warning("Refresh planifié de la boutique échoué (%s)", exc)
+
+            delay = self.keepalive_seconds
+            expires_at = self.client.expires_at
+            if expires_at is not None:
+                until_expiry = (expires_at - datetime.now(timezone.utc)).total_seconds()
+                if until_expiry > 0:
+                    delay = min(delay, until_expiry)
+                else:
+                    # Refresh échoué ou limité : réessayer sans boucler
+                    delay = self.client.min_refresh_interval
+            self._stop.wait(max(delay, 1))
+
+
+__all__ = [
+    "ShopRefreshScheduler",
+    "collect_out_dates",
+    "has_expired_items",
+    "next_change_point",
+    "next_daily_rotation",
+    "parse_iso",
+]
@@ -0,0 +1,103 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Poids par champ : un nom qui correspond compte plus qu'une description
+FIELD_WEIGHTS = {
+    "name": 5.0,
+    "member_names": 3.0,
+    "type": 2.0,
+    "rarity": 1.5,
+    "description": 1.0,
+}
+# Un préfixe ("plan" -> "planeur") compte moins qu'un mot complet
+PREFIX_FACTOR = 0.6
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def normalize_text(text: Any) -> str:
+    """Minuscules sans accents : 'Épée' -> 'epee'."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.casefold()
+
+
+def tokenize(text: Any) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def _item_fields(item: Dict[str, Any]) -> Dict[str, str]:
+    members = item.get("bundle_items", []) + item.get("related_items", [])
+    return {
+        "name": item.get("name") or "",
+        "member_names": " ".join(m.get("name") or "" for m in members),
+        "type": item.get("type") or "",
+        "rarity": item.get("rarity") or "",
+        "description": item.get("description") or "",
+    }
+
+
+class ShopSearchIndex:
+    """
+    Index inversé d'un snapshot : token normalisé -> {position: score}.
+    Le vocabulaire trié permet la recherche par préfixe (bisect) sans parcourir les items.
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]]) -> None:
+        self.postings: Dict[str, Dict[int, float]] = {}
+        for position, item in enumerate(items):
+            for field, text in _item_fields(item).items():
+                weight = FIELD_WEIGHTS[field]
+                for token in set(tokenize(text)):
+                    scores = self.postings.setdefault(token, {})
+                    scores[position] = scores.get(position, 0.0) + weight
+        self.vocabulary: List[str] = sorted(self.postings)
+
+    def _token_scores(self, token: str) -> Dict[int, float]:
+        """Scores pour un token de requête : mot exact + mots qui le prolongent."""
+        scores: Dict[int, float] = dict(self.postings.get(token, {}))
+        if len(token) < MIN_PREFIX_LENGTH:
+            return scores
+
+        start = bisect_left(self.vocabulary, token)
+        for word in self.vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            if word == token:
+                continue
+            for position, score in self.postings[word].items():
+                prefix_score = score * PREFIX_FACTOR
+                if prefix_score > scores.get(position, 0.0):
+                    scores[position] = prefix_score
+        return scores
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """
+        (position, score) des items qui contiennent chaque mot de la requête
+        (en entier ou comme début de mot), du plus pertinent au moins pertinent.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        totals: Dict[int, float] = {}
+        for i, token in enumerate(dict.fromkeys(tokens)):
+            scores = self._token_scores(token)
+            if i == 0:
+                totals = scores
+            else:
+                totals = {
+                    position: totals[position] + score
+                    for position, score in scores.items()
+                    if position in totals
+                }
+            if not totals:
+                return []
+
+        return sorted(totals.items(), key=lambda pair: (-pair[1], pair[0]))
+
+
+__all__ = ["ShopSearchIndex", "normalize_text", "tokenize"]
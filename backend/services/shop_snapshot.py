@@ -0,0 +1,367 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+from .shop_changes import diff_payload, item_fingerprints, previous_entries
+from .shop_index import (
+    ShopIndexes,
+    build_id_index,
+    decode_cursor,
+    encode_cursor,
+    query_key,
+)
+from .shop_items import json_default, plain_items
+from .shop_projection import PAYLOAD_META_KEYS, PROFILES, project_item, project_payload
+from .shop_schedule import collect_out_dates
+from .shop_search import ShopSearchIndex, normalize_text
+from .snapshot_store import MappedSnapshot, write_snapshot
+
+# Compression faite une seule fois par snapshot : on peut viser haut sans
+# bloquer un worker (brotli 11 coûte ~1.5s sur 1 Mo, 9 reste sous 0.1s).
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# Clés volumineuses gardées hors des métadonnées du snapshot
+_NON_META_KEYS = ("items", "raw_data")
+
+# Projections libres (?fields=) et pages filtrées gardées par snapshot
+MAX_CUSTOM_PROJECTIONS = 64
+
+
+def dump_json_bytes(payload: Any) -> bytes:
+    """Sérialisation compacte en UTF-8 (même format pour tous les corps de réponse)."""
+    return json.dumps(
+        payload, ensure_ascii=False, separators=(",", ":"), default=json_default
+    ).encode("utf-8")
+
+
+class EncodedBody:
+    """Corps JSON déjà sérialisé, avec ses variantes compressées."""
+
+    def __init__(self, variants: Dict[str, Any]) -> None:
+        # bytes, ou memoryview sur un snapshot mmap (voir snapshot_store)
+        self.variants = variants
+
+    @classmethod
+    def from_raw(cls, raw: bytes) -> "EncodedBody":
+        variants: Dict[str, Any] = {"identity": raw}
+        variants["gzip"] = gzip.compress(raw, compresslevel=GZIP_LEVEL)
+        if HAS_BROTLI:
+            variants["br"] = brotli.compress(raw, quality=BROTLI_QUALITY)
+        return cls(variants)
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "EncodedBody":
+        return cls.from_raw(dump_json_bytes(payload))
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        """Encodages disponibles, du plus compact au moins compact."""
+        return tuple(
+            name for name in ("br", "gzip", "identity") if name in self.variants
+        )
+
+    def get(self, encoding: Optional[str]) -> Tuple[Any, str]:
+        """
+        Retourne (corps, encodage) ; identity si l'encodage demandé est absent.
+        Le corps est renvoyé tel quel : bytes, ou memoryview sur le mmap (pas de copie).
+        """
+        if encoding not in self.variants:
+            encoding = "identity"
+        return self.variants[encoding], encoding
+
+
+class ShopSnapshot:
+    """
+    Une version de la boutique telle que servie par /api/shop.
+    Construit une seule fois par refresh (ou relecture du cache disque).
+    """
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self._data: Optional[Dict[str, Any]] = data
+        self._mapped: Optional[MappedSnapshot] = None
+        self.meta: Dict[str, Any] = {
+            k: v for k, v in data.items() if k not in _NON_META_KEYS
+        }
+        self.items: Sequence[Dict[str, Any]] = data.get("items", [])
+        self.version: Optional[str] = data.get("version")
+        # Profils nommés (voir shop_projection.PROFILES) encodés dès la construction
+        self.bodies: Dict[str, EncodedBody] = {"full": EncodedBody.from_payload(data)}
+        for name, fields in PROFILES.items():
+            if fields is not None:
+                self.bodies[name] = EncodedBody.from_payload(
+                    project_payload(self.meta, self.items, fields)
+                )
+        self._init_lazy_state()
+
+    @classmethod
+    def from_mapped(cls, mapped: MappedSnapshot) -> "ShopSnapshot":
+        """Snapshot adossé à un fichier mmap : corps et items restent dans le page cache."""
+        snapshot = cls.__new__(cls)
+        snapshot._data = None
+        snapshot._mapped = mapped
+        snapshot.meta = mapped.meta
+        snapshot.items = mapped.items
+        snapshot.version = mapped.meta.get("version")
+        variants: Dict[str, Dict[str, Any]] = {}
+        for name in mapped.section_index:
+            if name.startswith("body."):
+                _, key, encoding = name.split(".", 2)
+                variants.setdefault(key, {})[encoding] = mapped.section(name)
+        snapshot.bodies = {key: EncodedBody(v) for key, v in variants.items()}
+        snapshot._init_lazy_state()
+        return snapshot
+
+    def _init_lazy_state(self) -> None:
+        self._custom_bodies: "OrderedDict[str, EncodedBody]" = OrderedDict()
+        self._custom_lock = threading.Lock()
+        self._id_index: Optional[Dict[str, int]] = None
+        self._indexes: Optional[ShopIndexes] = None
+        self._search_index: Optional[ShopSearchIndex] = None
+        self._item_bodies: Dict[int, Tuple[EncodedBody, str]] = {}
+        self._index_lock = threading.Lock()
+        self._change_bodies: Dict[str, EncodedBody] = {}
+        self._change_entries: Dict[str, Dict[str, Any]] = {}
+        self._out_dates: Optional[List[str]] = None
+        self._fingerprints: Optional[Dict[str, List[Any]]] = None
+
+    @property
+    def out_dates(self) -> List[str]:
+        """outDate distincts des items (expiration) ; lus dans l'en-tête d'un snapshot mmap."""
+        if self._out_dates is None:
+            extras = self._mapped.extras if self._mapped is not None else {}
+            if "out_dates" in extras:
+                self._out_dates = extras["out_dates"]
+            else:
+                self._out_dates = collect_out_dates(self.items)
+        return self._out_dates
+
+    @property
+    def fingerprints(self) -> Dict[str, List[Any]]:
+        """
+        clé d'item -> [digest, vbucks] (voir shop_changes) : en-tête d'un snapshot mmap,
+        sinon entrée du journal pour cette version, sinon calculées depuis les items.
+        """
+        if self._fingerprints is None:
+            extras = self._mapped.extras if self._mapped is not None else {}
+            entry = self._change_entries.get(self.version) if self.version else None
+            if "fingerprints" in extras:
+                self._fingerprints = extras["fingerprints"]
+            elif entry is not None:
+                self._fingerprints = entry["items"]
+            else:
+                self._fingerprints = item_fingerprints(self.items)
+        return self._fingerprints
+
+    def attach_changes(self, log: Sequence[Dict[str, Any]]) -> None:
+        """
+        Retient les versions du journal (voir shop_changes) antérieures à ce snapshot.
+        Chaque diff est calculé et encodé à la première demande, sans décoder les items
+        inchangés ; les empreintes de ce snapshot viennent de son en-tête (mmap) ou du journal.
+        """
+        entries = previous_entries(log, self.version)
+        with self._index_lock:
+            self._change_entries = entries
+            self._change_bodies = {}
+
+    def changes_body(self, since: str) -> Optional[Tuple[EncodedBody, str]]:
+        """(corps, ETag) des changements depuis la version since ; None si elle est trop ancienne."""
+        with self._index_lock:
+            body = self._change_bodies.get(since)
+            entry = self._change_entries.get(since)
+        if body is None:
+            if entry is None:
+                return None
+            current = {
+                "version": self.version,
+                "last_updated": self.meta.get("last_updated"),
+                "items": self.fingerprints,
+            }
+            body = EncodedBody.from_payload(diff_payload(entry, current, self.items))
+            with self._index_lock:
+                self._change_bodies[since] = body
+        return body, self._derived_etag(f"changes:{since}")
+
+    @property
+    def id_index(self) -> Dict[str, int]:
+        """id / offerId / vehicleId / membre de pack -> position (construit une fois)."""
+        if self._id_index is None:
+            with self._index_lock:
+                if self._id_index is None:
+                    self._id_index = build_id_index(self.items)
+        return self._id_index
+
+    @property
+    def indexes(self) -> ShopIndexes:
+        """Index secondaires type / rareté / prix / tri (construits une fois)."""
+        if self._indexes is None:
+            with self._index_lock:
+                if self._indexes is None:
+                    self._indexes = ShopIndexes(self.items)
+        return self._indexes
+
+    def list_body(
+        self, query: Dict[str, Any], key: str, fields: Optional[Tuple[str, ...]]
+    ) -> Tuple[EncodedBody, Optional[str]]:
+        """
+        Page filtrée / triée (query issue de parse_list_query), projetée comme key/fields.
+        Chaque page est encodée au premier appel puis gardée avec les projections libres.
+        """
+        offset = decode_cursor(query["cursor"], self.version) if query.get("cursor") else 0
+
+        def build() -> Dict[str, Any]:
+            positions = self.indexes.select(query)
+            page = positions[offset : offset + query["limit"]]
+            end = offset + len(page)
+            payload = self._page_payload(page, fields)
+            payload["total_items"] = len(positions)
+            payload["next_cursor"] = (
+                encode_cursor(self.version, end) if end < len(positions) else None
+            )
+            return payload
+
+        memo_key = f"list:{key}:{query_key(query)}"
+        return self._memoized(memo_key, build), self._derived_etag(memo_key)
+
+    @property
+    def search_index(self) -> ShopSearchIndex:
+        """Index inversé plein texte (construit une fois)."""
+        if self._search_index is None:
+            with self._index_lock:
+                if self._search_index is None:
+                    self._search_index = ShopSearchIndex(self.items)
+        return self._search_index
+
+    def search_body(
+        self, text: str, limit: int, key: str, fields: Optional[Tuple[str, ...]]
+    ) -> Tuple[EncodedBody, Optional[str]]:
+        """
+        Résultats de recherche classés, projetés comme key/fields. Les requêtes
+        équivalentes ('Épée', 'epee') partagent corps et ETag : query est la forme normalisée.
+        """
+        normalized = normalize_text(text)
+
+        def build() -> Dict[str, Any]:
+            results = self.search_index.search(text)
+            payload = self._page_payload([p for p, _ in results[:limit]], fields)
+            payload["query"] = normalized
+            payload["total_items"] = len(results)
+            return payload
+
+        memo_key = f"search:{key}:{limit}:{normalized}"
+        return self._memoized(memo_key, build), self._derived_etag(memo_key)
+
+    def _page_payload(
+        self, positions: Sequence[int], fields: Optional[Tuple[str, ...]]
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {k: self.meta[k] for k in PAYLOAD_META_KEYS if k in self.meta}
+        payload["items"] = [
+            project_item(self.items[p], fields) if fields else self.items[p]
+            for p in positions
+        ]
+        return payload
+
+    def item_body(self, item_id: str) -> Optional[Tuple[EncodedBody, str]]:
+        """
+        (corps pré-encodé, ETag) de l'item correspondant à item_id, None si absent.
+        L'ETag est un hash du contenu de l'item : il survit aux refresh qui ne le modifient pas.
+        """
+        position = self.id_index.get(item_id)
+        if position is None:
+            return None
+
+        cached = self._item_bodies.get(position)
+        if cached is not None:
+            return cached
+
+        raw = dump_json_bytes(self.items[position])
+        cached = (EncodedBody.from_raw(raw), hashlib.sha1(raw).hexdigest()[:20])
+        self._item_bodies[position] = cached
+        return cached
+
+    @property
+    def body(self) -> EncodedBody:
+        return self.bodies["full"]
+
+    def body_for(self, key: str, fields: Optional[Tuple[str, ...]]) -> EncodedBody:
+        """
+        Corps pré-encodé d'une projection (clé/champs issus de resolve_projection).
+        Les projections libres sont calculées au premier appel puis gardées (LRU).
+        """
+        body = self.bodies.get(key)
+        if body is not None:
+            return body
+        return self._memoized(
+            key, lambda: project_payload(self.meta, self.items, fields)
+        )
+
+    def _memoized(self, memo_key: str, build: Callable[[], Any]) -> EncodedBody:
+        """Corps calculé à la demande (build -> payload) puis gardé en LRU pour ce snapshot."""
+        with self._custom_lock:
+            body = self._custom_bodies.get(memo_key)
+            if body is not None:
+                self._custom_bodies.move_to_end(memo_key)
+                return body
+
+        body = EncodedBody.from_payload(build())
+        with self._custom_lock:
+            self._custom_bodies[memo_key] = body
+            while len(self._custom_bodies) > MAX_CUSTOM_PROJECTIONS:
+                self._custom_bodies.popitem(last=False)
+        return body
+
+    def _derived_etag(self, memo_key: str) -> str:
+        return f"{self.version}-{hashlib.sha1(memo_key.encode('utf-8')).hexdigest()[:8]}"
+
+    def etag_for(self, key: str) -> Optional[str]:
+        """ETag propre à chaque projection (les corps diffèrent pour une même version)."""
+        if not self.version or key == "full":
+            return self.version
+        suffix = key if key in PROFILES else hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        return f"{self.version}-{suffix}"
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """
+        Forme dict complète (compatibilité get_shop) : items en dicts simples, copiés à
+        chaque appel ; les enregistrements compacts restent internes au snapshot.
+        Pour un snapshot mmap, reconstruite à chaque appel et jamais gardée en mémoire.
+        """
+        if self._data is not None:
+            return {**self._data, "items": plain_items(self._data["items"])}
+
+        data = dict(self.meta)
+        data["items"] = plain_items(self.items)
+        raw = self._mapped.section("raw_data")
+        if raw is not None:
+            data["raw_data"] = json.loads(bytes(raw))
+        return data
+
+    def write(self, path: str) -> None:
+        """Écrit le snapshot au format binaire partagé (voir snapshot_store)."""
+        sections = {
+            f"body.{key}.{encoding}": bytes(blob)
+            for key, body in self.bodies.items()
+            for encoding, blob in body.variants.items()
+        }
+        if self._data is not None:
+            if "raw_data" in self._data:
+                sections["raw_data"] = dump_json_bytes(self._data["raw_data"])
+        else:
+            raw = self._mapped.section("raw_data")
+            if raw is not None:
+                sections["raw_data"] = bytes(raw)
+        extras = {"out_dates": self.out_dates, "fingerprints": self.fingerprints}
+        write_snapshot(path, self.meta, self.items, sections, extras)
+
+
+__all__ = ["EncodedBody", "ShopSnapshot", "dump_json_bytes", "HAS_BROTLI"]
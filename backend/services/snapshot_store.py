@@ -0,0 +1,133 @@
+"""
+Format binaire compact du snapshot boutique, partagé entre workers via mmap.
+
+Disposition du fichier :
+    MAGIC (8 octets) | taille de l'en-tête (uint32 LE) | en-tête JSON | données
+
+L'en-tête contient les métadonnées de la boutique (sans les items), la position
+des sections (corps de réponse pré-encodés, raw_data), un index d'offsets par
+item et des données dérivées des items (extras : outDate, empreintes des items)
+pour que l'installation du snapshot n'ait pas à les décoder. Chaque item est stocké en JSON compact et décodé seulement à la demande :
+tous les workers partagent la même copie physique dans le page cache.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .shop_items import json_default
+
+MAGIC = b"FNSHOP01"
+_HEADER_SIZE = struct.Struct("<I")
+
+
+def _dump(payload: Any) -> bytes:
+    return json.dumps(
+        payload, ensure_ascii=False, separators=(",", ":"), default=json_default
+    ).encode("utf-8")
+
+
+def write_snapshot(
+    path: str,
+    meta: Dict[str, Any],
+    items: Sequence[Dict[str, Any]],
+    sections: Dict[str, bytes],
+    extras: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Écrit le snapshot de façon atomique (fichier temporaire + rename)."""
+    blobs: List[bytes] = []
+    offset = 0
+
+    section_index: Dict[str, Tuple[int, int]] = {}
+    for name, blob in sections.items():
+        section_index[name] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+
+    item_index: List[Tuple[int, int]] = []
+    for item in items:
+        blob = _dump(item)
+        item_index.append((offset, len(blob)))
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = _dump(
+        {"meta": meta, "sections": section_index, "items": item_index, "extras": extras or {}}
+    )
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        tmp_path = f.name
+        try:
+            f.write(MAGIC)
+            f.write(_HEADER_SIZE.pack(len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        except Exception:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+class MappedItems(Sequence):
+    """Liste d'items en lecture seule, décodés à la demande depuis le mmap."""
+
+    def __init__(self, snapshot: "MappedSnapshot") -> None:
+        self._snapshot = snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot.item_index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return json.loads(bytes(self._snapshot.item_bytes(index)))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class MappedSnapshot:
+    """Lecture d'un fichier écrit par write_snapshot, sans charger les items."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Snapshot boutique invalide : {path}")
+
+        start = len(MAGIC)
+        (header_len,) = _HEADER_SIZE.unpack_from(view, start)
+        start += _HEADER_SIZE.size
+        header = json.loads(bytes(view[start : start + header_len]))
+
+        self._data = view[start + header_len :]
+        self.meta: Dict[str, Any] = header["meta"]
+        self.section_index: Dict[str, List[int]] = header["sections"]
+        self.item_index: List[List[int]] = header["items"]
+        # Absent des fichiers écrits avant les extras
+        self.extras: Dict[str, Any] = header.get("extras", {})
+        self.items = MappedItems(self)
+
+    def section(self, name: str) -> Optional[memoryview]:
+        position = self.section_index.get(name)
+        if position is None:
+            return None
+        offset, length = position
+        return self._data[offset : offset + length]
+
+    def item_bytes(self, index: int) -> memoryview:
+        offset, length = self.item_index[index]
+        return self._data[offset : offset + length]
+
+
+__all__ = ["MAGIC", "MappedItems", "MappedSnapshot", "write_snapshot"]
@@ -0,0 +1,178 @@
+"""
+Réponses amont enregistrées (boutique, cosmétiques, pages de prix), pour rejouer
+refresh, cache et replis sans réseau (voir benchmarks/fortnite_api_stub.py).
+
+Disposition du dossier, un sous-dossier par site :
+    <hôte>/<clé>.json    URL et variantes (statut, Content-Type, date, corps)
+    <hôte>/<sha1>.body   corps, partagé par les variantes identiques
+
+Une même URL garde plusieurs variantes (boutiques de jours différents) que le stub
+fait tourner. L'URL <schéma>://<hôte>/* sert de réponse par défaut pour l'hôte.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Variantes gardées par URL (les plus anciennes sont oubliées)
+MAX_VARIANTS = 30
+DEFAULT_PATH = "/*"
+
+
+class RecordedResponse(NamedTuple):
+    status: int
+    content_type: str
+    body: bytes
+    recorded_at: float
+
+
+def replay_key(url: str) -> Tuple[str, str, str]:
+    """
+    (hôte, clé de fichier, chemin canonique) d'une URL : schéma ignoré, / final retiré,
+    paramètres triés (language=fr&x=1 et x=1&language=fr sont la même réponse).
+    """
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    canonical = f"{path}?{query}" if query else path
+    key = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+    return parts.netloc, key, canonical
+
+
+class ReplayStore:
+    """Dossier de réponses enregistrées ; record() est sûr entre threads d'un même process."""
+
+    def __init__(self, directory: str, max_variants: int = MAX_VARIANTS) -> None:
+        self.directory = directory
+        self.max_variants = max_variants
+        self._lock = threading.Lock()
+
+    def _index_path(self, host: str, key: str) -> str:
+        return os.path.join(self.directory, host.replace(":", "_"), f"{key}.json")
+
+    def _load_index(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_atomic(path: str, payload: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            try:
+                f.write(payload)
+            except Exception:
+                f.close()
+                os.remove(tmp_path)
+                raise
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Enregistrement
+    # ------------------------------------------------------------------
+    def record(self, url: str, status: int, content_type: str, body: bytes) -> bool:
+        """
+        Ajoute une variante pour url ; False si le corps est celui de la dernière
+        variante (seule sa date avance).
+        """
+        host, key, canonical = replay_key(url)
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        index_path = self._index_path(host, key)
+        with self._lock:
+            index = self._load_index(index_path) or {"url": url, "path": canonical, "variants": []}
+            variants = index["variants"]
+            now = time.time()
+            if variants and variants[-1]["body"] == digest and variants[-1]["status"] == status:
+                variants[-1]["recorded_at"] = now
+                added = False
+            else:
+                body_path = os.path.join(os.path.dirname(index_path), f"{digest}.body")
+                if not os.path.exists(body_path):
+                    self._write_atomic(body_path, body)
+                variants.append(
+                    {
+                        "status": status,
+                        "content_type": content_type,
+                        "body": digest,
+                        "recorded_at": now,
+                    }
+                )
+                del variants[: -self.max_variants]
+                added = True
+            self._write_atomic(
+                index_path, json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8")
+            )
+        return added
+
+    def record_response(self, response: Any) -> None:
+        """
+        Enregistre une réponse requests (URL demandée, avant redirections). Le corps est
+        lu en entier : une réponse stream=True se relit ensuite depuis la mémoire.
+        Une erreur d'écriture est journalisée, jamais remontée à l'appelant.
+        """
+        try:
+            url = response.request.url if response.request is not None else response.url
+            if self.record(
+                url,
+                response.status_code,
+                response.headers.get("Content-Type", ""),
+                response.content,
+            ):
+                logger.info("Réponse amont enregistrée : %s", url)
+        except OSError as exc:
+            logger.warning("Réponse amont non enregistrée (%s)", exc)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+    def variants(self, url: str) -> List[RecordedResponse]:
+        """Variantes de url (plus ancienne en tête), sinon celles de l'hôte (/*), sinon []."""
+        host, key, _ = replay_key(url)
+        index = self._load_index(self._index_path(host, key))
+        if index is None:
+            _, default_key, _ = replay_key(f"//{host}{DEFAULT_PATH}")
+            index = self._load_index(self._index_path(host, default_key))
+        if index is None:
+            return []
+        folder = os.path.dirname(self._index_path(host, key))
+        responses = []
+        for variant in index["variants"]:
+            with open(os.path.join(folder, f"{variant['body']}.body"), "rb") as f:
+                body = f.read()
+            responses.append(
+                RecordedResponse(
+                    variant["status"], variant["content_type"], body, variant["recorded_at"]
+                )
+            )
+        return responses
+
+    def urls(self) -> List[str]:
+        """URLs enregistrées, tous sites confondus."""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for host in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, host)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.endswith(".json"):
+                    index = self._load_index(os.path.join(folder, name))
+                    if index is not None:
+                        found.append(index["url"])
+        return found
+
+
+__all__ = ["DEFAULT_PATH", "RecordedResponse", "ReplayStore", "replay_key"]
@@ -684,7 +684,7 @@ class ShopPreview {
 
     async loadPreview() {
         try {
-            const response = await fetch(`${this.apiBaseUrl}/api/shop`);
+            const response = await fetch(`${this.apiBaseUrl}/api/shop?profile=card`);
             if (!response.ok) throw new Error('API shop preview error');
             const payload = await response.json();
             
@@ -37,31 +37,23 @@
 
         async loadItemData() {
             try {
-                const response = await fetch(`${this.apiBaseUrl}/api/shop`);
+                // Le backend retrouve l'item (id, offerId, vehicleId, membre de pack ou nom)
+                // et ne renvoie que lui au lieu de toute la boutique
+                const response = await fetch(
+                    `${this.apiBaseUrl}/api/shop/items/${encodeURIComponent(this.itemId)}`
+                );
+                if (response.status === 404) {
+                    this.showError('Article non trouvé');
+                    return;
+                }
                 if (!response.ok) {
                     throw new Error(`Erreur API (${response.status})`);
                 }
 
-                const payload = await response.json();
-                
-                if (payload.success === false) {
-                    throw new Error(payload.error || 'Impossible de charger la boutique');
-                }
+                const item = await response.json();
 
-                // Trouver l'item dans les données
-                let item = null;
-                if (payload.items && Array.isArray(payload.items)) {
-                    item = payload.items.find(i => 
-                        i.id === this.itemId || 
-                        i.entry?.offerId === this.itemId ||
-                        i.name === this.itemId ||
-                        i.devName === this.itemId
-                    );
-                }
-
-                if (!item) {
-                    this.showError('Article non trouvé');
-                    return;
+                if (item.success === false) {
+                    throw new Error(item.error || 'Impossible de charger la boutique');
                 }
 
                 this.itemData = item;
@@ -133,11 +125,18 @@
                 rarityTextEl.textContent = rarity;
             }
 
+            // Hors boutique du jour (fiche du catalogue) : pas de prix, pas de commande
+            const notInShop = this.itemData.in_shop === false;
+
             // Prix
             const priceEl = document.getElementById('shopItemPrice');
             if (priceEl) {
-                const price = this.itemData.vbucks || 0;
-                priceEl.textContent = this.formatPrice(price);
+                if (notInShop) {
+                    priceEl.textContent = 'Pas dans la boutique actuellement';
+                } else {
+                    const price = this.itemData.vbucks || 0;
+                    priceEl.textContent = this.formatPrice(price);
+                }
             }
 
             // Date d'expiration
@@ -317,7 +316,10 @@
 
             // Bouton ajouter au panier
             const addToCartEl = document.getElementById('shopItemAddToCart');
-            if (addToCartEl) {
+            if (addToCartEl && notInShop) {
+                addToCartEl.disabled = true;
+                addToCartEl.textContent = 'Indisponible pour le moment';
+            } else if (addToCartEl) {
                 addToCartEl.addEventListener('click', () => {
                     this.addToCart();
                 });
@@ -333,7 +335,7 @@
                 return;
             }
 
-            if (!this.itemData) return;
+            if (!this.itemData || this.itemData.in_shop === false) return;
 
             // Convertir le prix V-Bucks en FCFA
             const vbucks = this.itemData.vbucks || 0;
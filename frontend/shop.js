@@ -451,7 +451,8 @@
             this.setLoading(true);
             this.state.error = null;
 
-            const url = `${this.apiBaseUrl}/api/shop${forceRefresh ? '?refresh=1' : ''}`;
+            // Profil "card" : seulement ce que la grille affiche (page détails : ?profile=detail)
+            const url = `${this.apiBaseUrl}/api/shop?profile=card${forceRefresh ? '&refresh=1' : ''}`;
 
             try {
                 const response = await fetch(url, {
@@ -599,6 +600,8 @@
                 rarity: { name: rarityName, slug: raritySlug },
                 type: { name: typeName, slug: typeSlug },
                 image: primaryImage,
+                // Miniature WebP du proxy /api/img pour la grille
+                thumbnail: item.images?.thumb || primaryImage,
                 video: videoUrl,
                 tags,
                 giftable: Boolean(item.giftable),
@@ -970,7 +973,7 @@
 
             return `
                 <article class="shop-card product-card rarity-${item.rarity.slug}">
-                    <div class="shop-card-media" style="background-image:url('${item.image}')">
+                    <div class="shop-card-media" style="background-image:url('${item.thumbnail || item.image}')">
                         <span class="rarity-pill">${this.escapeHtml(item.rarity.name)}</span>
                         ${tags}
                     </div>